@@ -1,6 +1,7 @@
 import pytest
 
 from df_py.util import networkutil, oceantestutil
+from df_py.util.addr_registry import get_addr_registry
 from df_py.util.base18 import to_wei
 from df_py.util.oceanutil import OCEAN_token, record_dev_deployed_contracts
 
@@ -13,6 +14,14 @@ def pytest_sessionstart():
     )
 
 
+@pytest.fixture(autouse=True)
+def clear_addr_registry():
+    # tests may mock Web3.to_checksum_address; don't leak memoized results
+    get_addr_registry().clear()
+    yield
+    get_addr_registry().clear()
+
+
 @pytest.fixture
 def w3():
     web3 = networkutil.chain_id_to_web3(8996)
@@ -1,21 +1,24 @@
-from typing import Dict, Union
+from typing import Dict, List, Tuple, Union
 
+import numpy as np
 from enforce_typing import enforce_types
 
-from df_py.predictoor.models import Predictoor
+from df_py.predictoor.models import PredictionTable, Predictoor
 from df_py.predictoor.queries import query_predictoor_contracts
 from df_py.util.graphutil import wait_to_latest_block
 
 
 @enforce_types
 def calc_predictoor_rewards(
-    predictoors: Dict[str, Predictoor], tokens_avail: Union[int, float], chain_id: int
+    predictoors: Union[dict, PredictionTable],
+    tokens_avail: Union[int, float],
+    chain_id: int,
 ) -> Dict[str, Dict[str, float]]:
     """
     Calculate rewards for predictoors based on their weekly payout.
 
     @arguments
-    predictoors -- dict of [pdr_address] : Predictoor objects
+    predictoors -- dict of [pdr_address] : Predictoor objects, or PredictionTable
         The predictoors to calculate rewards for.
     tokens_avail -- float
         The number of tokens available for distribution as rewards.
@@ -29,47 +32,96 @@ def calc_predictoor_rewards(
 
     wait_to_latest_block(chain_id)
 
-    predictoor_contracts = query_predictoor_contracts(chain_id).keys()
+    predictoor_contracts = list(query_predictoor_contracts(chain_id).keys())
     print("# of available contracts: ", len(predictoor_contracts))
     tokens_per_contract = tokens_avail / len(predictoor_contracts)
     print("Tokens per contract:", tokens_per_contract)
 
+    # revenue[c, p] -- revenue of predictoor p, for contract c
+    if isinstance(predictoors, PredictionTable):
+        revenue, pdr_addrs = _revenue_from_table(predictoors, predictoor_contracts)
+    else:
+        revenue, pdr_addrs = _revenue_from_predictoors(
+            predictoors, predictoor_contracts
+        )
+
+    # total revenue per contract, ignoring negative values. cumsum adds in
+    # predictoor order, like a plain loop would, so results are bit-exact
+    positive_revenue = np.maximum(revenue, 0.0)
+    total_revenue = np.zeros(len(predictoor_contracts))
+    if len(pdr_addrs) > 0:
+        total_revenue = np.cumsum(positive_revenue, axis=1)[:, -1]
+
     # dict to store rewards per contract
     rewards: Dict[str, Dict[str, float]] = {
         contract: {} for contract in predictoor_contracts
     }
 
-    # Loop through each contract and calculate the rewards for predictions
-    # made for that specific contract
-    for contract in predictoor_contracts:
-        total_revenue_for_contract = 0
-        for p in predictoors.values():
-            summary = p.get_prediction_summary(contract)
-            total_revenue_for_contract += max(
-                summary.total_revenue, 0
-            )  # ignore negative values
-
+    for c, contract in enumerate(predictoor_contracts):
         # If total revenue for this contract is 0, no rewards are distributed
-        if total_revenue_for_contract == 0:
+        if total_revenue[c] == 0:
             print("Total revenue for contract: ", contract, " was zero")
             continue
 
-        # Calculate rewards for each predictoor for this contract
-        for pdr_address, predictoor in predictoors.items():
-            revenue_contract = predictoor.get_prediction_summary(contract).total_revenue
-            if revenue_contract <= 0:
-                # ignore negative revenues
-                continue
-            reward_amt = (
-                revenue_contract / total_revenue_for_contract * tokens_per_contract
-            )
-            if reward_amt < MIN_REWARD:
-                continue
-            rewards[contract][pdr_address] = reward_amt
+        reward_amts = revenue[c] / total_revenue[c] * tokens_per_contract
+        rewarded = (revenue[c] > 0) & (reward_amts >= MIN_REWARD)
+        for p in np.flatnonzero(rewarded):
+            rewards[contract][pdr_addrs[p]] = float(reward_amts[p])
 
     return rewards
 
 
+def _revenue_from_table(
+    table: PredictionTable, contracts: List[str]
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    @return
+      revenue -- 2d array of [contract_i, predictoor_i] : revenue
+      pdr_addrs -- predictoor addresses, in order of first appearance
+    """
+    rows = table.rows
+
+    # predictoor index of each row, in order of first appearance
+    pdr_ids, first_rows, inverse = np.unique(
+        rows["predictoor_id"], return_index=True, return_inverse=True
+    )
+    order = np.argsort(first_rows)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    pdr_index = rank[inverse.reshape(-1)]
+    pdr_addrs = [table.addrs[pdr_ids[k]] for k in order]
+
+    # contract index of each row; -1 for contracts that don't get rewards
+    contract_index_of_id = np.full(len(table.addrs), -1, dtype=np.int64)
+    for c, contract in enumerate(contracts):
+        if contract in table.addr_ids:
+            contract_index_of_id[table.addr_ids[contract]] = c
+    contract_index = contract_index_of_id[rows["contract_id"]]
+
+    # group-by (contract, predictoor). bincount adds rows in order
+    keep = contract_index >= 0
+    keys = contract_index[keep] * len(pdr_addrs) + pdr_index[keep]
+    row_revenue = rows["payout"][keep] - rows["stake"][keep]
+    revenue = np.bincount(
+        keys, weights=row_revenue, minlength=len(contracts) * len(pdr_addrs)
+    )
+    return revenue.reshape(len(contracts), len(pdr_addrs)), pdr_addrs
+
+
+def _revenue_from_predictoors(
+    predictoors: Dict[str, Predictoor], contracts: List[str]
+) -> Tuple[np.ndarray, List[str]]:
+    """Like _revenue_from_table(), from Predictoors' per-contract summaries"""
+    contract_index = {contract: c for c, contract in enumerate(contracts)}
+    pdr_addrs = list(predictoors.keys())
+    revenue = np.zeros((len(contracts), len(pdr_addrs)))
+    for p, predictoor in enumerate(predictoors.values()):
+        for contract, summary in predictoor.prediction_summaries.items():
+            if contract in contract_index:
+                revenue[contract_index[contract], p] = summary.total_revenue
+    return revenue, pdr_addrs
+
+
 def aggregate_predictoor_rewards(
     predictoor_rewards: Dict[str, Dict[str, float]]
 ) -> Dict[str, float]:
@@ -0,0 +1,155 @@
+"""
+Process-wide cache of predictoor contract metadata, per chain.
+
+query_predictoor_contracts() is called from many places within one dftool
+run (nftinfo, volsym, RewardCalculator, predictoor rewards). This cache
+makes them share one query per chain.
+
+An entry is fresh for ttl_s seconds. After that, it's still used if the
+subgraph hasn't synced any block since the entry was fetched, as contracts
+can only change with new blocks. Optionally, entries are also persisted
+to a csv_dir, so later dftool runs over that dir reuse them.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from enforce_typing import enforce_types
+
+from df_py.predictoor.models import PredictContract
+
+CONTRACTS_CACHE_TTL_S = 600
+CONTRACTS_CACHE_FILENAME = "predictoor_contracts_cache.json"
+
+
+class PredictContractsCache:
+    """
+    Cache of dict of [contract_addr] : PredictContract, per chain.
+    Safe to use from many threads at once.
+    """
+
+    @enforce_types
+    def __init__(self, ttl_s: int = CONTRACTS_CACHE_TTL_S):
+        self.ttl_s = ttl_s
+        self.csv_dir: Optional[str] = None
+        self._entries: Dict[int, dict] = {}  # [chain_id] : entry
+        self._lock = threading.RLock()
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Hold this while fetching, so that only one caller fetches"""
+        return self._lock
+
+    def get(
+        self,
+        chain_id: int,
+        synced_block: Callable[[], Optional[int]],
+        ttl_s: Optional[int] = None,
+    ) -> Optional[Dict[str, PredictContract]]:
+        """
+        @description
+          Return the cached contracts of this chain, or None if they're
+          missing or stale.
+
+        @arguments
+          chain_id -- chain of the contracts
+          synced_block -- returns the block that the subgraph has synced to,
+            or None if unknown. Only called once the entry is past its ttl.
+          ttl_s -- if given, use this ttl instead of self.ttl_s
+        """
+        if ttl_s is None:
+            ttl_s = self.ttl_s
+        with self._lock:
+            entry = self._entries.get(chain_id)
+            if entry is None:
+                entry = self._load_entry(chain_id)
+            if entry is None:
+                return None
+
+            if time.time() - entry["fetched_at"] >= ttl_s:
+                block = synced_block()
+                if block is None or entry["block"] is None or block != entry["block"]:
+                    return None
+                entry["fetched_at"] = time.time()  # unchanged as of now
+                self._save_entry(chain_id, entry)
+
+            self._entries[chain_id] = entry
+            return dict(entry["contracts"])
+
+    def put(
+        self,
+        chain_id: int,
+        contracts: Dict[str, PredictContract],
+        block: Optional[int],
+    ):
+        """Cache the contracts of this chain, as fetched at this block"""
+        entry = {
+            "contracts": dict(contracts),
+            "block": block,
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            self._entries[chain_id] = entry
+            self._save_entry(chain_id, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _load_entry(self, chain_id: int) -> Optional[dict]:
+        entries = self._read_file()
+        entry = entries.get(str(chain_id))
+        if entry is None:
+            return None
+        contracts = [PredictContract.from_dict(d) for d in entry["contracts"]]
+        return {
+            "contracts": {contract.address: contract for contract in contracts},
+            "block": entry["block"],
+            "fetched_at": entry["fetched_at"],
+        }
+
+    def _save_entry(self, chain_id: int, entry: dict):
+        if not self._persisting():
+            return
+        entries = self._read_file()
+        entries[str(chain_id)] = {
+            "contracts": [c.to_dict() for c in entry["contracts"].values()],
+            "block": entry["block"],
+            "fetched_at": entry["fetched_at"],
+        }
+        filename = self._filename()
+        with open(filename + ".tmp", "w") as f:
+            json.dump(entries, f)
+        os.replace(filename + ".tmp", filename)
+
+    def _read_file(self) -> dict:
+        if not self._persisting() or not os.path.exists(self._filename()):
+            return {}
+        with open(self._filename(), "r") as f:
+            return json.load(f)
+
+    def _persisting(self) -> bool:
+        # the dir may be gone, e.g. a tmp dir of an earlier run in this process
+        return self.csv_dir is not None and os.path.isdir(self.csv_dir)
+
+    def _filename(self) -> str:
+        assert self.csv_dir is not None
+        return os.path.join(self.csv_dir, CONTRACTS_CACHE_FILENAME)
+
+
+_CACHE = PredictContractsCache()
+
+
+def get_predictoor_contracts_cache() -> PredictContractsCache:
+    """Returns the process-wide cache"""
+    return _CACHE
+
+
+@enforce_types
+def persist_predictoor_contracts_cache(csv_dir: Optional[str]):
+    """Also persist the cache to csv_dir, and reuse what's there. None: don't"""
+    with _CACHE.lock:
+        _CACHE.csv_dir = csv_dir
@@ -1,15 +1,31 @@
-import csv
 import os
 import random
 from typing import Dict
 
+import numpy as np
 from enforce_typing import enforce_types
 
-from df_py.predictoor.models import PredictContract, Prediction, Predictoor
+from df_py.predictoor.models import PredictContract, PredictionTable, Predictoor
 from df_py.util.csv_helpers import assert_is_eth_addr
+from df_py.util.storage import (
+    Schema,
+    load_arrow_table,
+    load_table,
+    save_table,
+    table_filename,
+)
 
 
 # ------------------------------- PREDICTOOR DATA -------------------------------
+PREDICTOOR_DATA_SCHEMA: Schema = [
+    ("predictoor_addr", str),
+    ("slot", int),
+    ("payout", float),
+    ("stake", float),
+    ("contract_addr", str),
+]
+
+
 def sample_predictoor_data_csv(num_rows=50000):
     def random_predictor_address():
         return f"0x{random.randint(1, 16):x}"
@@ -41,61 +57,88 @@ def save_predictoor_data_csv(
     predictoor_data: Dict[str, Predictoor],
     csv_dir: str,
 ):
+    """Save the predictions of Predictoors created with keep_predictions"""
+    save_prediction_table(PredictionTable.from_predictoors(predictoor_data), csv_dir)
+
+
+@enforce_types
+def save_prediction_table(table: PredictionTable, csv_dir: str):
+    """
+    @description
+      Save predictions to the predictoor_data csv. Rows are grouped by
+      predictoor, in order of first appearance.
+    """
     assert os.path.exists(csv_dir), csv_dir
     csv_file = predictoor_data_csv_filename(csv_dir)
     assert not os.path.exists(csv_file), csv_file
 
-    fieldnames = ["predictoor_addr", "slot", "payout", "stake", "contract_addr"]
-    with open(csv_file, mode="w", newline="") as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        for predictoor in predictoor_data.values():
-            assert_is_eth_addr(predictoor.address)
-            for prediction in predictoor._predictions:
-                writer.writerow(
-                    {
-                        "predictoor_addr": predictoor.address,
-                        "contract_addr": prediction.contract_addr,
-                        "slot": prediction.slot,
-                        "payout": prediction.payout,
-                        "stake": prediction.stake,
-                    }
-                )
+    table_rows = table.rows
+    addrs = np.array(table.addrs, dtype=object)
+    rows: list = []
+    for predictoor_addr, group in table.predictoor_groups().items():
+        assert_is_eth_addr(predictoor_addr)
+        group_rows = table_rows[group]
+        rows += zip(
+            [predictoor_addr] * len(group),
+            group_rows["slot"].tolist(),
+            group_rows["payout"].tolist(),
+            group_rows["stake"].tolist(),
+            addrs[group_rows["contract_id"]].tolist(),
+        )
+    save_table(csv_file, PREDICTOOR_DATA_SCHEMA, rows)
 
     print(f"Created {csv_file}")
 
 
 @enforce_types
-def load_predictoor_data_csv(csv_dir: str) -> Dict[str, Predictoor]:
-    csv_file = predictoor_data_csv_filename(csv_dir)
+def load_predictoor_data_csv(
+    csv_dir: str, keep_predictions: bool = True
+) -> Dict[str, Predictoor]:
+    """
+    @description
+      Load predictoor data. Per-contract summaries are always available;
+      unset keep_predictions to not keep each Predictoor's predictions.
+    """
+    return load_prediction_table(csv_dir).to_predictoors(keep_predictions)
 
-    predictoors = {}
-    with open(csv_file, mode="r") as file:
-        csv_reader = csv.DictReader(file)
-        for row in csv_reader:
-            address = row["predictoor_addr"]
-            contract_addr = row["contract_addr"]
-            slot = int(row["slot"])
-            payout = float(row["payout"])
-            stake = float(row["stake"])
-            prediction = Prediction(slot, payout, stake, contract_addr)
 
-            if address not in predictoors:
-                predictoors[address] = Predictoor(address)
+@enforce_types
+def load_prediction_table(csv_dir: str) -> PredictionTable:
+    """Load the predictoor_data csv into a columnar PredictionTable"""
+    csv_file = predictoor_data_csv_filename(csv_dir)
 
-            predictoors[address].add_prediction(prediction)
+    arrow_table = load_arrow_table(csv_file, PREDICTOOR_DATA_SCHEMA)
+    table = PredictionTable()
+    table.add_predictions(
+        arrow_table["predictoor_addr"].to_numpy(),
+        arrow_table["slot"].to_numpy(),
+        arrow_table["payout"].to_numpy(),
+        arrow_table["stake"].to_numpy(),
+        arrow_table["contract_addr"].to_numpy(),
+    )
 
     print(f"Loaded {csv_file}")
-    return predictoors
+    return table
 
 
 @enforce_types
 def predictoor_data_csv_filename(csv_dir):
     f = "predictoor_data.csv"
-    return os.path.join(csv_dir, f)
+    return table_filename(os.path.join(csv_dir, f))
 
 
 # ------------------------------- PREDICTOOR SUMMARY -------------------------------
+PREDICTOOR_SUMMARY_SCHEMA: Schema = [
+    ("predictoor_addr", str),
+    ("contract_addr", str),
+    ("prediction_count", int),
+    ("correct_prediction_count", int),
+    ("accuracy", float),
+    ("total_stake", float),
+    ("total_payout", float),
+]
+
+
 def sample_predictoor_summary_csv():
     # pylint: disable=line-too-long
     return """predictoor_addr,contract_addr,prediction_count,correct_prediction_count,accuracy,total_stake,total_payout
@@ -117,44 +160,37 @@ def save_predictoor_summary_csv(predictoor_data: Dict[str, Predictoor], csv_dir:
 
     csv_file = predictoor_summary_csv_filename(csv_dir)
 
-    fieldnames = [
-        "predictoor_addr",
-        "contract_addr",
-        "prediction_count",
-        "correct_prediction_count",
-        "accuracy",
-        "total_stake",
-        "total_payout",
-    ]
-
-    with open(csv_file, "w", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        # Writing data rows
-        for predictoor_addr, predictoor in predictoor_data.items():
-            prediction_summaries = predictoor.prediction_summaries
-            for contract_addr, summary in prediction_summaries.items():
-                writer.writerow(
-                    {
-                        "predictoor_addr": predictoor_addr,
-                        "contract_addr": contract_addr,
-                        "prediction_count": summary.prediction_count,
-                        "correct_prediction_count": summary.correct_prediction_count,
-                        "accuracy": summary.accuracy,
-                        "total_stake": summary.total_stake,
-                        "total_payout": summary.total_payout,
-                    }
-                )
+    rows = []
+    for predictoor_addr, predictoor in predictoor_data.items():
+        prediction_summaries = predictoor.prediction_summaries
+        for contract_addr, summary in prediction_summaries.items():
+            row = [
+                predictoor_addr,
+                contract_addr,
+                summary.prediction_count,
+                summary.correct_prediction_count,
+                summary.accuracy,
+                summary.total_stake,
+                summary.total_payout,
+            ]
+            rows.append(row)
+    save_table(csv_file, PREDICTOOR_SUMMARY_SCHEMA, rows)
 
 
 @enforce_types
 def predictoor_summary_csv_filename(csv_dir):
     f = "predictoor_summary.csv"
-    return os.path.join(csv_dir, f)
+    return table_filename(os.path.join(csv_dir, f))
 
 
 # ------------------------------- REWARDS -------------------------------
+PREDICTOOR_REWARDS_SCHEMA: Schema = [
+    ("predictoor_addr", str),
+    ("contract_addr", str),
+    ("ROSE_amt", float),
+]
+
+
 def sample_predictoor_rewards_csv():
     return """predictoor_addr,contract_addr,ROSE_amt
 0x0000000000000000000000000000000000000000,0x1100000000000000000000000000000000000000,10.0
@@ -172,17 +208,14 @@ def save_predictoor_rewards_csv(
     csv_file = predictoor_rewards_csv_filename(csv_dir)
     assert not os.path.exists(csv_file), csv_file
 
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-        row = ["predictoor_addr", "contract_addr", "ROSE_amt"]
-        writer.writerow(row)
-
-        for contract_addr, contracts in predictoor_rewards.items():
-            assert_is_eth_addr(contract_addr)
-            for predictoor_addr, reward in contracts.items():
-                assert_is_eth_addr(predictoor_addr)
-                row = [predictoor_addr.lower(), contract_addr.lower(), str(reward)]
-                writer.writerow(row)
+    rows = []
+    for contract_addr, contracts in predictoor_rewards.items():
+        assert_is_eth_addr(contract_addr)
+        for predictoor_addr, reward in contracts.items():
+            assert_is_eth_addr(predictoor_addr)
+            row = [predictoor_addr.lower(), contract_addr.lower(), str(reward)]
+            rows.append(row)
+    save_table(csv_file, PREDICTOOR_REWARDS_SCHEMA, rows)
 
     print(f"Created {csv_file}")
 
@@ -205,23 +238,16 @@ def load_predictoor_rewards_csv(csv_dir: str) -> Dict[str, Dict[str, float]]:
     csv_file = predictoor_rewards_csv_filename(csv_dir)
     predictoor_rewards: Dict[str, Dict[str, float]] = {}
 
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-
-        for row_i, row in enumerate(reader):
-            if row_i == 0:
-                assert row == ["predictoor_addr", "contract_addr", "ROSE_amt"]
-                continue
-            predictoor_addr, contract_addr, reward_s = row
-            predictoor_addr = predictoor_addr.lower()
-            contract_addr = contract_addr.lower()
-            reward = float(reward_s)
-            assert_is_eth_addr(predictoor_addr)
-            assert_is_eth_addr(contract_addr)
+    table = load_table(csv_file, PREDICTOOR_REWARDS_SCHEMA)
+    for predictoor_addr, contract_addr, reward in zip(*table.values()):
+        predictoor_addr = predictoor_addr.lower()
+        contract_addr = contract_addr.lower()
+        assert_is_eth_addr(predictoor_addr)
+        assert_is_eth_addr(contract_addr)
 
-            if not contract_addr in predictoor_rewards:
-                predictoor_rewards[contract_addr] = {}
-            predictoor_rewards[contract_addr][predictoor_addr] = reward
+        if not contract_addr in predictoor_rewards:
+            predictoor_rewards[contract_addr] = {}
+        predictoor_rewards[contract_addr][predictoor_addr] = reward
 
     print(f"Loaded {csv_file}")
     return predictoor_rewards
@@ -230,10 +256,18 @@ def load_predictoor_rewards_csv(csv_dir: str) -> Dict[str, Dict[str, float]]:
 @enforce_types
 def predictoor_rewards_csv_filename(csv_dir):
     f = "predictoor_rewards.csv"
-    return os.path.join(csv_dir, f)
+    return table_filename(os.path.join(csv_dir, f))
 
 
 # --------------------------- PREDICTOOR CONTRACTS ---------------------------
+PREDICTOOR_CONTRACTS_SCHEMA: Schema = [
+    ("chainid", int),
+    ("address", str),
+    ("name", str),
+    ("symbol", str),
+    ("blocks_per_epoch", int),
+    ("blocks_per_subscription", int),
+]
 
 
 def sample_predictoor_contracts_csv():
@@ -247,35 +281,32 @@ def save_predictoor_contracts_csv(
     predictoor_contracts: Dict[str, PredictContract], csv_dir: str
 ):
     assert os.path.exists(csv_dir), csv_dir
-    csv_file = os.path.join(csv_dir, "predictoor_contracts.csv")
+    csv_file = predictoor_contracts_csv_filename(csv_dir)
     assert not os.path.exists(csv_file), csv_file
 
-    fieldnames = [
-        "chainid",
-        "address",
-        "name",
-        "symbol",
-        "blocks_per_epoch",
-        "blocks_per_subscription",
-    ]
-
-    with open(csv_file, "w") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for contract in predictoor_contracts.values():
-            writer.writerow(contract.to_dict())
+    rows = []
+    for contract in predictoor_contracts.values():
+        row = [
+            contract.chainid,
+            contract.address,
+            contract.name,
+            contract.symbol,
+            contract.blocks_per_epoch,
+            contract.blocks_per_subscription,
+        ]
+        rows.append(row)
+    save_table(csv_file, PREDICTOOR_CONTRACTS_SCHEMA, rows)
     print(f"Created {csv_file}")
 
 
 def load_predictoor_contracts_csv(csv_dir: str) -> Dict[str, PredictContract]:
-    csv_file = os.path.join(csv_dir, "predictoor_contracts.csv")
+    csv_file = predictoor_contracts_csv_filename(csv_dir)
     contracts: Dict[str, PredictContract] = {}
 
-    with open(csv_file, "r") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            contract = PredictContract.from_dict(row)
-            contracts[contract.address] = contract
+    table = load_table(csv_file, PREDICTOOR_CONTRACTS_SCHEMA)
+    for row in zip(*table.values()):
+        contract = PredictContract(*row)
+        contracts[contract.address] = contract
 
     print(f"Loaded {csv_file}")
     return contracts
@@ -283,4 +314,4 @@ def load_predictoor_contracts_csv(csv_dir: str) -> Dict[str, PredictContract]:
 
 def predictoor_contracts_csv_filename(csv_dir):
     f = "predictoor_contracts.csv"
-    return os.path.join(csv_dir, f)
+    return table_filename(os.path.join(csv_dir, f))
@@ -0,0 +1,173 @@
+"""
+Streaming ingestion of predictoor data, straight to disk.
+
+Slots get split into windows, which are queried concurrently. Each window's
+pages are written to a temp file as they arrive, so memory stays bounded by
+the page size. Finished windows are appended, in slot order, to a partial
+predictoor_data csv, and per-predictoor summaries are aggregated as rows
+get appended. After each window, the flushed slot and file size get
+checkpointed. An interrupted run resumes from the last checkpoint.
+"""
+
+import csv
+import json
+import math
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+from enforce_typing import enforce_types
+
+from df_py.predictoor.csvs import PREDICTOOR_DATA_SCHEMA, predictoor_data_csv_filename
+from df_py.predictoor.models import Predictoor
+from df_py.predictoor.queries import query_prediction_pages, slot_windows
+from df_py.util.constants import MAX_PREDICTOOR_QUERY_WORKERS
+from df_py.util.csv_helpers import assert_is_eth_addr
+from df_py.util.graphutil import map_concurrently
+from df_py.util.storage import convert_csv_table
+
+STREAM_WINDOW_S = 3600  # slots per window. One checkpoint per window
+
+PARTIAL_FILENAME = "predictoor_data.partial.csv"
+PROGRESS_FILENAME = "predictoor_data.progress.json"
+WINDOWS_DIRNAME = "predictoor_data.windows"
+
+
+@enforce_types
+def ingest_predictoor_data(
+    st_ts: int,
+    end_ts: int,
+    chainID: int,
+    csv_dir: str,
+    max_workers: int = MAX_PREDICTOOR_QUERY_WORKERS,
+    window_s: int = STREAM_WINDOW_S,
+) -> Dict[str, Predictoor]:
+    """
+    @description
+      Query the predictions with slots in (st_ts, end_ts], and stream them
+      to the predictoor_data file in csv_dir. If an earlier call with the
+      same arguments got interrupted, resume from where it left off.
+
+    @arguments
+      st_ts, end_ts -- slot range, as timestamps
+      chainID -- chain whose subgraph is queried
+      csv_dir -- output directory
+      max_workers -- max # windows to query concurrently
+      window_s -- # slots per window; a checkpoint is saved after each
+
+    @return
+      predictoors -- dict of [predictoor_addr] : Predictoor, with summaries
+        of all predictions. Predictions themselves aren't kept.
+    """
+    data_file = predictoor_data_csv_filename(csv_dir)
+    assert not os.path.exists(data_file), data_file
+    partial_file = os.path.join(csv_dir, PARTIAL_FILENAME)
+    windows_dir = os.path.join(csv_dir, WINDOWS_DIRNAME)
+    run = {"st_ts": st_ts, "end_ts": end_ts, "chainID": chainID}
+
+    predictoors: Dict[str, Predictoor] = {}
+    progress = _load_progress(csv_dir, run)
+    if progress is None:
+        with open(partial_file, "w") as f:
+            csv.writer(f).writerow([name for name, _ in PREDICTOOR_DATA_SCHEMA])
+        flushed_slot = st_ts
+        _save_progress(csv_dir, run, flushed_slot, os.path.getsize(partial_file))
+    else:
+        flushed_slot, offset = progress
+        with open(partial_file, "r+") as f:
+            f.truncate(offset)  # drop rows of a window that didn't finish
+        _aggregate_csv(partial_file, predictoors)
+        print(f"Resuming predictoor data from slot {flushed_slot}")
+
+    os.makedirs(windows_dir, exist_ok=True)
+    windows: List[Tuple[int, int]] = []
+    if flushed_slot < end_ts:
+        n_windows = math.ceil((end_ts - flushed_slot) / window_s)
+        windows = slot_windows(flushed_slot, end_ts, n_windows)
+    window_files = map_concurrently(
+        lambda window: _fetch_window(window, chainID, windows_dir),
+        windows,
+        max_workers,
+    )
+    for (_, window_end_ts), window_file in zip(windows, window_files):
+        with open(partial_file, "a") as f:
+            with open(window_file, "r") as window_f:
+                for line in window_f:
+                    f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        _aggregate_csv(window_file, predictoors, has_header=False)
+        os.remove(window_file)
+        offset = os.path.getsize(partial_file)
+        _save_progress(csv_dir, run, window_end_ts, offset)
+
+    convert_csv_table(partial_file, data_file, PREDICTOOR_DATA_SCHEMA)
+    os.remove(os.path.join(csv_dir, PROGRESS_FILENAME))
+    shutil.rmtree(windows_dir)
+
+    print(f"Created {data_file}")
+    return predictoors
+
+
+def _fetch_window(window: Tuple[int, int], chainID: int, windows_dir: str) -> str:
+    """Write the predictions of one window to its own csv, page by page"""
+    st_ts, end_ts = window
+    window_file = os.path.join(windows_dir, f"{st_ts}-{end_ts}.csv")
+    with open(window_file, "w") as f:
+        writer = csv.writer(f)
+        for page in query_prediction_pages(st_ts, end_ts, chainID):
+            writer.writerows(
+                [
+                    predictoor_addr,
+                    prediction.slot,
+                    prediction.payout,
+                    prediction.stake,
+                    prediction.contract_addr,
+                ]
+                for _, predictoor_addr, prediction in page
+            )
+    return window_file
+
+
+def _aggregate_csv(
+    csv_file: str, predictoors: Dict[str, Predictoor], has_header: bool = True
+):
+    """Add the predictions in a predictoor_data csv to the Predictoors"""
+    with open(csv_file, "r") as f:
+        reader = csv.reader(f)
+        if has_header:
+            next(reader)
+        for predictoor_addr, slot, payout, stake, contract_addr in reader:
+            predictoor = predictoors.get(predictoor_addr)
+            if predictoor is None:
+                assert_is_eth_addr(predictoor_addr)
+                predictoor = Predictoor(predictoor_addr, keep_predictions=False)
+                predictoors[predictoor_addr] = predictoor
+            predictoor.add_predictions(
+                [int(slot)], [float(payout)], [float(stake)], [contract_addr]
+            )
+
+
+def _load_progress(csv_dir: str, run: dict) -> Optional[Tuple[int, int]]:
+    """Return (flushed_slot, offset) of an earlier run, if there's one"""
+    progress_file = os.path.join(csv_dir, PROGRESS_FILENAME)
+    if not os.path.exists(progress_file):
+        return None
+
+    with open(progress_file, "r") as f:
+        progress = json.load(f)
+    assert progress["run"] == run, (
+        f"{progress_file} is from another run, with {progress['run']}. "
+        "Delete it to start over."
+    )
+    return progress["flushed_slot"], progress["offset"]
+
+
+def _save_progress(csv_dir: str, run: dict, flushed_slot: int, offset: int):
+    """Atomically checkpoint that slots up to flushed_slot are in the first
+    offset bytes of the partial csv"""
+    progress_file = os.path.join(csv_dir, PROGRESS_FILENAME)
+    tmp_file = progress_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({"run": run, "flushed_slot": flushed_slot, "offset": offset}, f)
+    os.replace(tmp_file, progress_file)
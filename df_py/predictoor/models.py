@@ -1,5 +1,6 @@
-from typing import Dict, List
+from typing import Dict, List, Sequence
 
+import numpy as np
 from enforce_typing import enforce_types
 
 
@@ -11,6 +12,18 @@ class Prediction:
         self.stake = stake
         self.contract_addr = contract_addr
 
+    @classmethod
+    def _unchecked(
+        cls, slot: int, payout: float, stake: float, contract_addr: str
+    ) -> "Prediction":
+        """Like __init__ but without type checks, for already-typed bulk data"""
+        prediction = cls.__new__(cls)
+        prediction.slot = slot
+        prediction.payout = payout
+        prediction.stake = stake
+        prediction.contract_addr = contract_addr
+        return prediction
+
     @property
     def is_correct(self) -> bool:
         """
@@ -115,11 +128,30 @@ class PredictionSummary:
 
 
 class Predictoor(PredictoorBase):
+    """
+    Aggregates a predictoor's predictions. Per-contract totals are updated as
+    predictions get added, so summaries don't need to rescan predictions.
+    The predictions themselves are kept too, unless keep_predictions is False.
+    """
+
     @enforce_types
-    def __init__(self, address: str):
+    def __init__(self, address: str, keep_predictions: bool = True):
         super().__init__(address, 0, 0, 0, 0)
+        self._keep_predictions = keep_predictions
         self._predictions: List[Prediction] = []
 
+        # [contract_addr] : running totals of predictions for that contract
+        self._summaries: Dict[str, PredictionSummary] = {}
+
+    @property
+    def predictions(self) -> List[Prediction]:
+        """
+        Returns all predictions made by this Predictoor, in the order added.
+        Not available if it was created with keep_predictions=False.
+        """
+        assert self._keep_predictions, "predictions weren't kept"
+        return self._predictions
+
     def get_prediction_summary(self, contract_addr: str) -> PredictionSummary:
         """
         Get the prediction summary for a specific contract address.
@@ -129,30 +161,10 @@ class Predictoor(PredictoorBase):
         @return:
             PredictionSummary - The prediction summary for the specified contract address.
         """
-        prediction_count = 0
-        correct_prediction_count = 0
-        total_stake = 0.0
-        total_payout = 0.0
-        total_revenue = 0.0
-
-        for prediction in self._predictions:
-            if prediction.contract_addr != contract_addr:
-                continue
-            prediction_count += 1
-            total_revenue += prediction.revenue
-            total_stake += prediction.stake
-            if prediction.is_correct:
-                correct_prediction_count += 1
-                total_payout += prediction.payout
-
-        return PredictionSummary(
-            prediction_count,
-            correct_prediction_count,
-            contract_addr,
-            total_payout,
-            total_revenue,
-            total_stake,
-        )
+        summary = self._summaries.get(contract_addr)
+        if summary is None:
+            return PredictionSummary(0, 0, contract_addr, 0.0, 0.0, 0.0)
+        return _copy_summary(summary)
 
     @property
     def prediction_summaries(self) -> Dict[str, PredictionSummary]:
@@ -162,16 +174,10 @@ class Predictoor(PredictoorBase):
         @return
             Dict[str, PredictionSummary] - A dict of PredictionSummary objects.
         """
-        prediction_summaries = {}
-        for prediction in self._predictions:
-            contract_addr = prediction.contract_addr
-            if contract_addr in prediction_summaries:
-                continue
-            prediction_summaries[contract_addr] = self.get_prediction_summary(
-                contract_addr
-            )
-
-        return prediction_summaries
+        return {
+            contract_addr: _copy_summary(summary)
+            for contract_addr, summary in self._summaries.items()
+        }
 
     @property
     def accuracy(self) -> float:
@@ -187,11 +193,261 @@ class Predictoor(PredictoorBase):
 
     @enforce_types
     def add_prediction(self, prediction: Prediction):
-        self._predictions.append(prediction)
+        if self._keep_predictions:
+            self._predictions.append(prediction)
         self._prediction_count += 1
         if prediction.is_correct:
             self._correct_prediction_count += 1
         self._revenue += prediction.revenue
+        self._add_to_summary(
+            prediction.payout, prediction.stake, prediction.contract_addr
+        )
+
+    def add_predictions(
+        self,
+        slots: List[int],
+        payouts: List[float],
+        stakes: List[float],
+        contract_addrs: List[str],
+    ):
+        """
+        Add many predictions at once, given as columns. Same result as calling
+        add_prediction() for each, but values must already have the right types.
+        """
+        assert len(slots) == len(payouts) == len(stakes) == len(contract_addrs)
+        if self._keep_predictions:
+            self._predictions += map(
+                Prediction._unchecked, slots, payouts, stakes, contract_addrs
+            )
+        self._prediction_count += len(slots)
+        self._correct_prediction_count += sum(payout > 0 for payout in payouts)
+        self._revenue = sum(
+            (payout - stake for payout, stake in zip(payouts, stakes)), self._revenue
+        )
+        for payout, stake, contract_addr in zip(payouts, stakes, contract_addrs):
+            self._add_to_summary(payout, stake, contract_addr)
+
+    def _add_to_summary(self, payout: float, stake: float, contract_addr: str):
+        summary = self._summaries.get(contract_addr)
+        if summary is None:
+            summary = PredictionSummary(0, 0, contract_addr, 0.0, 0.0, 0.0)
+            self._summaries[contract_addr] = summary
+        summary.prediction_count += 1
+        summary.total_revenue += payout - stake
+        summary.total_stake += stake
+        if payout > 0:
+            summary.correct_prediction_count += 1
+            summary.total_payout += payout
+
+
+def _copy_summary(summary: PredictionSummary) -> PredictionSummary:
+    return PredictionSummary(
+        summary.prediction_count,
+        summary.correct_prediction_count,
+        summary.contract_addr,
+        summary.total_payout,
+        summary.total_revenue,
+        summary.total_stake,
+    )
+
+
+PREDICTION_DTYPE = np.dtype(
+    [
+        ("predictoor_id", np.int32),
+        ("contract_id", np.int32),
+        ("slot", np.int64),
+        ("payout", np.float64),
+        ("stake", np.float64),
+    ]
+)
+
+_CHUNK_SIZE = 65536  # rows added one at a time get packed into arrays this big
+
+
+class PredictionTable:
+    """
+    Columnar store of predictions, for weeks with millions of them.
+
+    Each row is one prediction, in a numpy structured array of PREDICTION_DTYPE.
+    Predictoor and contract addresses are interned to int ids, which index
+    into addrs. Rows stay in the order added.
+    """
+
+    def __init__(self):
+        self._addrs: List[str] = []  # [id] : addr
+        self._ids: Dict[str, int] = {}  # [addr] : id
+        self._chunks: List[np.ndarray] = []
+        self._pending: List[tuple] = []  # rows not yet packed into a chunk
+
+    @property
+    def addrs(self) -> List[str]:
+        """All interned addresses, indexed by id"""
+        return self._addrs
+
+    @property
+    def addr_ids(self) -> Dict[str, int]:
+        """Dict of [addr] : id, for all interned addresses"""
+        return self._ids
+
+    def addr_id(self, addr: str) -> int:
+        """Return the id of this address, interning it if it's new"""
+        id_ = self._ids.get(addr)
+        if id_ is None:
+            id_ = len(self._addrs)
+            self._addrs.append(addr)
+            self._ids[addr] = id_
+        return id_
+
+    @enforce_types
+    def add_prediction(self, predictoor_addr: str, prediction: Prediction):
+        self._pending.append(
+            (
+                self.addr_id(predictoor_addr),
+                self.addr_id(prediction.contract_addr),
+                prediction.slot,
+                prediction.payout,
+                prediction.stake,
+            )
+        )
+        if len(self._pending) >= _CHUNK_SIZE:
+            self._pack_pending()
+
+    def add_predictions(
+        self,
+        predictoor_addrs: Sequence[str],
+        slots: Sequence[int],
+        payouts: Sequence[float],
+        stakes: Sequence[float],
+        contract_addrs: Sequence[str],
+    ):
+        """Add many predictions at once, given as columns (lists or arrays)"""
+        n = len(slots)
+        assert len(predictoor_addrs) == len(payouts) == len(stakes) == n
+        assert len(contract_addrs) == n
+        self._pack_pending()
+
+        chunk = np.empty(n, dtype=PREDICTION_DTYPE)
+        chunk["predictoor_id"] = self._intern_column(predictoor_addrs)
+        chunk["contract_id"] = self._intern_column(contract_addrs)
+        chunk["slot"] = slots
+        chunk["payout"] = payouts
+        chunk["stake"] = stakes
+        self._chunks.append(chunk)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """All predictions, as one structured array of PREDICTION_DTYPE"""
+        self._pack_pending()
+        if len(self._chunks) != 1:
+            self._chunks = [np.concatenate(self._chunks or [_empty_rows()])]
+        return self._chunks[0]
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for chunk in self._chunks) + len(self._pending)
+
+    def predictoor_groups(self) -> Dict[str, np.ndarray]:
+        """
+        @return
+          groups -- dict of [predictoor_addr] : indices of its rows. Predictoors
+            are in order of first appearance, and rows keep their order.
+        """
+        predictoor_ids = self.rows["predictoor_id"]
+        uniq_ids, first_rows, inverse = np.unique(
+            predictoor_ids, return_index=True, return_inverse=True
+        )
+        rows = np.argsort(inverse, kind="stable")
+        group_ends = np.cumsum(np.bincount(inverse, minlength=len(uniq_ids)))
+        groups = np.split(rows, group_ends[:-1])
+        return {self._addrs[uniq_ids[k]]: groups[k] for k in np.argsort(first_rows)}
+
+    def to_predictoors(self, keep_predictions: bool = True) -> Dict[str, Predictoor]:
+        """
+        @return
+          predictoors -- dict of [predictoor_addr] : Predictoor holding its
+            predictions. In order of first appearance.
+        """
+        rows = self.rows
+        addrs = np.array(self._addrs, dtype=object)
+        predictoors = {}
+        for predictoor_addr, group in self.predictoor_groups().items():
+            predictoor = Predictoor(predictoor_addr, keep_predictions)
+            group_rows = rows[group]
+            predictoor.add_predictions(
+                group_rows["slot"].tolist(),
+                group_rows["payout"].tolist(),
+                group_rows["stake"].tolist(),
+                addrs[group_rows["contract_id"]].tolist(),
+            )
+            predictoors[predictoor_addr] = predictoor
+        return predictoors
+
+    @classmethod
+    def from_predictoors(cls, predictoors: Dict[str, Predictoor]) -> "PredictionTable":
+        """Build a table from Predictoors that were created with keep_predictions"""
+        table = cls()
+        for predictoor in predictoors.values():
+            for prediction in predictoor.predictions:
+                table.add_prediction(predictoor.address, prediction)
+        return table
+
+    @classmethod
+    def concat(cls, tables: Sequence["PredictionTable"]) -> "PredictionTable":
+        """Return a table with the rows of all tables, in order"""
+        table = cls()
+        for other in tables:
+            rows = other.rows
+            if len(rows) == 0:
+                continue
+            ids = table._intern_column(other.addrs)  # [other's id] : table's id
+            chunk = np.copy(rows)
+            chunk["predictoor_id"] = ids[rows["predictoor_id"]]
+            chunk["contract_id"] = ids[rows["contract_id"]]
+            table._chunks.append(chunk)
+        return table
+
+    def take(self, indices: np.ndarray) -> "PredictionTable":
+        """
+        Return a table with the rows at indices, in that order. Addresses get
+        interned in order of first appearance, like when adding rows one by one.
+        """
+        rows = self.rows[indices]  # a copy
+
+        # predictoor id, then contract id, of each row
+        old_ids = np.column_stack([rows["predictoor_id"], rows["contract_id"]])
+        uniq_ids, first_rows, inverse = np.unique(
+            old_ids.ravel(), return_index=True, return_inverse=True
+        )
+        order = np.argsort(first_rows)
+        new_ids = np.empty(len(uniq_ids), dtype=np.int32)
+        new_ids[order] = np.arange(len(uniq_ids), dtype=np.int32)
+        new_ids = new_ids[inverse.reshape(-1)]
+        rows["predictoor_id"] = new_ids[0::2]
+        rows["contract_id"] = new_ids[1::2]
+
+        table = PredictionTable()
+        table._addrs = [self._addrs[id_] for id_ in uniq_ids[order]]
+        table._ids = {addr: id_ for id_, addr in enumerate(table._addrs)}
+        table._chunks = [rows]
+        return table
+
+    def _intern_column(self, addrs: Sequence[str]) -> np.ndarray:
+        """Map a column of addresses to ids, hashing each distinct addr once"""
+        uniq_addrs, first_rows, inverse = np.unique(
+            np.asarray(addrs, dtype=object), return_index=True, return_inverse=True
+        )
+        uniq_ids = np.empty(len(uniq_addrs), dtype=np.int32)
+        for k in np.argsort(first_rows):  # give new ids in order of appearance
+            uniq_ids[k] = self.addr_id(uniq_addrs[k])
+        return uniq_ids[inverse.reshape(-1)]
+
+    def _pack_pending(self):
+        if self._pending:
+            self._chunks.append(np.array(self._pending, dtype=PREDICTION_DTYPE))
+            self._pending = []
+
+
+def _empty_rows() -> np.ndarray:
+    return np.empty(0, dtype=PREDICTION_DTYPE)
 
 
 class PredictContract:
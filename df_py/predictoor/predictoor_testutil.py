@@ -1,5 +1,6 @@
 import random
-from typing import List
+import re
+from typing import List, Optional
 
 from enforce_typing import enforce_types
 
@@ -70,3 +71,62 @@ def create_mock_response(statuses: List[str], payouts: List[float], users: List[
             ]
         }
     }
+
+
+@enforce_types
+def create_fake_prediction_records(
+    n: int, min_slot: int = 50, max_slot: int = 250
+) -> List[dict]:
+    """Random predictPredictions records, all Paying, with distinct ids"""
+    records = []
+    for i in range(n):
+        user = f"0x{random.randint(1, 9)}"
+        slot = random.randint(min_slot, max_slot)
+        records.append(
+            {
+                "id": f"0xc-{slot}-{user}-{i}",
+                "slot": {
+                    "status": "Paying",
+                    "predictContract": {
+                        "id": "0xc",
+                        "token": {"nft": {"id": "0xnft", "owner": {"id": "0x0"}}},
+                    },
+                    "slot": slot,
+                },
+                "stake": str(random.random()),
+                "user": {"id": user},
+                "payout": {"payout": random.choice(["0.0", "2.0"])},
+            }
+        )
+    return records
+
+
+def create_fake_subgraph(records: List[dict], fail_after: Optional[int] = None):
+    """
+    @description
+      Return a fake submit_query() serving predictPredictions pages of
+      records. It honors the slot bounds, id cursor and page size of each
+      query. If fail_after is given, calls after that many raise.
+    """
+    records = sorted(records, key=lambda r: r["id"])
+    n_calls = [0]
+
+    def submit_query(query: str, chainID: int):  # pylint: disable=unused-argument
+        n_calls[0] += 1
+        if fail_after is not None and n_calls[0] > fail_after:
+            raise ConnectionError("fake subgraph is down")
+
+        match = re.search(r"slot_gt: (\d+), slot_lte: (\d+)", query)
+        assert match is not None, query
+        st_ts, end_ts = int(match.group(1)), int(match.group(2))
+        first = int(re.search(r"first: (\d+)", query).group(1))  # type: ignore
+        last_id = re.search(r'id_gt: "([^"]+)"', query)
+        page = [
+            r
+            for r in records
+            if st_ts < r["slot"]["slot"] <= end_ts
+            and (last_id is None or r["id"] > last_id.group(1))
+        ]
+        return {"data": {"predictPredictions": page[:first]}}
+
+    return submit_query
@@ -1,11 +1,18 @@
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 from enforce_typing import enforce_types
 from web3 import Web3
 
-from df_py.predictoor.models import PredictContract, Prediction, Predictoor
-from df_py.util.constants import DEPLOYER_ADDRS
-from df_py.util.graphutil import submit_query
+from df_py.predictoor.contracts_cache import get_predictoor_contracts_cache
+from df_py.predictoor.models import (
+    PredictContract,
+    Prediction,
+    PredictionTable,
+    Predictoor,
+)
+from df_py.util.constants import DEPLOYER_ADDRS, MAX_PREDICTOOR_QUERY_WORKERS
+from df_py.util.graphutil import get_last_block, map_concurrently, paginate_query
 from df_py.util.networkutil import DEV_CHAINID
 
 WHITELIST_FEEDS_MAINNET = [
@@ -83,6 +90,9 @@ def query_predictoor_contracts(chain_id: int) -> Dict[str, PredictContract]:
         Queries the predictContracts for a given chain ID,
         and returns a dictionary of PredictContract objects.
 
+        Results are memoized per process, see contracts_cache. So repeated
+        calls within a run only hit the subgraph once.
+
     @params
         chain_id (int) -- The ID of the chain to query.
 
@@ -95,49 +105,52 @@ def query_predictoor_contracts(chain_id: int) -> Dict[str, PredictContract]:
     @notes
         This will only return the prediction feeds that are owned by DEPLOYER_ADDRS
     """
+    # the dev chain changes under tests' feet, so always check its block
+    ttl_s = 0 if chain_id == DEV_CHAINID else None
+
+    cache = get_predictoor_contracts_cache()
+    with cache.lock:
+        contracts_dict = cache.get(chain_id, lambda: _synced_block(chain_id), ttl_s)
+        if contracts_dict is None:
+            # get the block first: any change after it gets refetched later
+            block = _synced_block(chain_id)
+            contracts_dict = _query_predictoor_contracts(chain_id)
+            cache.put(chain_id, contracts_dict, block)
+    return contracts_dict
+
 
-    chunk_size = 1000
-    offset = 0
+def _synced_block(chain_id: int) -> Optional[int]:
+    try:
+        return get_last_block(chain_id)
+    except KeyError:
+        return None
+
+
+def _query_predictoor_contracts(chain_id: int) -> Dict[str, PredictContract]:
     contracts_dict = {}
 
-    while True:
-        query = """
-        {
-            predictContracts(skip:%s, first:%s){
-                id
-                token {
-                    id
-                    name
-                    symbol
-                    nft {
-                        id
-                        owner {
-                            id
-                        }
-                        nftData {
-                            key
-                            value
-                        }
-                    }
-                }
-                secondsPerEpoch
-                secondsPerSubscription
-                truevalSubmitTimeout
-            }
+    fields = """
+      id
+      token {
+        id
+        name
+        symbol
+        nft {
+          id
+          owner {
+            id
+          }
+          nftData {
+            key
+            value
+          }
         }
-        """ % (
-            offset,
-            chunk_size,
-        )
-        offset += chunk_size
-        result = submit_query(query, chain_id)
-        if "error" in result:
-            raise AssertionError(result)
-        if "data" not in result:
-            raise AssertionError(result)
-        predictoor_contracts = result["data"]["predictContracts"]
-        if len(predictoor_contracts) == 0:
-            break
+      }
+      secondsPerEpoch
+      secondsPerSubscription
+      truevalSubmitTimeout
+    """
+    for predictoor_contracts in paginate_query("predictContracts", fields, chain_id):
         for contract in predictoor_contracts:
             if contract["id"] not in WHITELIST_FEEDS_MAINNET:
                 owner = contract["token"]["nft"]["owner"]["id"]
@@ -156,17 +169,22 @@ def query_predictoor_contracts(chain_id: int) -> Dict[str, PredictContract]:
                 nft_addr,
                 asset_name,
                 contract["token"]["symbol"],
-                contract["secondsPerEpoch"],
-                contract["secondsPerSubscription"],
+                int(contract["secondsPerEpoch"]),
+                int(contract["secondsPerSubscription"]),
             )
             contracts_dict[nft_addr] = contract_obj
 
-    print(contracts_dict)
+    print(f"Queried {len(contracts_dict)} predictoor contracts on chain {chain_id}")
     return contracts_dict
 
 
 @enforce_types
-def query_predictoors(st_ts: int, end_ts: int, chainID: int) -> Dict[str, Predictoor]:
+def query_predictoors(
+    st_ts: int,
+    end_ts: int,
+    chainID: int,
+    max_workers: int = MAX_PREDICTOOR_QUERY_WORKERS,
+) -> Dict[str, Predictoor]:
     """
     @description
         Queries the predictPredictions GraphQL endpoint for a given
@@ -178,70 +196,139 @@ def query_predictoors(st_ts: int, end_ts: int, chainID: int) -> Dict[str, Predic
         st_ts (int) -- The start timestamp of the query.
         end_ts (int) -- The end timestamp of the query.
         chainID (int) -- The ID of the chain to query.
+        max_workers (int) -- Max # slot windows to query concurrently.
 
     @return
-        predictoors -- A dictionary of address to Predictoor objects
+        predictoors -- A dictionary of address to Predictoor objects.
+          Each keeps its predictions.
 
     @raises
         AssertionError: If the result of the query contains an error.
     """
-    predictoors: Dict[str, Predictoor] = {}
-
-    chunk_size = 1000
-    offset = 0
-
-    while True:
-        # pylint: disable=line-too-long
-        query = """
-        {
-            predictPredictions(where: {slot_: {slot_gt: %s, slot_lte: %s, status: Paying}, payout_not: null}, skip:%s, first:%s) {
-                id,
-                stake,
-                slot{
-                    status,
-                    predictContract {
-                        id
-                        token {
-                            nft {
-                                id
-                                owner {
-                                    id
-                                }
-                            }
-                        }
-                    }
-                    slot
-                },
-                user {
-                    id
-                }
-                payout {
-                    id
-                    payout
-                }
-                block
-            }
-        }
-        """ % (
-            st_ts,
-            end_ts,
-            offset,
-            chunk_size,
+    table = query_prediction_table(st_ts, end_ts, chainID, max_workers)
+    return table.to_predictoors(keep_predictions=True)
+
+
+@enforce_types
+def query_prediction_table(
+    st_ts: int,
+    end_ts: int,
+    chainID: int,
+    max_workers: int = MAX_PREDICTOOR_QUERY_WORKERS,
+) -> PredictionTable:
+    """
+    @description
+        Like query_predictoors(), but return the predictions in a columnar
+        PredictionTable, which is far lighter for large weeks.
+
+        The slot range is split into max_workers disjoint windows, which are
+        paginated concurrently. Each window packs its pages into a table as
+        they arrive. Then the windows' rows get sorted by prediction id, so
+        they come out in the same order as one serial query over the range.
+
+    @return
+        table -- PredictionTable, rows in ascending prediction id
+    """
+    windows = slot_windows(st_ts, end_ts, max_workers)
+    window_tables = list(
+        map_concurrently(
+            lambda window: _query_predictions_in_window(window[0], window[1], chainID),
+            windows,
+            max_workers,
         )
+    )
+
+    table = PredictionTable.concat([table for table, _ in window_tables])
+    ids = np.concatenate([ids for _, ids in window_tables])
+    return table.take(np.argsort(ids, kind="stable"))
+
 
-        offset += chunk_size
-        result = submit_query(query, chainID)
+@enforce_types
+def slot_windows(st_ts: int, end_ts: int, n: int) -> List[Tuple[int, int]]:
+    """
+    @description
+        Split the slot range (st_ts, end_ts] into up to n disjoint windows of
+        near-equal length.
+
+    @return
+        windows -- list of (window_st_ts, window_end_ts), each covering slots
+          in (window_st_ts, window_end_ts], in ascending order
+    """
+    n = max(1, min(n, end_ts - st_ts))
+    bounds = [st_ts + (end_ts - st_ts) * i // n for i in range(n + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _query_predictions_in_window(
+    st_ts: int, end_ts: int, chainID: int
+) -> Tuple[PredictionTable, np.ndarray]:
+    """
+    @description
+        Query the predictions with slots in (st_ts, end_ts]. Each page gets
+        packed into the table as it arrives.
+
+    @return
+        table -- PredictionTable of the predictions
+        ids -- bytes array of their prediction ids, one per row of table
+    """
+    table = PredictionTable()
+    id_pages = [np.empty(0, dtype=np.bytes_)]
+    for page in query_prediction_pages(st_ts, end_ts, chainID):
+        for _, predictoor_addr, prediction in page:
+            table.add_prediction(predictoor_addr, prediction)
+        id_pages.append(np.array([record[0] for record in page], dtype=np.bytes_))
+    return table, np.concatenate(id_pages)
 
-        if "error" in result:
-            raise AssertionError(result)
-        if "data" not in result:
-            raise AssertionError(result)
 
-        predictions = result["data"]["predictPredictions"]
-        print(len(predictoors))
-        if len(predictions) == 0:
-            break
+@enforce_types
+def query_prediction_pages(
+    st_ts: int, end_ts: int, chainID: int
+) -> Iterator[List[Tuple[str, str, Prediction]]]:
+    """
+    @description
+        Query the predictions with slots in (st_ts, end_ts], one page at a
+        time, so that callers can stream them without holding them all.
 
+    @return
+        pages -- iterator of lists of (prediction_id, predictoor_addr,
+          Prediction). Only predictions of Paying slots, of allowed feeds.
+          In ascending prediction id.
+    """
+    fields = """
+      id,
+      stake,
+      slot{
+        status,
+        predictContract {
+          id
+          token {
+            nft {
+              id
+              owner {
+                id
+              }
+            }
+          }
+        }
+        slot
+      },
+      user {
+        id
+      }
+      payout {
+        id
+        payout
+      }
+      block
+    """
+    where = (
+        f"slot_: {{slot_gt: {st_ts}, slot_lte: {end_ts}, status: Paying}}, "
+        "payout_not: null"
+    )
+    for predictions in paginate_query(
+        "predictPredictions", fields, chainID, where=where
+    ):
+        page = []
         for prediction_dict in predictions:
             if (
                 prediction_dict["slot"]["predictContract"]["id"]
@@ -264,7 +351,6 @@ def query_predictoors(st_ts: int, end_ts: int, chainID: int) -> Dict[str, Predic
                 continue
 
             prediction = Prediction.from_query_result(prediction_dict)
-            predictoors.setdefault(predictoor_addr, Predictoor(predictoor_addr))
-            predictoors[predictoor_addr].add_prediction(prediction)
+            page.append((prediction_dict["id"], predictoor_addr, prediction))
 
-    return predictoors
+        yield page
@@ -8,7 +8,12 @@ from df_py.predictoor.calc_rewards import (
     aggregate_predictoor_rewards,
     calc_predictoor_rewards,
 )
-from df_py.predictoor.models import Prediction, Predictoor, PredictoorBase
+from df_py.predictoor.models import (
+    Prediction,
+    PredictionTable,
+    Predictoor,
+    PredictoorBase,
+)
 from df_py.util.networkutil import DEV_CHAINID
 from df_py.util.reward_shaper import RewardShaper
 
@@ -182,6 +187,59 @@ def test_calc_predictoor_rewards_fuzz():
     )  # allow for small floating point differences
 
 
+def test_calc_predictoor_rewards_table():
+    table = PredictionTable()
+    for i in range(50):
+        contract = random.choice(["0xContract1", "0xContract2"])
+        payout = random.choice([0.0, 10.0])
+        table.add_prediction(
+            f"0x{i % 7}", Prediction(i, payout, random.random() * 10, contract)
+        )
+
+    rewards = calc_predictoor_rewards(table, 1000, DEV_CHAINID)
+    predictoors = table.to_predictoors()
+    assert rewards == calc_predictoor_rewards(predictoors, 1000, DEV_CHAINID)
+
+
+def test_calc_predictoor_rewards_matches_loop():
+    table = PredictionTable()
+    for i in range(2000):
+        contract = random.choice(["0xContract1", "0xContract2", "0xContract3"])
+        payout = random.choice([0.0, random.random() * 20])
+        stake = random.random() * 10
+        table.add_prediction(
+            f"0x{random.randint(0, 40)}", Prediction(i, payout, stake, contract)
+        )
+    predictoors = table.to_predictoors()
+    expected = _calc_rewards_loop(predictoors, 1000.0, ["0xContract1", "0xContract2"])
+
+    for data in [table, predictoors]:
+        rewards = calc_predictoor_rewards(data, 1000, DEV_CHAINID)
+        assert rewards == expected
+        for contract, contract_rewards in rewards.items():
+            assert list(contract_rewards) == list(expected[contract])
+
+
+def _calc_rewards_loop(predictoors, tokens_avail, contracts):
+    """Reference: per-contract, per-predictoor loops"""
+    tokens_per_contract = tokens_avail / len(contracts)
+    rewards = {contract: {} for contract in contracts}
+    for contract in contracts:
+        total = 0
+        for p in predictoors.values():
+            total += max(p.get_prediction_summary(contract).total_revenue, 0)
+        if total == 0:
+            continue
+        for address, p in predictoors.items():
+            revenue = p.get_prediction_summary(contract).total_revenue
+            if revenue <= 0:
+                continue
+            reward = revenue / total * tokens_per_contract
+            if reward >= 1e-15:
+                rewards[contract][address] = reward
+    return rewards
+
+
 def test_aggregate_rewards():
     predictoor_rewards = {
         "contract1": {"predictoor1": 10.0, "predictoor2": 5.0, "predictoor3": 7.0},
@@ -0,0 +1,104 @@
+from unittest.mock import patch
+
+import pytest
+
+from df_py.predictoor.contracts_cache import (
+    PredictContractsCache,
+    get_predictoor_contracts_cache,
+    persist_predictoor_contracts_cache,
+)
+from df_py.predictoor.models import PredictContract
+from df_py.predictoor.queries import query_predictoor_contracts
+from df_py.util.networkutil import DEV_CHAINID
+
+CHAINID = 23294
+CONTRACTS = {"0xc1": PredictContract(CHAINID, "0xc1", "BTC-USDT", "BTC", 300, 60)}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache = get_predictoor_contracts_cache()
+    cache.clear()
+    yield
+    cache.clear()
+    cache.ttl_s = PredictContractsCache().ttl_s
+    persist_predictoor_contracts_cache(None)
+
+
+@patch("df_py.predictoor.queries.get_last_block")
+@patch("df_py.predictoor.queries._query_predictoor_contracts")
+def test_query_once(mock_query, mock_last_block):
+    mock_query.return_value = CONTRACTS
+    mock_last_block.return_value = 100
+
+    assert query_predictoor_contracts(CHAINID) == CONTRACTS
+    assert query_predictoor_contracts(CHAINID) == CONTRACTS
+    assert mock_query.call_count == 1
+
+    # past the ttl, but no new blocks: still valid
+    get_predictoor_contracts_cache().ttl_s = 0
+    assert query_predictoor_contracts(CHAINID) == CONTRACTS
+    assert mock_query.call_count == 1
+
+    # past the ttl, and new blocks: refetch
+    mock_last_block.return_value = 101
+    assert query_predictoor_contracts(CHAINID) == CONTRACTS
+    assert mock_query.call_count == 2
+
+
+@patch("df_py.predictoor.queries.get_last_block")
+@patch("df_py.predictoor.queries._query_predictoor_contracts")
+def test_dev_chain_checks_block(mock_query, mock_last_block):
+    mock_query.return_value = {}
+    mock_last_block.return_value = 100
+
+    query_predictoor_contracts(DEV_CHAINID)
+    query_predictoor_contracts(DEV_CHAINID)
+    assert mock_query.call_count == 1
+
+    mock_last_block.return_value = 101
+    query_predictoor_contracts(DEV_CHAINID)
+    assert mock_query.call_count == 2
+
+
+@patch("df_py.predictoor.queries.get_last_block")
+@patch("df_py.predictoor.queries._query_predictoor_contracts")
+def test_unknown_block(mock_query, mock_last_block):
+    mock_query.return_value = CONTRACTS
+    mock_last_block.side_effect = KeyError("_meta")
+
+    query_predictoor_contracts(CHAINID)
+    query_predictoor_contracts(CHAINID)
+    assert mock_query.call_count == 1  # fresh within ttl
+
+    get_predictoor_contracts_cache().ttl_s = 0
+    query_predictoor_contracts(CHAINID)
+    assert mock_query.call_count == 2  # can't tell if it changed
+
+
+def test_persist(tmp_path):
+    csv_dir = str(tmp_path)
+    cache = PredictContractsCache()
+    cache.csv_dir = csv_dir
+    cache.put(CHAINID, CONTRACTS, 100)
+
+    # a new process, reusing the csv_dir
+    cache2 = PredictContractsCache()
+    assert cache2.get(CHAINID, lambda: 100) is None
+    cache2.csv_dir = csv_dir
+    contracts = cache2.get(CHAINID, lambda: 100)
+    assert contracts is not None
+    assert {a: c.to_dict() for a, c in contracts.items()} == {
+        a: c.to_dict() for a, c in CONTRACTS.items()
+    }
+    assert cache2.get(DEV_CHAINID, lambda: 100) is None
+
+    # stale: past the ttl, with new blocks
+    assert cache2.get(CHAINID, lambda: 101, ttl_s=0) is None
+
+
+def test_persist_dir_gone(tmp_path):
+    cache = PredictContractsCache()
+    cache.csv_dir = str(tmp_path / "gone")
+    cache.put(CHAINID, CONTRACTS, 100)
+    assert cache.get(CHAINID, lambda: 100) == CONTRACTS
@@ -3,7 +3,12 @@ import os
 from enforce_typing import enforce_types
 
 from df_py.predictoor import csvs
-from df_py.predictoor.models import PredictContract, Prediction, Predictoor
+from df_py.predictoor.models import (
+    PredictContract,
+    Prediction,
+    PredictionTable,
+    Predictoor,
+)
 
 
 @enforce_types
@@ -12,7 +17,7 @@ def test_predictoordata(tmp_path):
 
     for i in range(10):
         address = f"0x{i:01x}0000000000000000000000000000000000000000"
-        predictoor = Predictoor(address)
+        predictoor = Predictoor(address, keep_predictions=True)
         for j in range(5):
             predictoor.add_prediction(
                 Prediction(
@@ -23,8 +28,11 @@ def test_predictoordata(tmp_path):
 
     csvs.save_predictoor_data_csv(predictoors, str(tmp_path))
 
-    loaded_predictoors = csvs.load_predictoor_data_csv(str(tmp_path))
+    loaded_predictoors = csvs.load_predictoor_data_csv(
+        str(tmp_path), keep_predictions=True
+    )
     assert len(loaded_predictoors) == len(predictoors)
+    assert list(loaded_predictoors) == list(predictoors)
 
     for original_predictoor in predictoors.values():
         addr = original_predictoor.address
@@ -37,6 +45,46 @@ def test_predictoordata(tmp_path):
             loaded_predictoor.correct_prediction_count
             == original_predictoor.correct_prediction_count
         )
+        assert loaded_predictoor.revenue == original_predictoor.revenue
+        assert [vars(p) for p in loaded_predictoor.predictions] == [
+            vars(p) for p in original_predictoor.predictions
+        ]
+        assert {
+            addr: vars(summary)
+            for addr, summary in loaded_predictoor.prediction_summaries.items()
+        } == {
+            addr: vars(summary)
+            for addr, summary in original_predictoor.prediction_summaries.items()
+        }
+
+
+@enforce_types
+def test_prediction_table_csv(tmp_path):
+    table = PredictionTable()
+    for slot in range(6):
+        predictoor_addr = f"0x{slot % 2}000000000000000000000000000000000000000"
+        contract_addr = f"0x000000000000000000000000000000000000000{slot % 3}"
+        table.add_prediction(
+            predictoor_addr, Prediction(slot, slot * 1.0, 1.0, contract_addr)
+        )
+
+    csv_dir = str(tmp_path)
+    csvs.save_prediction_table(table, csv_dir)
+
+    # grouped by predictoor, same as saving Predictoor objects
+    with open(csvs.predictoor_data_csv_filename(csv_dir)) as f:
+        slots = [int(line.split(",")[1]) for line in f.readlines()[1:]]
+    assert slots == [0, 2, 4, 1, 3, 5]
+
+    loaded_table = csvs.load_prediction_table(csv_dir)
+    assert len(loaded_table) == len(table)
+    loaded = loaded_table.to_predictoors(keep_predictions=True)
+    original = table.to_predictoors(keep_predictions=True)
+    assert list(loaded) == list(original)
+    for addr, predictoor in original.items():
+        assert [vars(p) for p in loaded[addr].predictions] == [
+            vars(p) for p in predictoor.predictions
+        ]
 
 
 @enforce_types
@@ -109,3 +157,38 @@ def test_predictoor_contracts(tmp_path):
     for addr, original_contract in predictoor_contracts.items():
         loaded_contract = loaded_predictoor_contracts[addr]
         assert loaded_contract.to_dict() == original_contract.to_dict()
+
+
+@enforce_types
+def test_predictoor_csvs_parquet(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_FORMAT", "parquet")
+    csv_dir = str(tmp_path)
+
+    predictoor = Predictoor(
+        "0x1000000000000000000000000000000000000000", keep_predictions=True
+    )
+    for slot in range(5):
+        predictoor.add_prediction(Prediction(slot, slot % 2 * 1.0, 1.0, "0xc1"))
+    contract = PredictContract(1, "0xC1", "Contract1", "CTR1", 100, 10)
+    rewards = {"0xc1": {predictoor.address: 10.5}}
+
+    csvs.save_predictoor_data_csv({predictoor.address: predictoor}, csv_dir)
+    csvs.save_predictoor_summary_csv({predictoor.address: predictoor}, csv_dir)
+    csvs.save_predictoor_rewards_csv(rewards, csv_dir)
+    csvs.save_predictoor_contracts_csv({contract.address: contract}, csv_dir)
+
+    assert sorted(os.listdir(csv_dir)) == [
+        "predictoor_contracts.parquet",
+        "predictoor_data.parquet",
+        "predictoor_rewards.parquet",
+        "predictoor_summary.parquet",
+    ]
+
+    loaded_predictoor = csvs.load_predictoor_data_csv(csv_dir)[predictoor.address]
+    assert loaded_predictoor.prediction_count == 5
+    assert loaded_predictoor.correct_prediction_count == 2
+
+    assert csvs.load_predictoor_rewards_csv(csv_dir) == rewards
+
+    loaded_contract = csvs.load_predictoor_contracts_csv(csv_dir)["0xc1"]
+    assert loaded_contract.to_dict() == contract.to_dict()
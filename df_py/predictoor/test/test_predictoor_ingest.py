@@ -0,0 +1,130 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from enforce_typing import enforce_types
+
+from df_py.predictoor import csvs
+from df_py.predictoor.ingest import (
+    PARTIAL_FILENAME,
+    PROGRESS_FILENAME,
+    ingest_predictoor_data,
+)
+from df_py.predictoor.predictoor_testutil import (
+    create_fake_prediction_records,
+    create_fake_subgraph,
+)
+from df_py.predictoor.queries import query_prediction_table
+from df_py.util import networkutil
+
+CHAINID = networkutil.DEV_CHAINID
+ST_TS, END_TS = 100, 250
+
+
+@enforce_types
+def test_ingest(tmp_path):
+    csv_dir = str(tmp_path)
+    records = create_fake_prediction_records(2500)
+
+    with patch("df_py.util.graphutil.submit_query") as mock_submit_query:
+        mock_submit_query.side_effect = create_fake_subgraph(records)
+        predictoors = ingest_predictoor_data(
+            ST_TS, END_TS, CHAINID, csv_dir, max_workers=4, window_s=20
+        )
+        table = query_prediction_table(ST_TS, END_TS, CHAINID)
+
+    assert os.listdir(csv_dir) == ["predictoor_data.csv"]
+
+    # same predictions as querying all at once
+    loaded_table = csvs.load_prediction_table(csv_dir)
+    assert sorted(_rows(loaded_table)) == sorted(_rows(table))
+
+    # summaries aggregated on the fly == summaries from the saved data
+    loaded = csvs.load_predictoor_data_csv(csv_dir)
+    assert list(predictoors) == list(loaded)
+    for addr, predictoor in predictoors.items():
+        assert _summaries(predictoor) == _summaries(loaded[addr])
+
+
+@enforce_types
+def test_ingest_resume(tmp_path):
+    records = create_fake_prediction_records(2500)
+
+    # uninterrupted run
+    full_dir = str(tmp_path / "full")
+    os.mkdir(full_dir)
+    with patch("df_py.util.graphutil.submit_query") as mock_submit_query:
+        mock_submit_query.side_effect = create_fake_subgraph(records)
+        full_predictoors = ingest_predictoor_data(
+            ST_TS, END_TS, CHAINID, full_dir, max_workers=1, window_s=20
+        )
+        n_full_calls = mock_submit_query.call_count
+
+    # run that crashes midway, then gets resumed
+    csv_dir = str(tmp_path / "resumed")
+    os.mkdir(csv_dir)
+    with patch("df_py.util.graphutil.submit_query") as mock_submit_query:
+        mock_submit_query.side_effect = create_fake_subgraph(records, fail_after=10)
+        with pytest.raises(ConnectionError):
+            ingest_predictoor_data(
+                ST_TS, END_TS, CHAINID, csv_dir, max_workers=1, window_s=20
+            )
+    assert os.path.exists(os.path.join(csv_dir, PARTIAL_FILENAME))
+    assert os.path.exists(os.path.join(csv_dir, PROGRESS_FILENAME))
+    assert not os.path.exists(csvs.predictoor_data_csv_filename(csv_dir))
+
+    with patch("df_py.util.graphutil.submit_query") as mock_submit_query:
+        mock_submit_query.side_effect = create_fake_subgraph(records)
+        predictoors = ingest_predictoor_data(
+            ST_TS, END_TS, CHAINID, csv_dir, max_workers=1, window_s=20
+        )
+        assert mock_submit_query.call_count < n_full_calls  # didn't start over
+
+    with open(csvs.predictoor_data_csv_filename(full_dir)) as f:
+        full_data = f.read()
+    with open(csvs.predictoor_data_csv_filename(csv_dir)) as f:
+        assert f.read() == full_data
+    assert list(predictoors) == list(full_predictoors)
+    for addr, predictoor in predictoors.items():
+        assert _summaries(predictoor) == _summaries(full_predictoors[addr])
+
+
+@enforce_types
+def test_ingest_parquet(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_FORMAT", "parquet")
+    csv_dir = str(tmp_path)
+    records = create_fake_prediction_records(100)
+
+    with patch("df_py.util.graphutil.submit_query") as mock_submit_query:
+        mock_submit_query.side_effect = create_fake_subgraph(records)
+        predictoors = ingest_predictoor_data(ST_TS, END_TS, CHAINID, csv_dir)
+
+    assert os.listdir(csv_dir) == ["predictoor_data.parquet"]
+    n_predictions = sum(p.prediction_count for p in predictoors.values())
+    assert len(csvs.load_prediction_table(csv_dir)) == n_predictions
+
+
+@enforce_types
+def test_ingest_other_run(tmp_path):
+    csv_dir = str(tmp_path)
+    with patch("df_py.util.graphutil.submit_query") as mock_submit_query:
+        mock_submit_query.side_effect = create_fake_subgraph([], fail_after=0)
+        with pytest.raises(ConnectionError):
+            ingest_predictoor_data(ST_TS, END_TS, CHAINID, csv_dir)
+
+    # progress of a run over other slots mustn't get mixed in
+    with pytest.raises(AssertionError):
+        ingest_predictoor_data(ST_TS, END_TS + 1, CHAINID, csv_dir)
+
+
+def _rows(table):
+    return [
+        (table.addrs[row["predictoor_id"]], int(row["slot"]), float(row["stake"]))
+        for row in table.rows
+    ]
+
+
+def _summaries(predictoor):
+    return {
+        addr: vars(summary) for addr, summary in predictoor.prediction_summaries.items()
+    }
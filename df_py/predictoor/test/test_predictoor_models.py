@@ -1,6 +1,12 @@
+import numpy as np
 import pytest
 
-from df_py.predictoor.models import PredictContract, Prediction, Predictoor
+from df_py.predictoor.models import (
+    PredictContract,
+    Prediction,
+    PredictionTable,
+    Predictoor,
+)
 
 
 def test_prediction_init():
@@ -49,6 +55,53 @@ def test_predictoor_summary():
     assert summary.total_stake == 12.0  # 1 + 1 + 10
 
 
+def test_predictoor_summary_per_contract():
+    predictoor = Predictoor("0x1")
+    predictoor.add_prediction(Prediction(123, 10.0, 1.0, "0xc1"))
+    predictoor.add_prediction(Prediction(124, 0.0, 2.0, "0xc2"))
+    predictoor.add_predictions([125, 126], [3.0, 0.0], [1.0, 1.0], ["0xc2", "0xc1"])
+
+    summary = predictoor.get_prediction_summary("0xc1")
+    assert summary.prediction_count == 2
+    assert summary.correct_prediction_count == 1
+    assert summary.total_payout == 10.0
+    assert summary.total_revenue == 9.0 - 1.0
+    assert summary.total_stake == 2.0
+
+    summary = predictoor.get_prediction_summary("0xc2")
+    assert summary.prediction_count == 2
+    assert summary.correct_prediction_count == 1
+    assert summary.total_payout == 3.0
+    assert summary.total_revenue == -2.0 + 2.0
+    assert summary.total_stake == 3.0
+
+    assert list(predictoor.prediction_summaries) == ["0xc1", "0xc2"]
+
+    # unseen contract: empty summary
+    summary = predictoor.get_prediction_summary("0xc3")
+    assert summary.prediction_count == 0
+    assert summary.total_revenue == 0.0
+
+    # summaries are snapshots, not views
+    summary = predictoor.get_prediction_summary("0xc1")
+    summary.prediction_count = 100
+    assert predictoor.get_prediction_summary("0xc1").prediction_count == 2
+
+
+def test_predictoor_keep_predictions():
+    predictoor = Predictoor("0x1", keep_predictions=False)
+    predictoor.add_prediction(Prediction(123, 10.0, 1.0, "0xc1"))
+    with pytest.raises(AssertionError):
+        _ = predictoor.predictions
+
+    predictoor = Predictoor("0x1")  # keeps predictions by default
+    prediction = Prediction(123, 10.0, 1.0, "0xc1")
+    predictoor.add_prediction(prediction)
+    predictoor.add_predictions([124], [0.0], [1.0], ["0xc2"])
+    assert predictoor.predictions[0] is prediction
+    assert vars(predictoor.predictions[1]) == vars(Prediction(124, 0.0, 1.0, "0xc2"))
+
+
 def test_prediction_from_query_result():
     prediction_dict = {
         "slot": {
@@ -120,6 +173,87 @@ def test_predictor_accuracy(predictions, expected_accuracy):
     assert predictoor.accuracy == expected_accuracy
 
 
+def test_prediction_table():
+    table = PredictionTable()
+    table.add_prediction("0xp2", Prediction(1, 10.0, 1.0, "0xc1"))
+    table.add_predictions(
+        ["0xp1", "0xp2", "0xp1"],
+        np.array([2, 3, 4]),
+        [0.0, 3.0, 5.0],
+        [2.0, 1.0, 1.0],
+        ["0xc2", "0xc2", "0xc1"],
+    )
+    table.add_prediction("0xp3", Prediction(5, 0.0, 1.0, "0xc1"))
+
+    assert len(table) == 5
+    assert table.addrs == ["0xp2", "0xc1", "0xp1", "0xc2", "0xp3"]
+    rows = table.rows
+    assert rows["predictoor_id"].tolist() == [0, 2, 0, 2, 4]
+    assert rows["contract_id"].tolist() == [1, 3, 3, 1, 1]
+    assert rows["slot"].tolist() == [1, 2, 3, 4, 5]
+    assert rows["payout"].tolist() == [10.0, 0.0, 3.0, 5.0, 0.0]
+
+    groups = table.predictoor_groups()
+    assert list(groups) == ["0xp2", "0xp1", "0xp3"]
+    assert [group.tolist() for group in groups.values()] == [[0, 2], [1, 3], [4]]
+
+    predictoors = table.to_predictoors(keep_predictions=True)
+    assert list(predictoors) == ["0xp2", "0xp1", "0xp3"]
+    assert [vars(p) for p in predictoors["0xp1"].predictions] == [
+        vars(Prediction(2, 0.0, 2.0, "0xc2")),
+        vars(Prediction(4, 5.0, 1.0, "0xc1")),
+    ]
+    assert predictoors["0xp2"].get_prediction_summary("0xc2").total_revenue == 2.0
+
+    table2 = PredictionTable.from_predictoors(predictoors)
+    assert len(table2) == 5
+    assert table2.to_predictoors()["0xp2"].revenue == predictoors["0xp2"].revenue
+
+
+def test_prediction_table_empty():
+    table = PredictionTable()
+    assert len(table) == 0
+    assert len(table.rows) == 0
+    assert table.to_predictoors() == {}
+    assert len(PredictionTable.concat([table, table]).take(np.arange(0))) == 0
+
+
+def test_prediction_table_concat_take():
+    table1 = PredictionTable()
+    table1.add_prediction("0xp1", Prediction(1, 10.0, 1.0, "0xc1"))
+    table1.add_prediction("0xp2", Prediction(2, 0.0, 1.0, "0xc2"))
+    table2 = PredictionTable()
+    table2.add_prediction("0xp3", Prediction(3, 0.0, 2.0, "0xc2"))
+    table2.add_prediction("0xp1", Prediction(4, 5.0, 1.0, "0xc3"))
+
+    table = PredictionTable.concat([table1, PredictionTable(), table2])
+    assert len(table) == 4
+    assert [table.addrs[i] for i in table.rows["predictoor_id"]] == [
+        "0xp1",
+        "0xp2",
+        "0xp3",
+        "0xp1",
+    ]
+    assert [table.addrs[i] for i in table.rows["contract_id"]] == [
+        "0xc1",
+        "0xc2",
+        "0xc2",
+        "0xc3",
+    ]
+
+    # same as adding the rows one by one, in that order
+    taken = table.take(np.array([2, 0, 3, 1]))
+    expected = PredictionTable()
+    expected.add_prediction("0xp3", Prediction(3, 0.0, 2.0, "0xc2"))
+    expected.add_prediction("0xp1", Prediction(1, 10.0, 1.0, "0xc1"))
+    expected.add_prediction("0xp1", Prediction(4, 5.0, 1.0, "0xc3"))
+    expected.add_prediction("0xp2", Prediction(2, 0.0, 1.0, "0xc2"))
+    assert taken.addrs == expected.addrs
+    assert taken.addr_ids == expected.addr_ids
+    assert taken.rows.tolist() == expected.rows.tolist()
+    assert len(table) == 4  # unchanged
+
+
 def test_predict_contract():
     contract = PredictContract(
         chainid=1,
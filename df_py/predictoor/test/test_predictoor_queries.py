@@ -3,10 +3,16 @@ from unittest.mock import patch
 import pytest
 from web3 import Web3
 
-from df_py.predictoor.predictoor_testutil import create_mock_responses
+from df_py.predictoor.predictoor_testutil import (
+    create_fake_prediction_records,
+    create_fake_subgraph,
+    create_mock_responses,
+)
 from df_py.predictoor.queries import (
     info_from_725,
+    query_prediction_table,
     query_predictoors,
+    slot_windows,
     key_to_725,
     value_from_725,
     info_from_725,
@@ -17,12 +23,12 @@ from df_py.util import networkutil
 CHAINID = networkutil.DEV_CHAINID
 
 
-@patch("df_py.predictoor.queries.submit_query")
+@patch("df_py.util.graphutil.submit_query")
 def test_query_predictoors(mock_submit_query):
     responses, users, stats = create_mock_responses(100)
     mock_submit_query.side_effect = responses
 
-    predictoors = query_predictoors(1, 2, CHAINID)
+    predictoors = query_predictoors(1, 2, CHAINID, max_workers=1)
 
     for user in users:
         if stats[user]["total"] == 0:
@@ -37,6 +43,52 @@ def test_query_predictoors(mock_submit_query):
     mock_submit_query.assert_called()
 
 
+@patch("df_py.util.graphutil.submit_query")
+def test_query_prediction_table(mock_submit_query):
+    responses, users, stats = create_mock_responses(100)
+    mock_submit_query.side_effect = responses
+
+    table = query_prediction_table(1, 2, CHAINID, max_workers=1)
+
+    assert len(table) == sum(stats[user]["total"] for user in users)
+    predictoors = table.to_predictoors()
+    for user in users:
+        if stats[user]["total"] == 0:
+            assert user not in predictoors
+            continue
+        assert predictoors[user].prediction_count == stats[user]["total"]
+        assert predictoors[user].correct_prediction_count == stats[user]["correct"]
+
+
+@pytest.mark.parametrize("max_workers", [1, 3, 8])
+def test_query_prediction_table_windows(max_workers):
+    records = create_fake_prediction_records(2500)
+    with patch("df_py.util.graphutil.submit_query") as mock_submit_query:
+        mock_submit_query.side_effect = create_fake_subgraph(records)
+        table = query_prediction_table(100, 200, CHAINID, max_workers)
+
+    # same rows as one serial query: in ascending id, over slots in (100, 200]
+    expected = [
+        r
+        for r in sorted(records, key=lambda r: r["id"])
+        if r["slot"]["slot"] > 100 and r["slot"]["slot"] <= 200
+    ]
+    rows = table.rows
+    assert [table.addrs[i] for i in rows["predictoor_id"]] == [
+        r["user"]["id"] for r in expected
+    ]
+    assert rows["slot"].tolist() == [r["slot"]["slot"] for r in expected]
+    assert rows["stake"].tolist() == [float(r["stake"]) for r in expected]
+    assert mock_submit_query.call_count >= max_workers
+
+
+def test_slot_windows():
+    assert slot_windows(0, 10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert slot_windows(0, 10, 1) == [(0, 10)]
+    assert slot_windows(0, 2, 8) == [(0, 1), (1, 2)]
+    assert slot_windows(5, 5, 8) == [(5, 5)]
+
+
 @pytest.mark.skip(reason="Requires predictoor support in subgraph")
 def test_query_predictoors_request():
     ST = 0
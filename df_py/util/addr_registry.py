@@ -0,0 +1,112 @@
+"""
+Process-wide interning of eth addresses.
+
+Every address gets a compact int id, the first time it's seen in any case.
+Its lowercase form, checksum form and per-chain DIDs get computed at most
+once per process, then looked up. This saves the many redundant keccak
+(checksum) and sha256 (DID) computations across queries, csvs, cleancase
+and RewardCalculator.
+"""
+
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from web3.main import Web3
+
+
+class AddressRegistry:
+    """
+    Maps addresses to int ids, with cached lowercase, checksum & DID forms.
+    Safe to use from many threads at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}  # [addr, in any case seen] : id
+        self._lowers: List[str] = []  # [id] : lowercase addr
+        self._checksums: List[Optional[str]] = []  # [id] : checksum addr
+        self._dids: Dict[Tuple[int, int], str] = {}  # [(id, chainID)] : did
+
+    def addr_id(self, addr: str) -> int:
+        """Returns the id of this address. Case-insensitive."""
+        id_ = self._ids.get(addr)
+        if id_ is not None:
+            return id_
+
+        lower = addr.lower()
+        with self._lock:
+            id_ = self._ids.get(lower)
+            if id_ is None:
+                id_ = len(self._lowers)
+                self._lowers.append(lower)
+                self._checksums.append(None)
+                self._ids[lower] = id_
+            self._ids[addr] = id_
+        return id_
+
+    def lower(self, addr: str) -> str:
+        """Returns the lowercase form of this address"""
+        return self._lowers[self.addr_id(addr)]
+
+    def checksum(self, addr: str) -> str:
+        """Returns the checksum form of this address"""
+        id_ = self.addr_id(addr)
+        checksum = self._checksums[id_]
+        if checksum is None:
+            checksum = str(Web3.to_checksum_address(self._lowers[id_]))
+            self._checksums[id_] = checksum
+        return checksum
+
+    def did(self, nft_addr: str, chainID: int) -> str:
+        """Returns the DID of the nft at this address, on this chain"""
+        key = (self.addr_id(nft_addr), chainID)
+        did = self._dids.get(key)
+        if did is None:
+            # adapted from ocean.py/ocean_lib/ocean/ocean_assets.py
+            text = self.checksum(nft_addr) + str(chainID)
+            did = f"did:op:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+            self._dids[key] = did
+        return did
+
+    def addr(self, id_: int) -> str:
+        """Returns the lowercase address of this id"""
+        return self._lowers[id_]
+
+    def __len__(self) -> int:
+        return len(self._lowers)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._lowers.clear()
+            self._checksums.clear()
+            self._dids.clear()
+
+
+_REGISTRY = AddressRegistry()
+
+
+def get_addr_registry() -> AddressRegistry:
+    """Returns the process-wide registry"""
+    return _REGISTRY
+
+
+# The functions below get called once per row or dict entry, so they skip
+# @enforce_types, whose overhead would dwarf a dict lookup.
+
+
+def addr_id(addr: str) -> int:
+    return _REGISTRY.addr_id(addr)
+
+
+def lower_addr(addr: str) -> str:
+    return _REGISTRY.lower(addr)
+
+
+def checksum_addr(addr: str) -> str:
+    return _REGISTRY.checksum(addr)
+
+
+def nft_did(nft_addr: str, chainID: int) -> str:
+    return _REGISTRY.did(nft_addr, chainID)
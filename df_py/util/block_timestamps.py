@@ -0,0 +1,159 @@
+"""
+Per-chain index of block timestamps.
+
+A block's timestamp never changes once the block is final. Indexed
+(block, timestamp) pairs serve as anchors: converting a timestamp to a
+block searches between the two indexed blocks closest to it, rather than
+over the whole chain. If they're adjacent blocks, no search is needed.
+
+The index lives in memory, per process. If envvar BLOCK_INDEX_DIR is set,
+it's also persisted there, as one csv per chain, which grows as blocks get
+looked up. So the same dates don't get resolved over RPC by every dftool
+command, every week.
+"""
+
+import bisect
+import csv
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from enforce_typing import enforce_types
+
+from df_py.util.networkutil import DEV_CHAINID
+
+# blocks younger than this may still get reorged, so don't index them
+FINALITY_S = 30 * 60
+
+
+class BlockTimestamps:
+    """
+    Indexed (block, timestamp) pairs of one chain, sorted by block.
+    If path is given, they're loaded from & appended to that csv file.
+    Safe to use from many threads at once.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._blocks: List[int] = []
+        self._timestamps: List[int] = []
+        if path is not None:
+            self._load()
+
+    def get(self, block: int) -> Optional[int]:
+        """Returns the timestamp of this block, or None if not indexed"""
+        with self._lock:
+            i = bisect.bisect_left(self._blocks, block)
+            if i < len(self._blocks) and self._blocks[i] == block:
+                return self._timestamps[i]
+        return None
+
+    def add(self, block: int, timestamp: int):
+        """Index this block, unless it's too recent to be final"""
+        if timestamp > time.time() - FINALITY_S:
+            return
+        with self._lock:
+            if not self._insert(block, timestamp):
+                return
+            if self.path is not None:
+                with open(self.path, "a") as f:
+                    f.write(f"{block},{timestamp}\n")
+
+    def bracket(
+        self, timestamp: float
+    ) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """
+        @description
+          Return the indexed (block, timestamp) pairs closest to timestamp:
+          the last one at or before it, and the first one after it.
+          Either is None if there's no such pair indexed.
+        """
+        with self._lock:
+            i = bisect.bisect_right(self._timestamps, timestamp)
+            before = (self._blocks[i - 1], self._timestamps[i - 1]) if i > 0 else None
+            after = (
+                (self._blocks[i], self._timestamps[i])
+                if i < len(self._blocks)
+                else None
+            )
+        return before, after
+
+    def block_at(self, timestamp: float) -> Optional[int]:
+        """
+        @description
+          Return the last block at or before timestamp, if the index alone
+          tells: it has that block and the next one. Otherwise None.
+        """
+        before, after = self.bracket(timestamp)
+        if before is None or after is None or after[0] != before[0] + 1:
+            return None
+        return before[0]
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def _insert(self, block: int, timestamp: int) -> bool:
+        i = bisect.bisect_left(self._blocks, block)
+        if i < len(self._blocks) and self._blocks[i] == block:
+            return False
+        self._blocks.insert(i, block)
+        self._timestamps.insert(i, timestamp)
+        return True
+
+    def _load(self):
+        assert self.path is not None
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r") as f:
+            text = f.read()
+        if not text.endswith("\n"):
+            # drop a row torn by a process that got killed mid-write, so
+            # that rows appended later don't get glued to it
+            text = text[: text.rfind("\n") + 1]
+            with open(self.path, "r+") as f:
+                f.truncate(len(text))
+
+        for row in csv.reader(text.splitlines()):
+            if len(row) == 2 and row[0].isdigit() and row[1].isdigit():
+                self._insert(int(row[0]), int(row[1]))
+
+
+_INDEXES: Dict[int, BlockTimestamps] = {}  # [chain_id] : BlockTimestamps
+_INDEXES_LOCK = threading.Lock()
+
+
+@enforce_types
+def get_block_timestamps(chain_id: int) -> BlockTimestamps:
+    """
+    @description
+      Return the process-wide index of this chain.
+
+      Uses these envvars:
+        BLOCK_INDEX_DIR -- directory to persist indexes in. If not set,
+          they're in memory only. Local dev chains are never persisted,
+          as they get reset.
+    """
+    path = None
+    index_dir = os.getenv("BLOCK_INDEX_DIR")
+    if index_dir and chain_id != DEV_CHAINID:
+        filename = f"block_index-{chain_id}.csv"
+        path = os.path.join(os.path.expanduser(index_dir), filename)
+
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(chain_id)
+        if index is None or index.path != path:
+            index = BlockTimestamps(path)
+            _INDEXES[chain_id] = index
+        return index
+
+
+def clear_block_timestamps():
+    """Forget the in-memory indexes of all chains"""
+    with _INDEXES_LOCK:
+        _INDEXES.clear()
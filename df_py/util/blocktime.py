@@ -1,11 +1,27 @@
+import weakref
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from math import ceil
-from typing import Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 from enforce_typing import enforce_types
-from scipy import optimize
 from web3.main import Web3
 
+from df_py.util.block_timestamps import BlockTimestamps, get_block_timestamps
+from df_py.util.networkutil import DEV_CHAINID
+from df_py.util.rpc_batch import batch_requests, raise_errors
+
+ETH_BLOCK_TIME = 12.06  # seconds, on average
+
+# blocks fetched per batch of RPC calls, in eth_find_closest_block()
+FIND_BATCH_SIZE = 16
+
+# timestamp_to_block() raises if the block is further than this from the target
+MAX_BLOCK_DISTANCE_S = 60 * 15
+
+# [web3] : chain_id. Saves an RPC call per lookup
+_CHAIN_IDS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
 
 @enforce_types
 def get_block_number_thursday(web3) -> int:
@@ -48,8 +64,17 @@ def timestr_to_block(web3, timestr: str, test_eth: bool = False) -> int:
       block -- int
     """
     timestamp = timestr_to_timestamp(timestr)
-    if web3.eth.chain_id == 1 or test_eth:
+    if _chain_id(web3) == 1 or test_eth:
         # more accurate for mainnet
+        index = _block_timestamps(web3)
+        block_at = _indexed_block_at(web3, timestamp)
+        if block_at is not None:  # answer is in the block index
+            before_ts, after_ts = index.get(block_at), index.get(block_at + 1)
+            assert before_ts is not None and after_ts is not None
+            if abs(after_ts - timestamp) < abs(before_ts - timestamp):
+                return block_at + 1
+            return block_at
+
         block = eth_timestamp_to_block(web3, timestamp)
         block = eth_find_closest_block(web3, block, timestamp)
         return block
@@ -79,16 +104,17 @@ def timestr_to_timestamp(timestr: str) -> float:
 
 @enforce_types
 def timestamp_to_future_block(web3, timestamp: Union[float, int]) -> int:
-    def time_since_timestamp(block_i):
-        return web3.eth.get_block(int(block_i)).timestamp
+    block = _indexed_block_at(web3, timestamp)
+    if block is not None:  # it's not in the future anymore, and is indexed
+        return block
 
-    block_last_number = web3.eth.get_block("latest").number
+    latest = web3.eth.get_block("latest")
+    block_last_number = latest.number
+    block_last_time = latest.timestamp  # time of last block
 
     # 40,000 is the average number of blocks per week
     block_old_number = max(0, block_last_number - 40_000)  # go back 40,000 blocks
-
-    block_last_time = time_since_timestamp(block_last_number)  # time of last block
-    block_old_time = time_since_timestamp(block_old_number)  # time of old block
+    block_old_time = _block_timestamp(web3, block_old_number)  # time of old block
 
     assert block_last_time < timestamp
 
@@ -107,65 +133,54 @@ def timestamp_to_future_block(web3, timestamp: Union[float, int]) -> int:
     return int(estimated_block_number)
 
 
-class BlockTimestampComparer:
-    def __init__(self, target_timestamp, web3):
-        self.target_timestamp = target_timestamp
-        self.web3 = web3
-
-    def time_since_timestamp(self, block_i):
-        try:
-            block_timestamp = self.web3.eth.get_block(int(block_i)).timestamp
-        except Exception as e:
-            print(f"An exception occurred while getting block {block_i}, {e}")
-            block_timestamp = 0
-        return block_timestamp - self.target_timestamp
-
-
 @enforce_types
 def timestamp_to_block(web3, timestamp: Union[float, int]) -> int:
-    """Example: 1648872899.0 --> 4928"""
+    """
+    @description
+      Return the last block at or before timestamp.
+      Example: 1648872899.0 --> 4928
+
+      Block times are near-linear, so this does an interpolation search
+      between the closest blocks in the block index. Looked-up blocks get
+      indexed, so a conversion typically takes a handful of RPC calls, or
+      none if the index already brackets the answer.
+    """
+    block = _indexed_block_at(web3, timestamp)
+    if block is not None:
+        return block
 
-    f = BlockTimestampComparer(timestamp, web3).time_since_timestamp
-    a = 0
-    b = web3.eth.get_block("latest").number
+    latest = web3.eth.get_block("latest")
+    latest_block, latest_ts = latest.number, latest.timestamp
+    block_timestamp = partial(_block_timestamp, web3)
 
-    if f(a) > 0 and f(b) > 0:  # corner case: everything's in the past
-        if web3.eth.chain_id == 8996:
+    if latest_ts <= timestamp:  # corner case: everything's in the future
+        return latest_block
+
+    first_ts = block_timestamp(0)
+    if first_ts > timestamp:  # corner case: everything's in the past
+        if _chain_id(web3) == DEV_CHAINID:
             return 0  # this situation is feasible on testnet
 
         # on other networks, the target will never be 0
         raise ValueError("timestamp_to_block() everything is in the past")
 
-    if f(a) < 0 and f(b) < 0:  # corner case: everything's in the future
-        return web3.eth.get_block("latest").number
-
-    # pylint: disable=unused-variable
-    (block_i, results) = optimize.bisect(f, a, b, xtol=0.4, full_output=True)
-
-    # uncomment to debug
-    # ---
-    # print(f"iterations = {results.iterations}")
-    # print(f"function calls = {results.function_calls}")
-    # print(f"converged? {results.converged}")
-    # print(f"cause of termination? {results.flag}")
-    # print("")
-    # print(f"target timestamp = {timestamp}")
-    # print(f"distToTargetTimestamp(a=0) = {f(0)}")
-    # print(f"distToTargetTimestamp(b={b}) = {f(b)}")
-    # print(f"distToTargetTimestamp(result=block_i={block_i}) = {f(block_i)}")
-    # ---
-    block_found = web3.eth.get_block(int(block_i))
-    block_timestamp = block_found.timestamp
-
-    if abs(block_timestamp - timestamp) > 60 * 15:
+    index = _block_timestamps(web3)
+    before, after = index.bracket(timestamp)
+    if after is None or after[0] > latest_block:
+        after = (latest_block, latest_ts)
+    block_i, block_timestamp_i = _interpolation_search(
+        block_timestamp, timestamp, before or (0, first_ts), after
+    )
+
+    if abs(block_timestamp_i - timestamp) > MAX_BLOCK_DISTANCE_S:
         # pylint: disable=line-too-long
         print(
             "WARNING: timestamp_to_block() is returning a block that is more than 15 minutes away from the target timestamp"
         )
         print("target timestamp =", timestamp)
-        print("block timestamp =", block_timestamp)
+        print("block timestamp =", block_timestamp_i)
         print("block number =", block_i)
-        print("delta =", abs(block_timestamp - timestamp))
+        print("delta =", abs(block_timestamp_i - timestamp))
         raise ValueError(
             "timestamp_to_block() is returning a block that is too far away"
         )
@@ -175,9 +190,72 @@ def timestamp_to_block(web3, timestamp: Union[float, int]) -> int:
         "for timestamp",
         timestamp,
         "diff",
-        abs(block_timestamp - timestamp),
+        abs(block_timestamp_i - timestamp),
     )
-    return int(block_i)
+    return block_i
+
+
+def _interpolation_search(
+    block_timestamp: Callable[[int], int],
+    timestamp: Union[float, int],
+    lo: Tuple[int, int],
+    hi: Tuple[int, int],
+) -> Tuple[int, int]:
+    """
+    @description
+      Find the last block at or before timestamp, between blocks lo and hi.
+
+      Each guess interpolates between the bracketing blocks. When guesses
+      keep falling short, on the same side of the target, the step from
+      that side doubles each time, so that the bracket gets closed from
+      the other side. If the bracket still shrinks slowly, fall back to
+      bisection.
+
+    @arguments
+      block_timestamp -- function block -> timestamp
+      timestamp -- target timestamp
+      lo -- (block, timestamp) with timestamp <= target timestamp
+      hi -- (block, timestamp) with timestamp > target timestamp
+
+    @return
+      (block, timestamp) -- the block found, and its timestamp
+    """
+    (lo_block, lo_ts), (hi_block, hi_ts) = lo, hi
+    assert lo_ts <= timestamp < hi_ts, (lo, hi, timestamp)
+    last_moved = None  # "lo" or "hi": the end that the last guess moved
+    n_moves = 0  # how many guesses in a row moved that end
+    n_slow_steps = 0
+
+    while hi_block - lo_block > 1:
+        span = hi_block - lo_block
+        if n_slow_steps >= 3:
+            guess = lo_block + span // 2
+        else:
+            frac = (timestamp - lo_ts) / (hi_ts - lo_ts)
+            guess = min(max(lo_block + round(span * frac), lo_block + 1), hi_block - 1)
+            # gallop past the guess, if the last guesses kept falling short
+            step_factor = 2 ** (n_moves - 1) if n_moves > 1 else 1
+            if last_moved == "lo":
+                guess = lo_block + (guess - lo_block) * step_factor
+            elif last_moved == "hi":
+                guess = hi_block - (hi_block - guess) * step_factor
+        guess = min(max(guess, lo_block + 1), hi_block - 1)
+
+        guess_ts = block_timestamp(guess)
+        moved = "lo" if guess_ts <= timestamp else "hi"
+        if moved == "lo":
+            lo_block, lo_ts = guess, guess_ts
+        else:
+            hi_block, hi_ts = guess, guess_ts
+        n_moves = n_moves + 1 if moved == last_moved else 1
+        last_moved = moved
+
+        if hi_block - lo_block > span // 2:
+            n_slow_steps += 1
+        else:
+            n_slow_steps = 0
+
+    return lo_block, lo_ts
 
 
 @enforce_types
@@ -192,14 +270,25 @@ def eth_timestamp_to_block(web3, timestamp: Union[float, int]) -> int:
 
 
 @enforce_types
-def eth_calc_block_number(ts: int, block: int, target_ts: int, web3):
-    AVG_BLOCK_TIME = 12.06  # seconds
+def eth_calc_block_number(
+    ts: int, block: int, target_ts: int, web3, block_time: float = ETH_BLOCK_TIME
+):
+    """
+    @description
+      Estimate the block at target_ts, from a block & its timestamp ts.
+      Refine the estimate until it's within a minute, using the block
+      time seen between the last two estimates (secant method).
+    """
     diff = target_ts - ts
-    diff_blocks = int(diff // AVG_BLOCK_TIME)
+    diff_blocks = int(diff // block_time)
+    if diff_blocks == 0:
+        return block
+
     block += diff_blocks
-    ts_found = web3.eth.get_block(block).timestamp
+    ts_found = _block_timestamp(web3, block)
     if abs(ts_found - target_ts) > 12 * 5:
-        return eth_calc_block_number(ts_found, block, target_ts, web3)
+        seen_block_time = max((ts_found - ts) / diff_blocks, 1.0)
+        return eth_calc_block_number(ts_found, block, target_ts, web3, seen_block_time)
 
     return block
 
@@ -217,34 +306,56 @@ def eth_find_closest_block(
         block_number -- int
     @description
         Finds the closest block number to given timestamp
-    """
 
-    block_ts = web3.eth.get_block(block_number).timestamp  # type: ignore[attr-defined]
-    found = block_number
-
-    last = None
-    if block_ts > timestamp:
-        # search backwards
-        while True:
-            last = found
-            found -= 1
-            if web3.eth.get_block(found).timestamp < timestamp:  # type: ignore[attr-defined]
+        Gallops away from block_number, in steps of 1, 2, 4, .. blocks,
+        until the timestamp is bracketed. Then narrows the bracket down,
+        each time fetching FIND_BATCH_SIZE blocks evenly spread over it.
+        Blocks get fetched in batches of RPC calls, so this takes a
+        logarithmic # round-trips in the distance to the closest block.
+    """
+    timestamps = {block_number: _block_timestamp(web3, block_number)}
+    forwards = timestamps[block_number] <= timestamp
+    sign = 1 if forwards else -1
+
+    near = block_number  # last block found on block_number's side of timestamp
+    far = None  # first block found on the other side
+    step_exp = 0
+    while far is None:
+        probes = [
+            max(block_number + sign * 2**i, 0)
+            for i in range(step_exp, step_exp + FIND_BATCH_SIZE)
+        ]
+        step_exp += FIND_BATCH_SIZE
+        timestamps.update(_fetch_block_timestamps(web3, probes))
+        for probe in probes:
+            if probe == near:  # stuck at block 0
+                return near
+            if _is_past(timestamps, probe, timestamp) == forwards:
+                far = probe
                 break
-
-    else:
-        # search forwards
-        while True:
-            last = found
-            found += 1
-            if web3.eth.get_block(found).timestamp > timestamp:  # type: ignore[attr-defined]
+            near = probe
+
+    (lo, hi) = (near, far) if forwards else (far, near)
+    while hi - lo > 1:
+        n_probes = min(FIND_BATCH_SIZE, hi - lo - 1)
+        probes = [lo + (hi - lo) * (i + 1) // (n_probes + 1) for i in range(n_probes)]
+        timestamps.update(_fetch_block_timestamps(web3, probes))
+        for probe in probes:
+            if _is_past(timestamps, probe, timestamp):
+                hi = probe
                 break
+            lo = probe
 
-    if abs(web3.eth.get_block(last).timestamp - timestamp) < abs(  # type: ignore[attr-defined]
-        web3.eth.get_block(found).timestamp - timestamp  # type: ignore[attr-defined]
-    ):
-        found = last
+    if hi not in timestamps:  # past the chain head
+        return lo
+    if abs(timestamps[hi] - timestamp) < abs(timestamps[lo] - timestamp):
+        return hi
+    return lo
 
-    return found
+
+def _is_past(timestamps: Dict[int, int], block: int, timestamp) -> bool:
+    """Is block past timestamp? Blocks without a timestamp are past the head"""
+    return block not in timestamps or timestamps[block] > timestamp
 
 
 @enforce_types
@@ -276,3 +387,78 @@ def get_st_fin_blocks(web3, ST, FIN):
     st_block = get_st_block(web3, ST)
     fin_block = get_fin_block(web3, FIN)
     return (st_block, fin_block)
+
+
+def _chain_id(web3) -> int:
+    chain_id = _CHAIN_IDS.get(web3)
+    if chain_id is None:
+        chain_id = web3.eth.chain_id
+        _CHAIN_IDS[web3] = chain_id
+    return chain_id
+
+
+def _block_timestamps(web3) -> BlockTimestamps:
+    """Returns the block index of web3's chain"""
+    return get_block_timestamps(_chain_id(web3))
+
+
+def _indexed_block_at(web3, timestamp: Union[float, int]) -> Optional[int]:
+    """
+    @description
+      Return the last block at or before timestamp, if the block index alone
+      tells. Otherwise None.
+
+      Also None if that block is over MAX_BLOCK_DISTANCE_S before timestamp,
+      eg the chain halted. Then the caller resolves it over RPC, which
+      validates it like the first time, rather than serving it unchecked.
+    """
+    index = _block_timestamps(web3)
+    block = index.block_at(timestamp)
+    if block is None:
+        return None
+    block_ts = index.get(block)
+    if block_ts is None or timestamp - block_ts > MAX_BLOCK_DISTANCE_S:
+        return None
+    return block
+
+
+def _block_timestamp(web3, block: int) -> int:
+    """Returns the timestamp of this block, from the block index or via RPC"""
+    index = _block_timestamps(web3)
+    timestamp = index.get(block)
+    if timestamp is None:
+        timestamp = web3.eth.get_block(block).timestamp
+        index.add(block, timestamp)
+    return timestamp
+
+
+def _fetch_block_timestamps(web3, blocks: List[int]) -> Dict[int, int]:
+    """
+    @description
+      Return the timestamps of these blocks, from the block index or else
+      via batched RPC calls. Blocks past the chain head are left out.
+    """
+    index = _block_timestamps(web3)
+    timestamps = {}
+    missing = []
+    for block in dict.fromkeys(blocks):
+        timestamp = index.get(block)
+        if timestamp is None:
+            missing.append(block)
+        else:
+            timestamps[block] = timestamp
+    if not missing:
+        return timestamps
+
+    calls = [("eth_getBlockByNumber", [hex(block), False]) for block in missing]
+    results = raise_errors(batch_requests(web3, calls))
+    fetched = {
+        block: int(result["timestamp"], 16)
+        for block, result in zip(missing, results)
+        if result is not None  # None: past the chain head
+    }
+
+    for block, timestamp in fetched.items():
+        index.add(block, timestamp)
+        timestamps[block] = timestamp
+    return timestamps
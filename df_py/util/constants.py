@@ -46,6 +46,16 @@ PREDICTOOR_OCEAN_BUDGET = 37_500
 PREDICTOOR_DF_FIRST_DATE = datetime(2023, 11, 9)
 SAPPHIRE_MAINNET_CHAINID = 23294
 
+# max # slot windows queried concurrently, in query_predictoors
+MAX_PREDICTOOR_QUERY_WORKERS = 8
+
 # volume
+# max # sampled blocks queried concurrently, in queryVebalances & queryAllocations
+MAX_QUERY_WORKERS = 8
+
+# rpc
+# max # calls per JSON-RPC batch request
+MAX_RPC_BATCH_SIZE = 100
+
 # Weekly Percent Yield needs to be 1.5717%., for max APY of 125%
 TARGET_WPY = 0.015717
@@ -1,7 +1,12 @@
 import re
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from enforce_typing import enforce_types
 
+from df_py.util.addr_registry import checksum_addr
+
 
 @enforce_types
 def assert_is_eth_addr(s: str):
@@ -9,6 +14,36 @@ def assert_is_eth_addr(s: str):
     assert s[:2] == "0x", s
 
 
+@enforce_types
+def lower_eth_addrs(addrs: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Lowercase a column of addresses, and check them all at once"""
+    lower_addrs = pc.utf8_lower(addrs)
+    is_addr = pc.match_substring_regex(lower_addrs, "^0x[0-9a-f]{40}$")
+    bad_addrs = pc.filter(addrs, pc.invert(is_addr))
+    assert len(bad_addrs) == 0, bad_addrs[0].as_py()
+    return lower_addrs
+
+
+@enforce_types
+def checksum_eth_addrs(addrs: pa.ChunkedArray) -> np.ndarray:
+    """
+    @description
+      Lowercase, check and checksum a column of addresses. Each distinct
+      address gets looked up once, in the process-wide address registry.
+
+    @return
+      checksum_addrs -- object array of str, one per entry of addrs
+    """
+    addrs = lower_eth_addrs(addrs)
+    distinct_addrs = pc.unique(addrs)
+    distinct_checksum_addrs = np.array(
+        [checksum_addr(addr) for addr in distinct_addrs.to_pylist()],
+        dtype=object,
+    )
+    index = pc.index_in(addrs, value_set=distinct_addrs).to_numpy()
+    return distinct_checksum_addrs[index]
+
+
 @enforce_types
 def _last_int(s: str) -> int:
     """Return the last integer in the given str"""
@@ -22,8 +22,8 @@ Usage: dftool get_rate|volsym|allocations.. ARG1 ARG2 ..
 
   dftool get_rate TOKEN_SYMBOL ST FIN CSV_DIR --RETRIES
   dftool volsym ST FIN NSAMP CSV_DIR CHAINID --RETRIES - query chain, output volumes, symbols, owners
-  dftool allocations ST FIN NSAMP CSV_DIR CHAINID --RETRIES
-  dftool vebals ST FIN NSAMP CSV_DIR CHAINID --RETRIES
+  dftool allocations ST FIN NSAMP CSV_DIR CHAINID --RETRIES --MAX_WORKERS
+  dftool vebals ST FIN NSAMP CSV_DIR CHAINID --RETRIES --MAX_WORKERS
   dftool predictoor_data START_DATE END_DATE CSV_DIR CHAINID --RETRIES
   dftool calc volume|predictoor CSV_DIR TOT_OCEAN START_DATE - from stakes/etc csvs (or predictoor/volume data csvs), output rewards
   dftool dispense_active CSV_DIR CHAINID --DFREWARDS_ADDR --TOKEN_ADDR --BATCH_NBR - from rewards, dispense funds
@@ -48,6 +48,9 @@ Usage: dftool get_rate|volsym|allocations.. ARG1 ARG2 ..
   dftool checkpoint_feedist CHAINID - checkpoint FeeDistributor contract
 
 Transactions are signed with envvar 'DFTOOL_KEY`.
+
+Files are saved as csv by default. To save & load parquet instead,
+set envvar STORAGE_FORMAT=parquet, or pass --STORAGE_FORMAT parquet.
 """
 
 
@@ -9,10 +9,9 @@ from web3.main import Web3
 
 from df_py.predictoor.csvs import (
     predictoor_data_csv_filename,
-    load_predictoor_data_csv,
+    load_prediction_table,
     load_predictoor_rewards_csv,
     save_predictoor_contracts_csv,
-    save_predictoor_data_csv,
     save_predictoor_summary_csv,
     save_predictoor_rewards_csv,
 )
@@ -20,11 +19,17 @@ from df_py.predictoor.calc_rewards import (
     aggregate_predictoor_rewards,
     calc_predictoor_rewards,
 )
-from df_py.predictoor.queries import query_predictoor_contracts, query_predictoors
+from df_py.predictoor.contracts_cache import persist_predictoor_contracts_cache
+from df_py.predictoor.ingest import ingest_predictoor_data
+from df_py.predictoor.queries import query_predictoor_contracts
 from df_py.util import blockrange, dispense, get_rate, networkutil, oceantestutil
 from df_py.util.base18 import from_wei, to_wei
 from df_py.util.blocktime import get_fin_block, timestr_to_timestamp
-from df_py.util.constants import SAPPHIRE_MAINNET_CHAINID
+from df_py.util.constants import (
+    MAX_PREDICTOOR_QUERY_WORKERS,
+    MAX_QUERY_WORKERS,
+    SAPPHIRE_MAINNET_CHAINID,
+)
 from df_py.util.contract_base import ContractBase
 from df_py.util.dftool_arguments import (
     CHAINID_EXAMPLES,
@@ -54,6 +59,7 @@ from df_py.util.oceanutil import (
     veAllocate,
 )
 from df_py.util.retry import retry_function
+from df_py.util.storage import STORAGE_FORMATS, set_storage_format
 from df_py.util.vesting_schedule import (
     get_active_reward_amount_for_week_eth_by_stream,
 )
@@ -82,6 +88,7 @@ def do_volsym():
     SECRET_SEED = _getSecretSeedOrExit()
 
     csv_dir, chain_id = arguments.CSV_DIR, arguments.CHAINID
+    persist_predictoor_contracts_cache(csv_dir)  # share contracts across runs
 
     # check files, prep dir
     if not csvs.rate_csv_filenames(csv_dir):
@@ -131,6 +138,7 @@ def do_nftinfo():
 
     # extract inputs
     csv_dir, chain_id, end_block = arguments.CSV_DIR, arguments.CHAINID, arguments.FIN
+    persist_predictoor_contracts_cache(csv_dir)  # share contracts across runs
 
     # hardcoded values
     # -queries.queryNftinfo() can be problematic; it's only used for frontend data
@@ -167,6 +175,13 @@ def do_allocations():
         command_name="allocations",
         csv_names="allocations.csv or allocations_realtime.csv",
     )
+    parser.add_argument(
+        "--MAX_WORKERS",
+        default=MAX_QUERY_WORKERS,
+        type=int,
+        help="# sampled blocks to query concurrently",
+        required=False,
+    )
 
     arguments = parser.parse_args()
     print_arguments(arguments)
@@ -185,7 +200,12 @@ def do_allocations():
         web3, arguments.ST, arguments.FIN, n_samp, SECRET_SEED
     )
     allocs = retry_function(
-        queries.queryAllocations, arguments.RETRIES, 10, rng, chain_id
+        queries.queryAllocations,
+        arguments.RETRIES,
+        10,
+        rng,
+        chain_id,
+        arguments.MAX_WORKERS,
     )
     csvs.save_allocation_csv(allocs, csv_dir, n_samp > 1)
 
@@ -205,6 +225,19 @@ def do_vebals():
         command_name="vebals",
         csv_names="vebals.csv or vebals_realtime.csv",
     )
+    parser.add_argument(
+        "--MAX_WORKERS",
+        default=MAX_QUERY_WORKERS,
+        type=int,
+        help="# sampled blocks to query concurrently",
+        required=False,
+    )
+    parser.add_argument(
+        "--INCREMENTAL",
+        action="store_true",
+        help="only fetch veOCEANs changed since the previous sampled block",
+        required=False,
+    )
     arguments = parser.parse_args()
     print_arguments(arguments)
 
@@ -221,7 +254,13 @@ def do_vebals():
     )
 
     balances, locked_amt, unlock_time = retry_function(
-        queries.queryVebalances, arguments.RETRIES, 10, rng, chain_id
+        queries.queryVebalances,
+        arguments.RETRIES,
+        10,
+        rng,
+        chain_id,
+        arguments.MAX_WORKERS,
+        arguments.INCREMENTAL,
     )
     csvs.save_vebals_csv(balances, locked_amt, unlock_time, csv_dir, n_samp > 1)
 
@@ -321,11 +360,19 @@ def do_predictoor_data():
         help="Output only contract data",
         required=False,
     )
+    parser.add_argument(
+        "--MAX_WORKERS",
+        default=MAX_PREDICTOOR_QUERY_WORKERS,
+        type=int,
+        help="# slot windows to query concurrently",
+        required=False,
+    )
 
     arguments = parser.parse_args()
     print_arguments(arguments)
     csv_dir, chain_id = arguments.CSV_DIR, arguments.CHAINID
     only_contracts = arguments.ONLY_CONTRACTS
+    persist_predictoor_contracts_cache(csv_dir)  # share contracts across runs
 
     # check files, prep dir
     _exitIfFileExists(predictoor_data_csv_filename(csv_dir))
@@ -339,19 +386,22 @@ def do_predictoor_data():
     )
 
     if not only_contracts:
-        predictoor_data = retry_function(
-            query_predictoors,
+        # streams to disk. Retries, and reruns after a crash, resume from
+        # the last flushed slot
+        predictoors = retry_function(
+            ingest_predictoor_data,
             arguments.RETRIES,
             10,
             st_ts,
             end_ts,
             chain_id,
+            csv_dir,
+            arguments.MAX_WORKERS,
         )
 
     save_predictoor_contracts_csv(predictoor_contracts, csv_dir)
     if not only_contracts:
-        save_predictoor_data_csv(predictoor_data, csv_dir)
-        save_predictoor_summary_csv(predictoor_data, csv_dir)
+        save_predictoor_summary_csv(predictoors, csv_dir)
     print("dftool predictoor_data: Done")
 
 
@@ -391,6 +441,7 @@ def do_calc():
         arguments.START_DATE,
         arguments.CSV_DIR,
     )
+    persist_predictoor_contracts_cache(csv_dir)  # share contracts across runs
 
     # condition inputs
     if tot_ocean == 0 and start_date is None:
@@ -438,8 +489,8 @@ def do_calc():
         calc_volume_rewards_from_csvs(csv_dir, start_date, tot_ocean)
 
     if arguments.SUBSTREAM == "predictoor_rose":
-        predictoor_data = load_predictoor_data_csv(csv_dir)
-        print("Loaded predictoor data:", predictoor_data)
+        predictoor_data = load_prediction_table(csv_dir)
+        print("Loaded predictoor data:", len(predictoor_data), "predictions")
         predictoor_rewards = calc_predictoor_rewards(
             predictoor_data, arguments.TOT_OCEAN, SAPPHIRE_MAINNET_CHAINID
         )
@@ -1083,6 +1134,8 @@ def _getPrivateAccount():
 
 @enforce_types
 def _do_main():
+    _set_storage_format_from_argv()
+
     if len(sys.argv) <= 1 or sys.argv[1] == "help":
         do_help_long(0)
 
@@ -1092,3 +1145,13 @@ def _do_main():
         do_help_long(1)
 
     func()
+
+
+def _set_storage_format_from_argv():
+    """Consume the --STORAGE_FORMAT flag, which any command accepts"""
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--STORAGE_FORMAT", choices=STORAGE_FORMATS)
+    arguments, other_args = parser.parse_known_args(sys.argv[1:])
+    sys.argv = sys.argv[:1] + other_args
+    if arguments.STORAGE_FORMAT is not None:
+        set_storage_format(arguments.STORAGE_FORMAT)
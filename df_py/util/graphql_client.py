@@ -0,0 +1,178 @@
+import asyncio
+import atexit
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+from enforce_typing import enforce_types
+
+MAX_IN_FLIGHT = 16  # max concurrent requests, per subgraph url
+RATE_LIMIT = 20.0  # max requests per second, per subgraph url
+RATE_BURST = 20  # max requests sent back-to-back after being idle
+TIMEOUT_S = 30
+
+# all clients & sessions live on one background event loop, so that the
+# sync wrapper and every thread calling it share pools and limits
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+# only touched from within _LOOP
+_CLIENTS: Dict[str, "AsyncGraphQLClient"] = {}  # [subgraph_url] : client
+# [(host, limit_per_host)] : pooled session
+_SESSIONS: Dict[Tuple[str, int], aiohttp.ClientSession] = {}
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: allows `rate` acquires per second on average,
+    and up to `capacity` back-to-back. Use from a single event loop.
+    """
+
+    @enforce_types
+    def __init__(self, rate: float, capacity: int):
+        assert rate > 0 and capacity >= 1
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+class AsyncGraphQLClient:
+    """
+    asyncio client for one subgraph url.
+
+    Requests go through a keep-alive connection pool shared by all clients
+    of the same host and max_in_flight, ask for gzip-compressed responses,
+    are rate limited by a token bucket, and at most max_in_flight are
+    outstanding at once.
+
+    Create and use it from the background loop, e.g. via get_client().
+    """
+
+    @enforce_types
+    def __init__(
+        self,
+        url: str,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        rate: float = RATE_LIMIT,
+        burst: int = RATE_BURST,
+    ):
+        self.url = url
+        self.max_in_flight = max_in_flight
+        self._bucket = TokenBucket(rate, burst)
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def submit(self, query: str) -> dict:
+        """Submit a query, and return the result"""
+        async with self._in_flight:
+            await self._bucket.acquire()
+            status, result = await self._post(query)
+
+        if status != 200:
+            # pylint: disable=broad-exception-raised
+            raise Exception(f"Query failed. Return code is {status}\n{query}")
+
+        return result
+
+    async def _post(self, query: str) -> Tuple[int, dict]:
+        session = _get_session(self.url, self.max_in_flight)
+        async with session.post(self.url, json={"query": query}) as response:
+            if response.status != 200:
+                return response.status, {}
+            return response.status, await response.json(content_type=None)
+
+
+def _get_session(url: str, limit_per_host: int) -> aiohttp.ClientSession:
+    # keyed by limit too: a pool made for another client's limit would cap
+    # this client at that limit
+    key = (urlparse(url).netloc, limit_per_host)
+    session = _SESSIONS.get(key)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=limit_per_host),
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT_S),
+            headers={"Accept-Encoding": "gzip"},
+        )
+        _SESSIONS[key] = session
+    return session
+
+
+def get_client(url: str) -> AsyncGraphQLClient:
+    """Return the client of this subgraph url. Call from the background loop."""
+    if url not in _CLIENTS:
+        _CLIENTS[url] = AsyncGraphQLClient(url)
+    return _CLIENTS[url]
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_LOOP.run_forever, name="graphql_client", daemon=True
+            )
+            thread.start()
+        return _LOOP
+
+
+async def _submit_on_loop(url: str, query: str) -> dict:
+    return await get_client(url).submit(query)
+
+
+async def submit_query_async(url: str, query: str) -> dict:
+    """
+    @description
+      Submit a query to the subgraph at url, and return the result.
+      Can be awaited from any event loop.
+    """
+    loop = _get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await _submit_on_loop(url, query)
+
+    future = asyncio.run_coroutine_threadsafe(_submit_on_loop(url, query), loop)
+    return await asyncio.wrap_future(future)
+
+
+@enforce_types
+def submit_query_sync(url: str, query: str) -> dict:
+    """
+    @description
+      Submit a query to the subgraph at url, and return the result.
+      Blocks until done. Safe to call from many threads at once.
+    """
+    loop = _get_loop()
+    future = asyncio.run_coroutine_threadsafe(_submit_on_loop(url, query), loop)
+    return future.result()
+
+
+async def _close_sessions():
+    for session in _SESSIONS.values():
+        await session.close()
+    _SESSIONS.clear()
+
+
+@atexit.register
+def _shutdown():
+    if _LOOP is None or not _LOOP.is_running():
+        return
+    future = asyncio.run_coroutine_threadsafe(_close_sessions(), _LOOP)
+    future.result(timeout=TIMEOUT_S)
+    _LOOP.call_soon_threadsafe(_LOOP.stop)
@@ -1,25 +1,388 @@
+import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
-import requests
+from enforce_typing import enforce_types
 
-from df_py.util import networkutil
+from df_py.util import graphql_client, networkutil
+from df_py.util.query_cache import DEFAULT_MAX_BYTES, QueryCache
 
 MAX_WAIT = 60 * 15
+CHUNK_SIZE = 1000  # max for subgraph = 1000
+
+# batching of sampled blocks into one query, see paginate_query_at_blocks()
+MAX_BLOCKS_PER_QUERY = 10
+TARGET_RECORDS_PER_QUERY = 5000
+
+QUERY_CACHE_FILENAME = "subgraph_responses.sqlite"
+
+_QUERY_CACHE: Optional[QueryCache] = None
+_QUERY_CACHE_LOCK = threading.Lock()
+
+# [chainID] : last block synced to the subgraph, as last seen
+_SYNCED_HEADS: Dict[int, int] = {}
 
 
 def submit_query(query: str, chainID: int) -> dict:
-    subgraph_url = networkutil.chain_id_to_subgraph_uri(chainID)
-    request = requests.post(subgraph_url, "", json={"query": query}, timeout=30)
+    """
+    @description
+      Submit a query to the chain's subgraph, and return the result.
 
-    if request.status_code != 200:
-        # pylint: disable=broad-exception-raised
-        raise Exception(f"Query failed. Return code is {request.status_code}\n{query}")
+      If envvar QUERY_CACHE_DIR is set, results of queries pinned below the
+      subgraph's synced head are cached on disk, and served from there on
+      later calls. See get_query_cache().
+    """
+    cache = get_query_cache()
+    if cache is None or pinned_block(query) is None:
+        return _post_query(query, chainID)
 
-    result = request.json()
+    result = cache.get(query, chainID)
+    if result is not None:
+        return result
+
+    result = _post_query(query, chainID)
+    if "data" in result and "errors" not in result:
+        if _is_immutable(query, chainID):
+            cache.put(query, chainID, result)
 
     return result
 
 
+def _post_query(query: str, chainID: int) -> dict:
+    subgraph_url = networkutil.chain_id_to_subgraph_uri(chainID)
+    return graphql_client.submit_query_sync(subgraph_url, query)
+
+
+async def submit_query_async(query: str, chainID: int) -> dict:
+    """
+    @description
+      Like submit_query(), but awaitable and without the on-disk cache.
+      Shares connection pools and rate limits with submit_query().
+    """
+    subgraph_url = networkutil.chain_id_to_subgraph_uri(chainID)
+    return await graphql_client.submit_query_async(subgraph_url, query)
+
+
+@enforce_types
+def build_paginated_query(
+    entity: str,
+    fields: str,
+    where: str = "",
+    block: Optional[int] = None,
+    last_id: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """
+    @description
+      Build the query for one page of a cursor-paginated subgraph entity.
+
+    @arguments
+      entity -- name of the entity, e.g. "orders"
+      fields -- selection set of each record; must include "id"
+      where -- extra filters inside the where clause, e.g. "block_gte: 5"
+      block -- if given, query the entity as of this block number
+      last_id -- id of the last record of the previous page, if any
+      chunk_size -- max # records in the page
+
+    @return
+      query -- str
+    """
+    return "{ %s }" % _paginated_selection(
+        entity, fields, where, block, last_id, chunk_size
+    )
+
+
+@enforce_types
+def build_multiblock_query(
+    entity: str,
+    fields: str,
+    last_ids: Dict[int, Optional[str]],
+    where: str = "",
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """
+    @description
+      Build one query for the next page of an entity at each of several
+      blocks. Each block's page is aliased as "b<block>".
+
+    @arguments
+      last_ids -- dict of [block] : id of the last record of the previous
+        page at that block, or None for the first page
+      entity, fields, where, chunk_size -- see build_paginated_query()
+
+    @return
+      query -- str
+    """
+    selections = [
+        f"b{block}: "
+        + _paginated_selection(entity, fields, where, block, last_id, chunk_size)
+        for block, last_id in last_ids.items()
+    ]
+    return "{ %s }" % " ".join(selections)
+
+
+def _paginated_selection(
+    entity: str,
+    fields: str,
+    where: str,
+    block: Optional[int],
+    last_id: Optional[str],
+    chunk_size: int,
+) -> str:
+    filters = []
+    if last_id is not None:
+        filters.append(f'id_gt: "{last_id}"')
+    if where:
+        filters.append(where)
+
+    args = [
+        f"first: {chunk_size}",
+        "orderBy: id",
+        "orderDirection: asc",
+        "where: {" + ", ".join(filters) + "}",
+    ]
+    if block is not None:
+        args.append(f"block: {{number: {block}}}")
+
+    return "%s(%s) { %s }" % (entity, ", ".join(args), fields)
+
+
+@enforce_types
+def paginate_query(
+    entity: str,
+    fields: str,
+    chainID: int,
+    where: str = "",
+    block: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[List[dict]]:
+    """
+    @description
+      Walk all records of a subgraph entity, one page at a time.
+
+      Pages are cursor-based: records are ordered by id, and each page asks
+      for ids greater than the last id seen. Unlike skip-based offsets, the
+      graph node serves every page at constant cost.
+
+    @arguments
+      entity, fields, where, block, chunk_size -- see build_paginated_query()
+      chainID -- chain whose subgraph is queried
+
+    @return
+      pages -- iterator of lists of records, in ascending id order
+
+    @raises
+      AssertionError: If the result of a query contains an error or no data.
+    """
+    last_id = None
+    while True:
+        query = build_paginated_query(entity, fields, where, block, last_id, chunk_size)
+        result = submit_query(query, chainID)
+        if "errors" in result or "data" not in result:
+            raise AssertionError(result)
+
+        records = result["data"][entity]
+        if len(records) == 0:
+            # means there are no records left
+            return
+
+        yield records
+        last_id = records[-1]["id"]
+
+
+@enforce_types
+def paginate_query_at_blocks(
+    entity: str,
+    fields: str,
+    chainID: int,
+    blocks: List[int],
+    where: str = "",
+    chunk_size: int = CHUNK_SIZE,
+    max_workers: int = 1,
+) -> Dict[int, List[dict]]:
+    """
+    @description
+      Return all records of a subgraph entity, at each of the given blocks.
+
+      Pages of several blocks share one query via aliases. The # blocks per
+      query adapts to the # records that come back, aiming for
+      TARGET_RECORDS_PER_QUERY. Blocks are split into max_workers groups
+      that are fetched concurrently.
+
+    @arguments
+      blocks -- block numbers to query at
+      max_workers -- max # groups of blocks to query concurrently
+      entity, fields, where, chunk_size -- see build_paginated_query()
+      chainID -- chain whose subgraph is queried
+
+    @return
+      records_at_blocks -- dict of [block] : list of records, in ascending id
+        order. Same records as paginate_query() at each block.
+
+    @raises
+      AssertionError: If the result of a query contains an error or no data.
+    """
+    unique_blocks = list(dict.fromkeys(blocks))
+    n_groups = max(1, min(max_workers, len(unique_blocks)))
+    group_size = -(-len(unique_blocks) // n_groups)  # ceil
+    groups = [
+        unique_blocks[i : i + group_size]
+        for i in range(0, len(unique_blocks), group_size)
+    ]
+
+    records_at_blocks: Dict[int, List[dict]] = {}
+    for group_records in map_concurrently(
+        lambda group: _paginate_query_at_blocks(
+            entity, fields, chainID, group, where, chunk_size
+        ),
+        groups,
+        max_workers,
+    ):
+        records_at_blocks.update(group_records)
+
+    return records_at_blocks
+
+
+def _paginate_query_at_blocks(
+    entity: str,
+    fields: str,
+    chainID: int,
+    blocks: List[int],
+    where: str,
+    chunk_size: int,
+) -> Dict[int, List[dict]]:
+    records_at_blocks: Dict[int, List[dict]] = {block: [] for block in blocks}
+    last_ids: Dict[int, Optional[str]] = {block: None for block in blocks}
+    todo = list(blocks)  # blocks with records left, in order
+    n_blocks_per_query = 1
+
+    while todo:
+        batch = todo[:n_blocks_per_query]
+        query = build_multiblock_query(
+            entity,
+            fields,
+            {block: last_ids[block] for block in batch},
+            where,
+            chunk_size,
+        )
+        result = submit_query(query, chainID)
+        if "errors" in result or "data" not in result:
+            raise AssertionError(result)
+
+        n_records = 0
+        for block in batch:
+            records = result["data"][f"b{block}"]
+            records_at_blocks[block] += records
+            n_records += len(records)
+            if len(records) < chunk_size:
+                # means there are no records left
+                todo.remove(block)
+            else:
+                last_ids[block] = records[-1]["id"]
+
+        n_blocks_per_query = _next_n_blocks_per_query(n_blocks_per_query, n_records)
+
+    return records_at_blocks
+
+
+@enforce_types
+def _next_n_blocks_per_query(n_blocks: int, n_records: int) -> int:
+    """Scale # blocks per query towards TARGET_RECORDS_PER_QUERY records.
+    Grow by at most 2x at a time, and stay within [1, MAX_BLOCKS_PER_QUERY]."""
+    if n_records == 0:
+        n_next = 2 * n_blocks
+    else:
+        n_next = min(2 * n_blocks, n_blocks * TARGET_RECORDS_PER_QUERY // n_records)
+    return max(1, min(MAX_BLOCKS_PER_QUERY, n_next))
+
+
+def map_concurrently(
+    f: Callable[[Any], Any], items: list, max_workers: int
+) -> Iterator[Any]:
+    """
+    @description
+      Call f on each item, running up to max_workers calls at a time.
+
+    @return
+      results -- iterator of f(item), in the same order as items. So merging
+        the results gives exactly what a serial loop over items would give.
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield f(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(f, items)
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """
+    @description
+      Return the on-disk query cache, or None if caching is off.
+
+      Uses these envvars:
+        QUERY_CACHE_DIR -- directory of the cache. If not set, caching is off
+        QUERY_CACHE_MAX_MB -- size above which LRU entries are evicted
+    """
+    global _QUERY_CACHE
+    cache_dir = os.getenv("QUERY_CACHE_DIR")
+    if not cache_dir:
+        return None
+
+    path = os.path.join(os.path.expanduser(cache_dir), QUERY_CACHE_FILENAME)
+    with _QUERY_CACHE_LOCK:
+        if _QUERY_CACHE is None or _QUERY_CACHE.path != path:
+            max_mb = os.getenv("QUERY_CACHE_MAX_MB")
+            max_bytes = int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES
+            _QUERY_CACHE = QueryCache(path, max_bytes)
+        return _QUERY_CACHE
+
+
+@enforce_types
+def pinned_block(query: str) -> Optional[int]:
+    """
+    @description
+      Return the highest block that the query is pinned to, via
+      "block: {number: N}" or "block_lte: N". None if it's not pinned.
+    """
+    blocks = re.findall(r"block\s*:\s*\{\s*number\s*:\s*(\d+)", query)
+    blocks += re.findall(r"block_lte\s*:\s*(\d+)", query)
+    if not blocks:
+        return None
+    return max(int(block) for block in blocks)
+
+
+@enforce_types
+def _is_immutable(query: str, chainID: int) -> bool:
+    """
+    @description
+      Can the query's result never change? True if it's pinned below the
+      block that the subgraph has synced to.
+
+    @notes
+      The dev chain gets redeployed from scratch, so it's never immutable.
+    """
+    if chainID == networkutil.DEV_CHAINID:
+        return False
+
+    block = pinned_block(query)
+    if block is None:
+        return False
+
+    # the synced head only moves forward, so only re-query it when needed
+    if block >= _SYNCED_HEADS.get(chainID, -1):
+        try:
+            _SYNCED_HEADS[chainID] = get_last_block(chainID)
+        except KeyError:
+            return False
+
+    return block < _SYNCED_HEADS[chainID]
+
+
 def get_last_block(chain_id: int) -> int:
     """Get the last block that was synced to the subgraph."""
     query = "{_meta { block { number } } }"
@@ -2,8 +2,15 @@
 # Copyright 2023 Ocean Protocol Foundation
 # SPDX-License-Identifier: Apache-2.0
 #
+import json
+from typing import Any, List, Tuple
+
+from eth_utils import to_bytes
 from web3 import HTTPProvider, WebsocketProvider
+from web3._utils.encoding import Web3JsonEncoder
+from web3.types import RPCResponse
 
+from df_py.util.constants import MAX_RPC_BATCH_SIZE
 from df_py.util.request import make_post_request
 
 
@@ -31,6 +38,57 @@ class CustomHTTPProvider(HTTPProvider):
         )
         return response
 
+    def make_batch_request(
+        self, calls: List[Tuple[str, Any]], max_batch_size: int = MAX_RPC_BATCH_SIZE
+    ) -> List[RPCResponse]:
+        """
+        @description
+          Send many RPC calls as JSON-RPC batches, of up to max_batch_size
+          calls each. Each batch is one HTTP request.
+
+        @arguments
+          calls -- list of (method, params)
+          max_batch_size -- max # calls per batch. Many nodes cap it.
+
+        @return
+          responses -- list of RPC responses, one per call, in order. A call
+            that failed has an "error" rather than a "result".
+        """
+        assert max_batch_size > 0, max_batch_size
+        responses: List[RPCResponse] = []
+        for i in range(0, len(calls), max_batch_size):
+            responses += self._make_batch_request(calls[i : i + max_batch_size])
+        return responses
+
+    def _make_batch_request(self, calls: List[Tuple[str, Any]]) -> List[RPCResponse]:
+        rpc_dicts = [
+            {
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params or [],
+                "id": next(self.request_counter),
+            }
+            for method, params in calls
+        ]
+        self.logger.debug(
+            "Making batch request HTTP. URI: %s, # calls: %s",
+            self.endpoint_uri,
+            len(rpc_dicts),
+        )
+        encoded = json.dumps(rpc_dicts, cls=Web3JsonEncoder)
+
+        # pylint: disable=not-a-mapping
+        raw_response = make_post_request(
+            self.endpoint_uri, to_bytes(text=encoded), **self.get_request_kwargs()
+        )
+        responses = self.decode_rpc_response(raw_response)
+        if not isinstance(responses, list):  # the whole batch got rejected
+            raise ValueError(f"batch request failed: {responses}")
+
+        # the server may answer in any order
+        responses_by_id = {response["id"]: response for response in responses}
+        return [responses_by_id[rpc_dict["id"]] for rpc_dict in rpc_dicts]
+
 
 def get_web3_connection_provider(network_url):
     if network_url.startswith("http"):
@@ -8,6 +8,7 @@ from web3.logs import DISCARD
 from web3.main import Web3
 
 from df_py.util import networkutil
+from df_py.util.addr_registry import nft_did
 from df_py.util.base18 import to_wei
 from df_py.util.constants import CONTRACTS, ZERO_ADDRESS
 from df_py.util.contract_base import ContractBase
@@ -420,11 +421,8 @@ def to_32byte_hex(val: int) -> str:
 
 @enforce_types
 def calc_did(nft_addr: str, chainID: int) -> str:
-    nft_addr2 = Web3.to_checksum_address(nft_addr)
-
-    # adapted from ocean.py/ocean_lib/ocean/ocean_assets.py
-    did = f"did:op:{create_checksum(nft_addr2 + str(chainID))}"
-    return did
+    # memoized, per (address, chain), by the process-wide address registry
+    return nft_did(nft_addr, chainID)
 
 
 # from ocean.py/ocean_lib/utils/utilities.py
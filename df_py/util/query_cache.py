@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from enforce_typing import enforce_types
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+
+@enforce_types
+def normalize_query(query: str) -> str:
+    """Collapse all whitespace, so formatting doesn't change the cache key"""
+    return " ".join(query.split())
+
+
+@enforce_types
+def query_key(query: str, chainID: int) -> str:
+    """Content address of a (chainID, query) pair"""
+    s = f"{chainID}:{normalize_query(query)}"
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """
+    On-disk cache of subgraph responses, in a single SQLite file.
+
+    Entries are keyed by query_key(). When the total size of stored responses
+    exceeds max_bytes, the least recently used entries are evicted.
+
+    It's up to the caller to only put responses that can never change.
+    """
+
+    @enforce_types
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "  key TEXT PRIMARY KEY,"
+                "  chain_id INTEGER NOT NULL,"
+                "  response TEXT NOT NULL,"
+                "  size INTEGER NOT NULL,"
+                "  last_access REAL NOT NULL"
+                ")"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access "
+                "ON responses (last_access)"
+            )
+
+    @enforce_types
+    def get(self, query: str, chainID: int) -> Optional[dict]:
+        """Return the cached response, or None if it's not cached"""
+        key = query_key(query, chainID)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return json.loads(row[0])
+
+    @enforce_types
+    def put(self, query: str, chainID: int, response: dict):
+        """Store the response, then evict LRU entries if over max_bytes"""
+        key = query_key(query, chainID)
+        response_s = json.dumps(response)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, chainID, response_s, len(response_s), time.time()),
+            )
+            self._evict()
+
+    def size(self) -> int:
+        """Total size of stored responses, in bytes"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return int(row[0])
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return int(row[0])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes.
+        Caller must hold the lock."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        evict_keys = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evict_keys.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evict_keys)
@@ -0,0 +1,134 @@
+"""
+Batched JSON-RPC calls.
+
+Many independent reads (block headers, token symbols, veOCEAN balances)
+go out as JSON-RPC batches, ie many calls per HTTP request, rather than
+one HTTP request per call. Each call's result or error is unpacked on
+its own, so one failed call doesn't fail the others.
+
+Providers that can't batch get sent the calls one at a time.
+
+Calls go straight to the provider, bypassing web3's middleware and result
+formatters, eg signing or POA extraData handling. So only read-only
+methods whose raw results callers decode themselves may be batched; see
+BATCHABLE_METHODS.
+"""
+
+from typing import Any, List, Tuple, Union
+
+from enforce_typing import enforce_types
+from eth_utils.abi import collapse_if_tuple
+from hexbytes import HexBytes
+from web3.contract.contract import ContractFunction
+
+from df_py.util.constants import MAX_RPC_BATCH_SIZE
+from df_py.util.http_provider import CustomHTTPProvider
+
+# read-only methods that are safe to send without web3's middleware
+BATCHABLE_METHODS = ("eth_call", "eth_getBlockByNumber")
+
+
+class RPCError(ValueError):
+    """The error that one RPC call of a batch failed with"""
+
+    def __init__(self, method: str, error: Any):
+        super().__init__(f"{method} failed: {error}")
+        self.method = method
+        self.error = error
+
+
+@enforce_types
+def batch_requests(
+    web3, calls: List[Tuple[str, Any]], max_batch_size: int = MAX_RPC_BATCH_SIZE
+) -> List[Any]:
+    """
+    @description
+      Make many RPC calls, in JSON-RPC batches of up to max_batch_size calls.
+      Calls bypass web3's middleware, so results are raw, eg hex strings.
+
+    @arguments
+      web3 -- web3 instance
+      calls -- list of (method, params). Methods must be in BATCHABLE_METHODS
+      max_batch_size -- max # calls per batch
+
+    @return
+      results -- list with one entry per call, in order: the call's result,
+        or an RPCError if the call failed. It's up to the caller to raise it.
+    """
+    if not calls:
+        return []
+
+    for method, _ in calls:
+        assert method in BATCHABLE_METHODS, f"can't batch {method} calls"
+
+    provider = web3.provider
+    if isinstance(provider, CustomHTTPProvider):
+        responses = provider.make_batch_request(calls, max_batch_size)
+    else:
+        responses = [provider.make_request(method, params) for method, params in calls]
+
+    return [
+        RPCError(method, response["error"])
+        if "error" in response
+        else response["result"]
+        for (method, _), response in zip(calls, responses)
+    ]
+
+
+@enforce_types
+def batch_contract_calls(
+    fns: List[ContractFunction],
+    block_identifier: Union[int, str] = "latest",
+    max_batch_size: int = MAX_RPC_BATCH_SIZE,
+) -> List[Any]:
+    """
+    @description
+      Call many view functions of contracts, as batched eth_call's.
+      Eg fns = [token.functions.symbol() for token in tokens]
+      Like fn.call(), but without web3's middleware or ccip-read support.
+
+    @arguments
+      fns -- contract functions with their args, all on the same chain
+      block_identifier -- block to call at: number, or eg "latest"
+      max_batch_size -- max # calls per batch
+
+    @return
+      values -- list with one entry per fn, in order: its decoded return
+        value (a tuple if it returns many), or an RPCError if it failed
+    """
+    if not fns:
+        return []
+
+    web3 = fns[0].w3
+    if isinstance(block_identifier, int):
+        block_identifier = hex(block_identifier)
+    calls = [
+        ("eth_call", [{"to": fn.address, "data": _encode_call(fn)}, block_identifier])
+        for fn in fns
+    ]
+    results = batch_requests(web3, calls, max_batch_size)
+
+    values: List[Any] = []
+    for fn, result in zip(fns, results):
+        if isinstance(result, RPCError):
+            values.append(result)
+            continue
+        output_types = [collapse_if_tuple(dict(out)) for out in fn.abi["outputs"]]
+        decoded = web3.codec.decode(output_types, HexBytes(result))
+        values.append(decoded[0] if len(decoded) == 1 else tuple(decoded))
+    return values
+
+
+def _encode_call(fn: ContractFunction) -> str:
+    """Return the calldata of a contract function with its args"""
+    contract = fn.w3.eth.contract(abi=fn.contract_abi)
+    return contract.encode_abi(fn_name=fn.fn_name, args=fn.args, kwargs=fn.kwargs)
+
+
+@enforce_types
+def raise_errors(results: List[Any]) -> List[Any]:
+    """Raise the first RPCError in results, if any. Otherwise return results."""
+    for result in results:
+        if isinstance(result, RPCError):
+            raise result
+    return results
@@ -0,0 +1,145 @@
+"""
+Storage backends for the tables that dftool saves & loads (allocations,
+vebals, nftvols, rewards, predictoor data, ..).
+
+Two formats:
+- "csv" (default) -- plain csv files, one row per line
+- "parquet" -- Apache Parquet files: typed columns, zstd-compressed
+
+Either way, loading parses whole columns at once into an Arrow table.
+
+The format is chosen by envvar STORAGE_FORMAT, or the dftool flag
+--STORAGE_FORMAT. Saving uses the chosen format. Loading goes by the
+filename's extension, which the *_csv_filename() helpers set accordingly.
+"""
+
+import csv
+import os
+from typing import Dict, List, Tuple
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from enforce_typing import enforce_types
+
+STORAGE_FORMAT_ENVVAR = "STORAGE_FORMAT"
+CSV = "csv"
+PARQUET = "parquet"
+STORAGE_FORMATS = [CSV, PARQUET]
+
+PARQUET_COMPRESSION = "zstd"
+
+# list of (column_name, python_type), where python_type is int, float or str
+Schema = List[Tuple[str, type]]
+
+_ARROW_TYPES = {int: pa.int64(), float: pa.float64(), str: pa.string()}
+
+
+@enforce_types
+def storage_format() -> str:
+    """Returns the storage format that tables get saved in"""
+    fmt = os.getenv(STORAGE_FORMAT_ENVVAR, CSV).lower()
+    assert fmt in STORAGE_FORMATS, f"unknown {STORAGE_FORMAT_ENVVAR}={fmt}"
+    return fmt
+
+
+@enforce_types
+def set_storage_format(fmt: str):
+    """Set the storage format, for this process and its children"""
+    fmt = fmt.lower()
+    assert fmt in STORAGE_FORMATS, f"unknown storage format {fmt}"
+    os.environ[STORAGE_FORMAT_ENVVAR] = fmt
+
+
+@enforce_types
+def table_filename(csv_filename: str) -> str:
+    """
+    @description
+      Map a csv filename (or glob pattern) to the current storage format.
+      Eg "nftvols-1.csv" -> "nftvols-1.parquet" when saving as parquet.
+    """
+    if storage_format() == PARQUET and csv_filename.endswith(".csv"):
+        return csv_filename[: -len(".csv")] + ".parquet"
+    return csv_filename
+
+
+@enforce_types
+def save_table(filename: str, schema: Schema, rows: list):
+    """
+    @description
+      Save rows to a table file. The format follows the filename's extension.
+
+    @arguments
+      filename -- path of the file, ending in .csv or .parquet
+      schema -- list of (column_name, python_type)
+      rows -- list of rows; each row holds one value per column in schema
+    """
+    if filename.endswith(".parquet"):
+        _save_parquet(filename, schema, rows)
+    else:
+        _save_csv(filename, schema, rows)
+
+
+@enforce_types
+def load_table(filename: str, schema: Schema) -> Dict[str, list]:
+    """
+    @description
+      Load a table file saved by save_table(), and check its columns.
+
+    @return
+      table -- dict of [column_name] : list of values, typed as in schema
+    """
+    return load_arrow_table(filename, schema).to_pydict()
+
+
+@enforce_types
+def load_arrow_table(filename: str, schema: Schema) -> pa.Table:
+    """
+    @description
+      Like load_table(), but return the columns as a pyarrow Table, for
+      callers that process whole columns at once.
+    """
+    if filename.endswith(".parquet"):
+        table = pq.read_table(filename)
+    else:
+        convert_options = pa_csv.ConvertOptions(column_types=_arrow_schema(schema))
+        table = pa_csv.read_csv(filename, convert_options=convert_options)
+    assert table.column_names == [name for name, _ in schema], table.column_names
+    return table.cast(_arrow_schema(schema))
+
+
+@enforce_types
+def convert_csv_table(csv_filename: str, filename: str, schema: Schema):
+    """
+    @description
+      Turn a csv table file into a table file in the format of filename's
+      extension, converting whole columns at once. The csv file is removed.
+      Handy for tables that get written incrementally as csv.
+    """
+    if filename.endswith(".parquet"):
+        table = load_arrow_table(csv_filename, schema)
+        pq.write_table(table, filename, compression=PARQUET_COMPRESSION)
+        os.remove(csv_filename)
+    else:
+        os.replace(csv_filename, filename)
+
+
+def _save_csv(filename: str, schema: Schema, rows: list):
+    with open(filename, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in schema])
+        writer.writerows(rows)
+
+
+def _save_parquet(filename: str, schema: Schema, rows: list):
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = [
+        pa.array([type_(value) for value in column], type=_ARROW_TYPES[type_])
+        for (_, type_), column in zip(schema, columns)
+    ]
+    table = pa.Table.from_arrays(arrays, schema=_arrow_schema(schema))
+    pq.write_table(table, filename, compression=PARQUET_COMPRESSION)
+
+
+def _arrow_schema(schema: Schema) -> pa.Schema:
+    return pa.schema([(name, _ARROW_TYPES[type_]) for name, type_ in schema])
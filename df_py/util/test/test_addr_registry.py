@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from df_py.util.addr_registry import (
+    AddressRegistry,
+    addr_id,
+    checksum_addr,
+    get_addr_registry,
+    lower_addr,
+    nft_did,
+)
+from df_py.util.oceanutil import calc_did
+
+ADDR = "0x773fb648F7B93f12a67A9A7D6030993B59D5Bfe7"
+DID = "did:op:8e31f8f00e66b5ed8d96fe708909112e923b40950e3a01be3ffa0b6e6721fda6"
+
+
+def test_ids():
+    registry = AddressRegistry()
+    id1 = registry.addr_id(ADDR)
+    assert registry.addr_id(ADDR.lower()) == id1
+    assert registry.addr_id(ADDR.upper().replace("0X", "0x")) == id1
+    assert registry.addr_id("0x" + "1" * 40) == id1 + 1
+    assert registry.addr(id1) == ADDR.lower()
+    assert len(registry) == 2
+
+    registry.clear()
+    assert len(registry) == 0
+
+
+def test_forms():
+    registry = AddressRegistry()
+    assert registry.lower(ADDR) == ADDR.lower()
+    assert registry.checksum(ADDR.lower()) == ADDR
+    assert registry.did(ADDR.lower(), 4) == DID
+    assert registry.did(ADDR, 4) == DID
+    assert registry.did(ADDR, 5) != DID
+
+
+def test_memoized():
+    registry = AddressRegistry()
+    with patch("web3.main.Web3.to_checksum_address") as mock:
+        mock.side_effect = lambda value: value.upper()
+        for _ in range(3):
+            registry.checksum(ADDR)
+            registry.checksum(ADDR.lower())
+            registry.did(ADDR, 4)
+        assert mock.call_count == 1
+
+
+def test_module_functions():
+    get_addr_registry().clear()
+    assert lower_addr(ADDR) == ADDR.lower()
+    assert checksum_addr(ADDR) == ADDR
+    assert nft_did(ADDR, 4) == calc_did(ADDR, 4) == DID
+    assert addr_id(ADDR) == addr_id(ADDR.lower())
@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+from df_py.util.block_timestamps import (
+    BlockTimestamps,
+    clear_block_timestamps,
+    get_block_timestamps,
+)
+from df_py.util.networkutil import DEV_CHAINID
+
+CHAINID = 137
+
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    clear_block_timestamps()
+    yield
+    clear_block_timestamps()
+
+
+def test_block_timestamps():
+    index = BlockTimestamps()
+    assert index.bracket(10) == (None, None)
+
+    index.add(20, 200)
+    index.add(0, 0)
+    index.add(10, 100)
+    index.add(10, 100)
+    assert len(index) == 3
+    assert index.get(10) == 100
+    assert index.get(11) is None
+
+    assert index.bracket(-1) == (None, (0, 0))
+    assert index.bracket(100) == ((10, 100), (20, 200))
+    assert index.bracket(150.5) == ((10, 100), (20, 200))
+    assert index.bracket(200) == ((20, 200), None)
+
+    # recent blocks may still get reorged
+    index.add(30, int(time.time()))
+    assert index.get(30) is None
+
+
+def test_block_at():
+    index = BlockTimestamps()
+    index.add(10, 100)
+    index.add(12, 104)
+    assert index.block_at(101) is None  # block 11 isn't indexed
+
+    index.add(11, 102)
+    assert index.block_at(101) == 10
+    assert index.block_at(102) == 11
+    assert index.block_at(103.5) == 11
+    assert index.block_at(104) is None  # block 13 isn't indexed
+    assert index.block_at(99) is None
+
+
+def test_persisted(tmp_path):
+    path = str(tmp_path / "sub" / "block_index-137.csv")
+    index = BlockTimestamps(path)
+    index.add(20, 200)
+    index.add(10, 100)
+    index.add(10, 100)
+
+    with open(path, "a") as f:
+        f.write("30,")  # torn write of a killed process
+
+    loaded = BlockTimestamps(path)
+    assert len(loaded) == 2
+    assert loaded.bracket(150) == ((10, 100), (20, 200))
+
+    # grows incrementally
+    loaded.add(15, 150)
+    assert len(BlockTimestamps(path)) == 3
+
+
+def test_get_block_timestamps(tmp_path, monkeypatch):
+    monkeypatch.delenv("BLOCK_INDEX_DIR", raising=False)
+    index = get_block_timestamps(CHAINID)
+    assert index.path is None
+    assert get_block_timestamps(CHAINID) is index
+
+    monkeypatch.setenv("BLOCK_INDEX_DIR", str(tmp_path))
+    index = get_block_timestamps(CHAINID)
+    assert index.path == os.path.join(str(tmp_path), "block_index-137.csv")
+    index.add(10, 100)
+
+    clear_block_timestamps()
+    assert get_block_timestamps(CHAINID).get(10) == 100
+
+    # local chains get reset, so they aren't persisted
+    assert get_block_timestamps(DEV_CHAINID).path is None
@@ -0,0 +1,327 @@
+import random
+import time
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+from enforce_typing import enforce_types
+from web3.exceptions import BlockNotFound
+from web3.main import Web3
+
+from df_py.util.block_timestamps import clear_block_timestamps, get_block_timestamps
+from df_py.util.http_provider import CustomHTTPProvider
+from df_py.util.blocktime import (
+    eth_calc_block_number,
+    eth_find_closest_block,
+    timestamp_to_block,
+    timestamp_to_future_block,
+    timestr_to_block,
+)
+
+CHAINID = 137
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_block_timestamps()
+    yield
+    clear_block_timestamps()
+
+
+def _fake_web3(timestamps, chain_id=CHAINID):
+    """Mock web3 over a list of block timestamps"""
+
+    def get_block(block):
+        if block == "latest":
+            block = len(timestamps) - 1
+        if block >= len(timestamps):
+            raise BlockNotFound(f"Block with id: '{block}' not found.")
+        return Mock(number=block, timestamp=timestamps[block])
+
+    def make_request(method, params):
+        assert method == "eth_getBlockByNumber"
+        block = int(params[0], 16)
+        result = None
+        if block < len(timestamps):
+            result = {"number": params[0], "timestamp": hex(timestamps[block])}
+        return {"jsonrpc": "2.0", "id": 0, "result": result}
+
+    web3 = Mock(spec=Web3)
+    web3.eth = Mock()
+    web3.eth.chain_id = chain_id
+    web3.eth.get_block.side_effect = get_block
+    web3.provider = Mock()
+    web3.provider.make_request.side_effect = make_request
+    return web3
+
+
+def _fake_batching_web3(timestamps, chain_id=CHAINID):
+    """Like _fake_web3(), with a provider that takes batches of RPC calls"""
+    web3 = _fake_web3(timestamps, chain_id)
+    make_request = web3.provider.make_request.side_effect
+    web3.provider = Mock(spec=CustomHTTPProvider)
+    web3.provider.make_batch_request.side_effect = lambda calls, _: [
+        make_request(method, params) for method, params in calls
+    ]
+    return web3
+
+
+def _chain_timestamps(n_blocks, seed=0):
+    # 2s blocks, some missed slots, plus stretches of slower blocks
+    rng = random.Random(seed)
+    timestamps, ts = [], 1_600_000_000
+    for block in range(n_blocks):
+        slow = (block // 50_000) % 4 == 3
+        ts += (3 if slow else 2) * (2 if rng.random() < 0.05 else 1)
+        timestamps.append(ts)
+    return timestamps
+
+
+def _last_block_at_or_before(timestamps, timestamp):
+    return max(b for b, ts in enumerate(timestamps) if ts <= timestamp)
+
+
+@enforce_types
+def test_timestamp_to_block_exact():
+    timestamps = _chain_timestamps(300_000)
+    chain = _fake_web3(timestamps)
+    rng = random.Random(1)
+    for _ in range(20):
+        target = rng.randint(timestamps[0], timestamps[-1] - 1)
+        expected = _last_block_at_or_before(timestamps, target)
+        assert timestamp_to_block(chain, target) == expected
+
+    # block timestamps themselves, and in-between timestamps
+    for block in [1, 1234, 150_000, 299_998]:
+        assert timestamp_to_block(chain, timestamps[block]) == block
+        target = timestamps[block] + 0.5
+        expected = _last_block_at_or_before(timestamps, target)
+        assert timestamp_to_block(chain, target) == expected
+
+
+@enforce_types
+def test_timestamp_to_block_few_calls():
+    timestamps = _chain_timestamps(2_000_000)
+    chain = _fake_web3(timestamps)
+    rng = random.Random(2)
+
+    n_calls = []
+    for _ in range(20):
+        target = rng.randint(timestamps[0], timestamps[-1] - 1)
+        chain.eth.get_block.reset_mock()
+        timestamp_to_block(chain, target)
+        n_calls.append(chain.eth.get_block.call_count)
+
+    # vs ~25 calls for bisection over 2M blocks
+    assert max(n_calls) <= 12
+    assert sorted(n_calls)[len(n_calls) // 2] <= 7
+
+    # a nearby timestamp is bracketed by cached blocks
+    chain.eth.get_block.reset_mock()
+    timestamp_to_block(chain, target + 60)
+    assert chain.eth.get_block.call_count <= 5
+
+
+@enforce_types
+def test_timestamp_to_block_same_timestamps():
+    # many blocks in one second, like on ganache
+    timestamps = [100] * 1000 + [101] * 5000 + [105] * 3000
+    chain = _fake_web3(timestamps)
+    assert timestamp_to_block(chain, 100) == 999
+    assert timestamp_to_block(chain, 103) == 5999
+    assert timestamp_to_block(chain, 104.9) == 5999
+
+
+@enforce_types
+def test_timestamp_to_block_corner_cases():
+    timestamps = [100 + 2 * b for b in range(1000)]
+
+    chain = _fake_web3(timestamps)
+    assert timestamp_to_block(chain, 100_000) == 999  # everything's in the future
+
+    with pytest.raises(ValueError):  # everything's in the past
+        timestamp_to_block(_fake_web3(timestamps), 50)
+
+    chain = _fake_web3(timestamps, chain_id=8996)
+    assert timestamp_to_block(chain, 50) == 0
+
+
+@enforce_types
+def test_timestamp_to_block_validation():
+    timestamps = [100 + 2 * b for b in range(1000)]
+    timestamps[500:] = [ts + 100_000 for ts in timestamps[500:]]  # chain halt
+    chain = _fake_web3(timestamps)
+
+    with pytest.raises(ValueError) as err:
+        timestamp_to_block(chain, timestamps[499] + 16 * 60)
+
+    assert (
+        str(err.value)
+        == "timestamp_to_block() is returning a block that is too far away"
+    )
+
+
+@enforce_types
+def test_timestamp_to_block_validation_indexed(tmp_path, monkeypatch):
+    # chain halted after block 19. Once blocks 19 & 20 are indexed, the
+    # index brackets the target, but the answer still gets validated
+    monkeypatch.setenv("BLOCK_INDEX_DIR", str(tmp_path))
+    timestamps = [100 + 2 * b for b in range(20)] + [100000, 100002, 100004]
+    chain = _fake_web3(timestamps)
+    target = timestamps[19] + 16 * 60
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="too far away"):
+            timestamp_to_block(chain, target)
+    assert get_block_timestamps(CHAINID).block_at(target) == 19
+
+    # the same in a later run, with the index loaded from disk
+    clear_block_timestamps()
+    assert get_block_timestamps(CHAINID).block_at(target) == 19
+    with pytest.raises(ValueError, match="too far away"):
+        timestamp_to_block(chain, target)
+
+    # blocks near the target are still served from the index
+    chain.eth.get_block.reset_mock()
+    assert timestamp_to_block(chain, timestamps[19] + 1) == 19
+    assert chain.eth.get_block.call_count == 0
+
+
+@enforce_types
+def test_timestamp_to_block_rpc_error():
+    # errors propagate, rather than being taken as timestamp 0
+    chain = _fake_web3([100 + 2 * b for b in range(1000)])
+    chain.eth.get_block.side_effect = [
+        Mock(number=999, timestamp=2098),
+        ConnectionError("Random error occurred!"),
+    ]
+    with pytest.raises(ConnectionError):
+        timestamp_to_block(chain, 1000)
+
+
+@enforce_types
+def test_timestamp_to_block_index():
+    # blocks of the last 15 minutes, every 2s
+    now = int(time.time())
+    timestamps = [now - 900 + 2 * b for b in range(450)]
+    timestamps = [ts - 100_000 for ts in timestamps[:150]] + timestamps[150:]
+    chain = _fake_web3(timestamps)
+
+    target = timestamps[50] + 1
+    assert timestamp_to_block(chain, target) == 50
+
+    # looked-up blocks got indexed, unless they're too recent to be final
+    index = get_block_timestamps(CHAINID)
+    assert index.get(0) == timestamps[0]
+    assert index.get(50) == timestamps[50]
+    assert index.get(51) == timestamps[51]
+    assert index.get(449) is None
+
+    # so it's answered without RPC calls now
+    chain.eth.get_block.reset_mock()
+    assert timestamp_to_block(chain, target) == 50
+    assert timestamp_to_block(chain, timestamps[50]) == 50
+    assert chain.eth.get_block.call_count == 0
+
+
+@enforce_types
+def test_timestr_to_block_eth_index():
+    # 12s blocks, with some missed slots
+    timestamps = [1_600_000_000 + 12 * b for b in range(10_000)]
+    timestamps[6000:] = [ts + 36 for ts in timestamps[6000:]]
+    chain = _fake_web3(timestamps, chain_id=1)
+
+    timestr = datetime.utcfromtimestamp(timestamps[7000] + 5).strftime(
+        "%Y-%m-%d_%H:%M:%S"
+    )
+    assert timestr_to_block(chain, timestr) == 7000
+
+    chain.eth.get_block.reset_mock()
+    assert timestr_to_block(chain, timestr) == 7000
+    assert chain.eth.get_block.call_count == 0
+
+    # closest block, rather than the last one at or before
+    timestr = datetime.utcfromtimestamp(timestamps[7000] + 7).strftime(
+        "%Y-%m-%d_%H:%M:%S"
+    )
+    assert timestr_to_block(chain, timestr) == 7001
+
+
+@enforce_types
+def test_timestamp_to_future_block():
+    timestamps = [1_600_000_000 + 2 * b for b in range(100_000)]
+    chain = _fake_web3(timestamps)
+    target = timestamps[-1] + 200
+    assert timestamp_to_future_block(chain, target) == 100_099
+
+    # the old block, 40,000 blocks back, got indexed
+    chain.eth.get_block.reset_mock()
+    assert timestamp_to_future_block(chain, target) == 100_099
+    assert chain.eth.get_block.call_count == 1
+
+    # once the target's past and in the index, that's the answer
+    timestamps += [timestamps[-1] + 3 * b for b in range(1, 1000)]
+    assert timestamp_to_block(chain, target) == 100_065
+    chain.eth.get_block.reset_mock()
+    assert timestamp_to_future_block(chain, target) == 100_065
+    assert chain.eth.get_block.call_count == 0
+
+
+def _eth_timestamps(n_blocks, seed=0):
+    # 12s slots, some of them missed
+    rng = random.Random(seed)
+    timestamps, ts = [], 1_600_000_000
+    for _ in range(n_blocks):
+        ts += 12 * (rng.choice([2, 3]) if rng.random() < 0.02 else 1)
+        timestamps.append(ts)
+    return timestamps
+
+
+def _closest_block(timestamps, timestamp):
+    return min(range(len(timestamps)), key=lambda b: abs(timestamps[b] - timestamp))
+
+
+@enforce_types
+@pytest.mark.parametrize("batching", [False, True])
+def test_eth_find_closest_block(batching):
+    timestamps = _eth_timestamps(200_000)
+    fake_web3 = _fake_batching_web3 if batching else _fake_web3
+    rng = random.Random(3)
+
+    for offset in [0, 1, -1, 7, -300, 5000, -40_000]:
+        clear_block_timestamps()
+        web3 = fake_web3(timestamps)
+        target = rng.randint(timestamps[50_000], timestamps[150_000])
+        expected = _closest_block(timestamps, target)
+        assert eth_find_closest_block(web3, expected + offset, target) == expected
+
+        if batching:
+            n_round_trips = web3.provider.make_batch_request.call_count
+            assert n_round_trips <= 2 + max(abs(offset), 1).bit_length() // 4
+
+
+@enforce_types
+def test_eth_find_closest_block_edges():
+    timestamps = _eth_timestamps(1000)
+    web3 = _fake_batching_web3(timestamps)
+
+    # exact, and the closest of two blocks
+    assert eth_find_closest_block(web3, 500, timestamps[400]) == 400
+    assert eth_find_closest_block(web3, 500, timestamps[400] + 5) == 400
+    assert eth_find_closest_block(web3, 300, timestamps[400] - 5) == 400
+
+    # the chain's ends
+    assert eth_find_closest_block(web3, 990, timestamps[-1] + 1000) == 999
+    assert eth_find_closest_block(web3, 10, timestamps[0] - 1000) == 0
+
+
+@enforce_types
+def test_eth_calc_block_number():
+    # blocks took 13s rather than the average 12.06s
+    timestamps = [1_600_000_000 + 13 * b for b in range(100_000)]
+    web3 = _fake_web3(timestamps)
+    target = timestamps[20_000]
+
+    block = eth_calc_block_number(timestamps[-1], 99_999, target, web3)
+    assert abs(timestamps[block] - target) <= 60
+    assert web3.eth.get_block.call_count <= 3
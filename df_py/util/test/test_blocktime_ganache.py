@@ -7,6 +7,7 @@ import pytest
 from enforce_typing import enforce_types
 from pytest import approx
 
+from df_py.util.block_timestamps import clear_block_timestamps
 from df_py.util.blockrange import create_range
 from df_py.util.blocktime import (
     get_block_number_thursday,
@@ -15,7 +16,6 @@ from df_py.util.blocktime import (
     timestamp_to_block,
     timestr_to_block,
     timestr_to_timestamp,
-    BlockTimestampComparer,
 )
 
 
@@ -46,14 +46,16 @@ def test_timestamp_to_block_far_right(w3):
 
 @enforce_types
 def test_error_handling(w3):
-    def error_get_block(number):
-        raise Exception("Random error occurred!")
+    latest = w3.eth.get_block("latest")
+    target_ts = latest.timestamp - 1
 
-    w3.eth.get_block = error_get_block
-    comparer = BlockTimestampComparer(100, w3)  # target ts is 100
-    value = comparer.time_since_timestamp(0)
-    # returns -(target timestamp) on error
-    assert value == -100
+    # RPC errors propagate, rather than being taken as timestamp 0
+    with patch.object(w3.eth, "get_block") as mock_get_block:
+        mock_get_block.side_effect = [latest, Exception("Random error occurred!")]
+        with pytest.raises(Exception) as err:
+            timestamp_to_block(w3, target_ts)
+
+    assert str(err.value) == "Random error occurred!"
 
 
 @enforce_types
@@ -120,17 +122,21 @@ def test_timestamp_to_block(w3):
 
 
 @enforce_types
-@patch("df_py.util.blocktime.optimize.bisect")
-def test_timestamp_to_block_validation(mock_time_since):
-    mock_time_since.return_value = (1, None)
-    target_ts = 100 + 16 * 60
+def test_timestamp_to_block_validation():
+    # blocks 0-19 every 2s from ts=100, then the chain halted till block 20
+    timestamps = [100 + 2 * b for b in range(20)] + [100000]
+    target_ts = timestamps[19] + 16 * 60
+
     web3 = Mock()
-    block_mock_1 = Mock(number=20, timestamp=100)
-    block_mock_2 = Mock(number=20, timestamp=100000)
-    web3.eth.get_block.side_effect = [block_mock_1, block_mock_2] * 4
+    web3.eth.chain_id = 1234567
+    web3.eth.get_block.side_effect = lambda block: Mock(
+        number=20 if block == "latest" else block,
+        timestamp=timestamps[-1 if block == "latest" else block],
+    )
 
     with pytest.raises(ValueError) as err:
         timestamp_to_block(web3, target_ts)
+    clear_block_timestamps()
 
     assert (
         str(err.value)
@@ -13,13 +13,18 @@ from df_py.predictoor.csvs import (
     load_predictoor_rewards_csv,
     predictoor_data_csv_filename,
     predictoor_rewards_csv_filename,
+    predictoor_summary_csv_filename,
     sample_predictoor_data_csv,
     sample_predictoor_rewards_csv,
 )
 from df_py.predictoor.models import PredictContract
-from df_py.predictoor.predictoor_testutil import create_mock_responses
+from df_py.predictoor.predictoor_testutil import (
+    create_fake_prediction_records,
+    create_fake_subgraph,
+)
 from df_py.util import dftool_module, networkutil, oceantestutil, oceanutil
 from df_py.util.base18 import from_wei, to_wei
+from df_py.util.blocktime import timestr_to_timestamp
 from df_py.util.contract_base import ContractBase
 from df_py.util.dftool_module import do_predictoor_data
 from df_py.volume import csvs
@@ -144,28 +149,34 @@ def test_predictoor_data(tmp_path):
             "--RETRIES=1",
         ]
 
-        mock_query_response, users, stats = create_mock_responses(100)
+        st_ts = int(timestr_to_timestamp("2023-10-01"))
+        end_ts = int(timestr_to_timestamp("2023-10-07"))
+        records = create_fake_prediction_records(1000, st_ts + 1, end_ts)
 
         with sysargs_context(sys_argv):
-            with patch("df_py.predictoor.queries.submit_query") as mock_submit_query:
-                mock_submit_query.side_effect = mock_query_response
+            with patch("df_py.util.graphutil.submit_query") as mock_submit_query:
+                mock_submit_query.side_effect = create_fake_subgraph(records)
                 do_predictoor_data()
 
         # test result
         predictoor_data_csv = predictoor_data_csv_filename(csv_dir)
         assert os.path.exists(predictoor_data_csv)
+        assert os.path.exists(predictoor_summary_csv_filename(csv_dir))
 
         predictoors = load_predictoor_data_csv(csv_dir)
+        users = {record["user"]["id"] for record in records}
+        assert set(predictoors) == users
         for user in users:
-            if stats[user]["total"] == 0:
-                assert user not in predictoors
-                continue
-            user_total = stats[user]["total"]
-            user_correct = stats[user]["correct"]
-            user_revenue = stats[user]["revenue"]
+            user_records = [r for r in records if r["user"]["id"] == user]
+            payouts = [float(r["payout"]["payout"]) for r in user_records]
+            stakes = [float(r["stake"]) for r in user_records]
+            user_total = len(user_records)
+            user_correct = len([payout for payout in payouts if payout > 0])
             assert predictoors[user].prediction_count == user_total
             assert predictoors[user].correct_prediction_count == user_correct
-            assert predictoors[user].revenue == user_revenue
+            assert predictoors[user].revenue == pytest.approx(
+                sum(payouts) - sum(stakes)
+            )
             assert predictoors[user].accuracy == user_correct / user_total
 
 
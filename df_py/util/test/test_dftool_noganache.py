@@ -1,5 +1,6 @@
 import os
 import subprocess
+import sys
 from typing import List
 from unittest.mock import patch
 
@@ -98,3 +99,17 @@ def test_functions_exist():
             # patch can only overwrite existing functions
             # so that ensures the function exists
             pass
+
+
+@enforce_types
+def test_storage_format_flag(monkeypatch):
+    monkeypatch.setenv("STORAGE_FORMAT", "csv")
+    sys_argv = ["dftool", "calc", "volume", "--STORAGE_FORMAT", "parquet", "/tmp"]
+    with sysargs_context(sys_argv):
+        dftool_module._set_storage_format_from_argv()
+        assert sys.argv == ["dftool", "calc", "volume", "/tmp"]
+    assert os.environ["STORAGE_FORMAT"] == "parquet"
+
+    with sysargs_context(["dftool", "calc", "--STORAGE_FORMAT", "xlsx"]):
+        with pytest.raises(SystemExit):
+            dftool_module._set_storage_format_from_argv()
@@ -0,0 +1,145 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from df_py.util import graphql_client
+
+
+def _run(coro):
+    loop = graphql_client._get_loop()
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+@pytest.fixture(name="subgraph")
+def subgraph_fixture():
+    """Local fake subgraph. Tracks max # concurrent requests"""
+    stats = {"in_flight": 0, "max_in_flight": 0, "n": 0, "encodings": set()}
+
+    async def handle(request):
+        body = await request.json()
+        stats["n"] += 1
+        stats["encodings"].add(request.headers.get("Accept-Encoding", ""))
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        await asyncio.sleep(0.05)
+        stats["in_flight"] -= 1
+        if body["query"] == "fail":
+            return web.Response(status=500)
+        response = web.json_response({"data": {"query": body["query"]}})
+        response.enable_compression()
+        return response
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def start():
+        app = web.Application()
+        app.router.add_post("/", handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+    async def stop():
+        # drop the clients & pooled sessions of this subgraph, so that they
+        # don't leak into later tests
+        for url in [url for url in graphql_client._CLIENTS if url.startswith(base)]:
+            del graphql_client._CLIENTS[url]
+        for key in [key for key in graphql_client._SESSIONS if key[0] == host]:
+            await graphql_client._SESSIONS.pop(key).close()
+        await runner.cleanup()
+
+    host = f"127.0.0.1:{port}"
+    base = f"http://{host}/"
+    runner = _run(start())
+    yield base, stats
+    _run(stop())
+
+
+def test_submit_query_sync(subgraph):
+    url, stats = subgraph
+    result = graphql_client.submit_query_sync(url, "{ nfts { id } }")
+    assert result == {"data": {"query": "{ nfts { id } }"}}
+    assert "gzip" in stats["encodings"].pop()
+
+
+def test_submit_query_failure(subgraph):
+    url, _ = subgraph
+    with pytest.raises(Exception, match="Query failed. Return code is 500"):
+        graphql_client.submit_query_sync(url, "fail")
+
+
+def test_submit_query_async(subgraph):
+    url, _ = subgraph
+
+    async def main():
+        return await asyncio.gather(
+            *[graphql_client.submit_query_async(url, str(i)) for i in range(5)]
+        )
+
+    results = asyncio.run(main())
+    assert [r["data"]["query"] for r in results] == [str(i) for i in range(5)]
+
+
+def test_max_in_flight(subgraph):
+    url, stats = subgraph
+
+    async def make_client():
+        graphql_client._CLIENTS[url] = graphql_client.AsyncGraphQLClient(
+            url, max_in_flight=2, rate=1000.0, burst=1000
+        )
+
+    _run(make_client())
+
+    threads = [
+        threading.Thread(target=graphql_client.submit_query_sync, args=(url, str(i)))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stats["n"] == 8
+    assert stats["max_in_flight"] == 2
+
+
+def test_max_in_flight_per_client(subgraph):
+    # two subgraph urls on the same host, with different limits
+    url, stats = subgraph
+    url2 = url + "?subgraph=2"
+
+    async def make_clients():
+        for _url, max_in_flight in [(url, 2), (url2, 6)]:
+            graphql_client._CLIENTS[_url] = graphql_client.AsyncGraphQLClient(
+                _url, max_in_flight=max_in_flight, rate=1000.0, burst=1000
+            )
+
+    _run(make_clients())
+    graphql_client.submit_query_sync(url, "first")  # pools for a limit of 2
+
+    async def main():
+        return await asyncio.gather(
+            *[graphql_client.submit_query_async(url2, str(i)) for i in range(6)]
+        )
+
+    stats["max_in_flight"] = 0
+    asyncio.run(main())
+    assert stats["max_in_flight"] == 6
+
+
+def test_token_bucket():
+    async def main():
+        bucket = graphql_client.TokenBucket(rate=50.0, capacity=2)
+        t0 = time.monotonic()
+        for _ in range(7):
+            await bucket.acquire()
+        return time.monotonic() - t0
+
+    # first 2 are immediate, the next 5 are spaced by 1/50 s
+    assert asyncio.run(main()) >= 0.09
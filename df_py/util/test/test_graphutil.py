@@ -1,3 +1,5 @@
+import re
+import time
 from unittest.mock import patch
 
 import pytest
@@ -43,3 +45,196 @@ def test_obsolete_chain_id():
         # obsolete chain id so nothing gets called
         graphutil.wait_to_latest_block(246, 4)
         assert mock.call_count == 0
+
+
+def test_build_paginated_query():
+    query = graphutil.build_paginated_query("nfts", "id symbol")
+    assert "nfts(" in query
+    assert "first: 1000" in query
+    assert "orderBy: id" in query
+    assert "skip" not in query
+    assert "id_gt" not in query
+    assert "block:" not in query
+
+    query = graphutil.build_paginated_query(
+        "orders", "id", where="block_gte: 1", block=5, last_id="0xab", chunk_size=2
+    )
+    assert "first: 2" in query
+    assert 'where: {id_gt: "0xab", block_gte: 1}' in query
+    assert "block: {number: 5}" in query
+
+
+def test_paginate_query():
+    pages = [
+        {"data": {"nfts": [{"id": "0x1"}, {"id": "0x2"}]}},
+        {"data": {"nfts": [{"id": "0x3"}]}},
+        {"data": {"nfts": []}},
+    ]
+    with patch("df_py.util.graphutil.submit_query") as submit_query_mock:
+        submit_query_mock.side_effect = pages
+
+        result = list(graphutil.paginate_query("nfts", "id", 8996, chunk_size=2))
+
+        assert result == [[{"id": "0x1"}, {"id": "0x2"}], [{"id": "0x3"}]]
+        queries = [call.args[0] for call in submit_query_mock.call_args_list]
+        assert "id_gt" not in queries[0]
+        assert 'id_gt: "0x2"' in queries[1]
+        assert 'id_gt: "0x3"' in queries[2]
+
+
+def test_paginate_query_error():
+    with patch("df_py.util.graphutil.submit_query") as submit_query_mock:
+        submit_query_mock.return_value = {
+            "errors": [{"message": "something went wrong"}]
+        }
+
+        with pytest.raises(AssertionError):
+            list(graphutil.paginate_query("nfts", "id", 8996))
+
+
+def test_map_concurrently():
+    def _slow_square(x):
+        time.sleep(0.01 * (5 - x))  # later items finish first
+        return x * x
+
+    items = list(range(5))
+    expected = [0, 1, 4, 9, 16]
+    assert list(graphutil.map_concurrently(_slow_square, items, 1)) == expected
+    assert list(graphutil.map_concurrently(_slow_square, items, 4)) == expected
+
+
+def test_pinned_block():
+    assert graphutil.pinned_block("{_meta { block { number } } }") is None
+    assert graphutil.pinned_block("{ nfts(block:{number:12}) { id } }") == 12
+    assert graphutil.pinned_block("{ nfts(block: {number: 12}) { id } }") == 12
+    query = "{ orders(where: {block_gte: 3, block_lte: 40}) { id } }"
+    assert graphutil.pinned_block(query) == 40
+    assert graphutil.pinned_block("{ orders(where: {block_gte: 3}) { id } }") is None
+
+
+def test_submit_query_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("QUERY_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(graphutil, "_SYNCED_HEADS", {})
+    chain_id = 137
+    result = {"data": {"nfts": [{"id": "0x1"}]}}
+
+    with patch.object(graphutil, "_post_query") as post_mock, patch.object(
+        graphutil, "get_last_block"
+    ) as get_last_block_mock:
+        post_mock.return_value = result
+        get_last_block_mock.return_value = 100
+
+        # pinned below the synced head: cached
+        query = "{ nfts(block: {number: 50}) { id } }"
+        assert graphutil.submit_query(query, chain_id) == result
+        assert graphutil.submit_query(query, chain_id) == result
+        assert post_mock.call_count == 1
+
+        # pinned at or above the synced head: not cached
+        query = "{ nfts(block: {number: 100}) { id } }"
+        graphutil.submit_query(query, chain_id)
+        graphutil.submit_query(query, chain_id)
+        assert post_mock.call_count == 3
+
+        # not pinned: not cached
+        query = "{ nfts { id } }"
+        graphutil.submit_query(query, chain_id)
+        graphutil.submit_query(query, chain_id)
+        assert post_mock.call_count == 5
+
+        # errors: not cached
+        post_mock.return_value = {"errors": [{"message": "something went wrong"}]}
+        query = "{ nfts(block: {number: 10}) { id } }"
+        graphutil.submit_query(query, chain_id)
+        graphutil.submit_query(query, chain_id)
+        assert post_mock.call_count == 7
+
+    assert len(graphutil.get_query_cache()) == 1
+
+
+def test_submit_query_no_cache(monkeypatch):
+    monkeypatch.delenv("QUERY_CACHE_DIR", raising=False)
+    assert graphutil.get_query_cache() is None
+
+    with patch.object(graphutil, "_post_query") as post_mock:
+        post_mock.return_value = {"data": {}}
+        query = "{ nfts(block: {number: 50}) { id } }"
+        graphutil.submit_query(query, 137)
+        graphutil.submit_query(query, 137)
+        assert post_mock.call_count == 2
+
+
+def test_build_multiblock_query():
+    query = graphutil.build_multiblock_query(
+        "veOCEANs", "id", {5: None, 7: "0xab"}, chunk_size=2
+    )
+    assert query.count("veOCEANs(") == 2
+    assert "b5: veOCEANs(first: 2" in query
+    assert "b7: veOCEANs(first: 2" in query
+    assert "block: {number: 5}" in query
+    assert 'where: {id_gt: "0xab"}, block: {number: 7}' in query
+
+
+def _fake_subgraph(n_records_at_block):
+    """Fake submit_query() for "nfts", for single- and multi-block queries.
+    At block b there are n_records_at_block(b) nfts."""
+    pattern = (
+        r"(?:b\d+: )?nfts\(first: (\d+), orderBy: id, orderDirection: asc, "
+        r'where: \{(?:id_gt: "(\w+)")?\}, block: \{number: (\d+)\}\)'
+    )
+
+    def _submit_query(query, chainID):  # pylint: disable=unused-argument
+        data = {}
+        for first, last_id, block in re.findall(pattern, query):
+            ids = [f"0x{i:04x}" for i in range(n_records_at_block(int(block)))]
+            ids = [id_ for id_ in ids if not last_id or id_ > last_id]
+            records = [{"id": id_, "block": block} for id_ in ids[: int(first)]]
+            key = f"b{block}" if query.startswith("{ b") else "nfts"
+            data[key] = records
+        return {"data": data}
+
+    return _submit_query
+
+
+def test_paginate_query_at_blocks():
+    blocks = list(range(100, 130))
+
+    def n_records_at_block(block):
+        return (block * 7) % 11  # 0 to 10
+
+    with patch("df_py.util.graphutil.submit_query") as submit_query_mock:
+        submit_query_mock.side_effect = _fake_subgraph(n_records_at_block)
+        expected = {
+            block: sum(
+                graphutil.paginate_query("nfts", "id", 8996, block=block, chunk_size=3),
+                [],
+            )
+            for block in blocks
+        }
+        n_queries_single = submit_query_mock.call_count
+
+        submit_query_mock.reset_mock()
+        result = graphutil.paginate_query_at_blocks(
+            "nfts", "id", 8996, blocks, chunk_size=3
+        )
+        n_queries_multi = submit_query_mock.call_count
+
+        result_concurrent = graphutil.paginate_query_at_blocks(
+            "nfts", "id", 8996, blocks, chunk_size=3, max_workers=4
+        )
+
+    assert result == expected
+    assert result_concurrent == expected
+    assert list(result.keys()) == blocks
+    assert n_queries_multi < n_queries_single / 2
+
+
+def test_next_n_blocks_per_query():
+    target = graphutil.TARGET_RECORDS_PER_QUERY
+    max_blocks = graphutil.MAX_BLOCKS_PER_QUERY
+
+    assert graphutil._next_n_blocks_per_query(1, 0) == 2
+    assert graphutil._next_n_blocks_per_query(1, target) == 1
+    assert graphutil._next_n_blocks_per_query(4, 2 * target) == 2
+    assert graphutil._next_n_blocks_per_query(1, 10 * target) == 1
+    assert graphutil._next_n_blocks_per_query(max_blocks, 1) == max_blocks
@@ -0,0 +1,61 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from df_py.util.http_provider import CustomHTTPProvider
+
+
+@patch("df_py.util.http_provider.make_post_request")
+def test_make_batch_request(mock_post):
+    def post(_, data, **__):
+        rpc_dicts = json.loads(data)
+        responses = [
+            {"jsonrpc": "2.0", "id": d["id"], "result": d["params"][0]}
+            for d in reversed(rpc_dicts)  # answer in another order
+        ]
+        return json.dumps(responses).encode("utf-8")
+
+    mock_post.side_effect = post
+    provider = CustomHTTPProvider("http://localhost:8545")
+    calls = [("eth_getBlockByNumber", [hex(block), False]) for block in range(5)]
+
+    responses = provider.make_batch_request(calls)
+
+    assert mock_post.call_count == 1
+    assert [response["result"] for response in responses] == [
+        hex(block) for block in range(5)
+    ]
+
+
+@patch("df_py.util.http_provider.make_post_request")
+def test_make_batch_request_max_batch_size(mock_post):
+    def post(_, data, **__):
+        responses = [
+            {"jsonrpc": "2.0", "id": d["id"], "result": d["params"][0]}
+            for d in json.loads(data)
+        ]
+        return json.dumps(responses).encode("utf-8")
+
+    mock_post.side_effect = post
+    provider = CustomHTTPProvider("http://localhost:8545")
+    calls = [("eth_getBlockByNumber", [hex(block), False]) for block in range(5)]
+
+    responses = provider.make_batch_request(calls, max_batch_size=2)
+
+    assert mock_post.call_count == 3
+    assert [response["result"] for response in responses] == [
+        hex(block) for block in range(5)
+    ]
+
+
+@patch("df_py.util.http_provider.make_post_request")
+def test_make_batch_request_rejected(mock_post):
+    error = {"code": -32600, "message": "batch too large"}
+    mock_post.return_value = json.dumps(
+        {"jsonrpc": "2.0", "id": None, "error": error}
+    ).encode("utf-8")
+    provider = CustomHTTPProvider("http://localhost:8545")
+
+    with pytest.raises(ValueError):
+        provider.make_batch_request([("eth_blockNumber", [])])
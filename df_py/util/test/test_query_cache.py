@@ -0,0 +1,47 @@
+from df_py.util.query_cache import QueryCache, normalize_query, query_key
+
+
+def test_normalize_query():
+    q1 = "{ nfts(first: 10) {\n    id\n  }\n}"
+    q2 = "{ nfts(first: 10) { id } }"
+    assert normalize_query(q1) == normalize_query(q2)
+    assert query_key(q1, 1) == query_key(q2, 1)
+    assert query_key(q1, 1) != query_key(q1, 137)
+
+
+def test_get_put(tmp_path):
+    cache = QueryCache(str(tmp_path / "cache.sqlite"))
+    query = "{ nfts(block: {number: 5}) { id } }"
+    result = {"data": {"nfts": [{"id": "0x1"}]}}
+
+    assert cache.get(query, 1) is None
+    cache.put(query, 1, result)
+    assert cache.get(query, 1) == result
+    assert cache.get(query, 137) is None
+    assert len(cache) == 1
+    cache.close()
+
+    # persists across instances
+    cache = QueryCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get(query, 1) == result
+
+
+def test_lru_eviction(tmp_path):
+    result = {"data": {"nfts": [{"id": "0x" + "a" * 40}]}}
+    entry_size = len('{"data": {"nfts": [{"id": "0x' + "a" * 40 + '"}]}}')
+    cache = QueryCache(str(tmp_path / "cache.sqlite"), max_bytes=3 * entry_size)
+
+    queries = [f"{{ nfts(block: {{number: {i}}}) {{ id }} }}" for i in range(4)]
+    for query in queries[:3]:
+        cache.put(query, 1, result)
+    assert len(cache) == 3
+
+    # touch the oldest entry, so that the 2nd one is now least recently used
+    assert cache.get(queries[0], 1) == result
+
+    cache.put(queries[3], 1, result)
+    assert len(cache) == 3
+    assert cache.size() <= 3 * entry_size
+    assert cache.get(queries[1], 1) is None
+    for i in [0, 2, 3]:
+        assert cache.get(queries[i], 1) == result
@@ -0,0 +1,86 @@
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from eth_abi import encode
+from web3.main import Web3
+
+from df_py.util.contract_utils import load_contract
+from df_py.util.http_provider import CustomHTTPProvider
+from df_py.util.rpc_batch import (
+    RPCError,
+    batch_contract_calls,
+    batch_requests,
+    raise_errors,
+)
+
+TOKEN_ADDRS = [f"0x{i:040x}" for i in range(1, 6)]
+BAD_TOKEN_ADDR = TOKEN_ADDRS[2]
+
+
+def _eth_call_response(rpc_dict):
+    """Fake node: tokens return their symbols, except one that reverts"""
+    to = rpc_dict["params"][0]["to"].lower()
+    if to == BAD_TOKEN_ADDR:
+        error = {"code": -32000, "message": "execution reverted"}
+        return {"jsonrpc": "2.0", "id": rpc_dict["id"], "error": error}
+    result = "0x" + encode(["string"], [f"tok{int(to, 16)}"]).hex()
+    return {"jsonrpc": "2.0", "id": rpc_dict["id"], "result": result}
+
+
+def _fake_post(_, data, **__):
+    rpc_dicts = json.loads(data)
+    return json.dumps([_eth_call_response(d) for d in rpc_dicts]).encode("utf-8")
+
+
+@patch("df_py.util.http_provider.make_post_request")
+def test_batch_contract_calls(mock_post):
+    mock_post.side_effect = _fake_post
+    web3 = Web3(CustomHTTPProvider("http://localhost:8545"))
+    fns = [
+        load_contract(web3, "OceanToken", addr).functions.symbol()
+        for addr in TOKEN_ADDRS
+    ]
+
+    values = batch_contract_calls(fns, max_batch_size=2)
+
+    assert mock_post.call_count == 3
+    assert values[:2] == ["tok1", "tok2"]
+    assert values[3:] == ["tok4", "tok5"]
+
+    # a failed call doesn't fail the others
+    assert isinstance(values[2], RPCError)
+    assert values[2].error["message"] == "execution reverted"
+    with pytest.raises(RPCError):
+        raise_errors(values)
+
+    assert batch_contract_calls([]) == []
+
+
+def test_batch_requests_no_batching():
+    # providers that can't batch get one call at a time
+    web3 = Mock(spec=Web3)
+    web3.provider = Mock()
+    web3.provider.make_request.side_effect = [
+        {"jsonrpc": "2.0", "id": 0, "result": "0x1"},
+        {"jsonrpc": "2.0", "id": 1, "error": {"code": -32601, "message": "nope"}},
+    ]
+    calls = [
+        ("eth_getBlockByNumber", ["0x1", False]),
+        ("eth_call", [{"to": TOKEN_ADDRS[0], "data": "0x"}, "latest"]),
+    ]
+
+    results = batch_requests(web3, calls)
+
+    assert web3.provider.make_request.call_count == 2
+    assert results[0] == "0x1"
+    assert isinstance(results[1], RPCError) and results[1].method == "eth_call"
+
+
+def test_batch_requests_read_only():
+    # calls bypass web3's middleware, eg signing, so only reads are batched
+    web3 = Mock(spec=Web3)
+    web3.provider = Mock(spec=CustomHTTPProvider)
+    with pytest.raises(AssertionError):
+        batch_requests(web3, [("eth_sendTransaction", [{"to": TOKEN_ADDRS[0]}])])
+    assert web3.provider.make_batch_request.call_count == 0
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from df_py.util import storage
+
+SCHEMA = [("chainID", int), ("addr", str), ("amt", float)]
+ROWS = [[1, "0xa", 1.5], [137, "0xb", 2], ["8996", "0xc", "3.25"]]
+TARGET_TABLE = {
+    "chainID": [1, 137, 8996],
+    "addr": ["0xa", "0xb", "0xc"],
+    "amt": [1.5, 2.0, 3.25],
+}
+
+
+def test_storage_format(monkeypatch):
+    monkeypatch.delenv("STORAGE_FORMAT", raising=False)
+    assert storage.storage_format() == "csv"
+
+    monkeypatch.setenv("STORAGE_FORMAT", "Parquet")
+    assert storage.storage_format() == "parquet"
+
+    monkeypatch.setenv("STORAGE_FORMAT", "xlsx")
+    with pytest.raises(AssertionError):
+        storage.storage_format()
+    with pytest.raises(AssertionError):
+        storage.set_storage_format("xlsx")
+
+    storage.set_storage_format("csv")
+    assert os.environ["STORAGE_FORMAT"] == "csv"
+
+
+def test_table_filename(monkeypatch):
+    monkeypatch.setenv("STORAGE_FORMAT", "csv")
+    assert storage.table_filename("/d/nftvols-1.csv") == "/d/nftvols-1.csv"
+
+    monkeypatch.setenv("STORAGE_FORMAT", "parquet")
+    assert storage.table_filename("/d/nftvols-1.csv") == "/d/nftvols-1.parquet"
+    assert storage.table_filename("/d/nftvols*.csv") == "/d/nftvols*.parquet"
+
+
+@pytest.mark.parametrize("ext", ["csv", "parquet"])
+def test_save_load_table(tmp_path, ext):
+    filename = str(tmp_path / f"t.{ext}")
+    storage.save_table(filename, SCHEMA, ROWS)
+    assert storage.load_table(filename, SCHEMA) == TARGET_TABLE
+
+    with pytest.raises(AssertionError):
+        storage.load_table(filename, SCHEMA[:2])
+
+
+@pytest.mark.parametrize("ext", ["csv", "parquet"])
+def test_save_load_empty_table(tmp_path, ext):
+    filename = str(tmp_path / f"t.{ext}")
+    storage.save_table(filename, SCHEMA, [])
+    assert storage.load_table(filename, SCHEMA) == {
+        "chainID": [],
+        "addr": [],
+        "amt": [],
+    }
+
+
+def test_csv_format_unchanged(tmp_path):
+    filename = str(tmp_path / "t.csv")
+    storage.save_table(filename, SCHEMA, ROWS[:2])
+    with open(filename, "r") as f:
+        assert f.read() == "chainID,addr,amt\n1,0xa,1.5\n137,0xb,2\n"
+
+
+@pytest.mark.parametrize("ext", ["csv", "parquet"])
+def test_convert_csv_table(tmp_path, ext):
+    csv_filename = str(tmp_path / "t.partial.csv")
+    filename = str(tmp_path / f"t.{ext}")
+    storage.save_table(csv_filename, SCHEMA, ROWS)
+
+    storage.convert_csv_table(csv_filename, filename, SCHEMA)
+    assert not os.path.exists(csv_filename)
+    assert storage.load_table(filename, SCHEMA) == TARGET_TABLE
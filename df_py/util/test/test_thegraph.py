@@ -1,9 +1,8 @@
 from pprint import pprint
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from enforce_typing import enforce_types
-from requests import Response
 
 from df_py.util import networkutil, oceantestutil
 from df_py.util.graphutil import submit_query
@@ -23,10 +22,11 @@ def test_approved_tokens():
 def test_connection_failure():
     query = "{ opcs{approvedTokens} }"
     with pytest.raises(Exception, match="Query failed"):
-        with patch("df_py.util.graphutil.requests.post") as mock:
-            response = Mock(spec=Response)
-            response.status_code = 500
-            mock.return_value = response
+        with patch(
+            "df_py.util.graphql_client.AsyncGraphQLClient._post",
+            new_callable=AsyncMock,
+        ) as mock:
+            mock.return_value = (500, {})
             submit_query(query, CHAINID)
 
 
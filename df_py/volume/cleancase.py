@@ -3,6 +3,8 @@
 
 from enforce_typing import enforce_types
 
+from df_py.util.addr_registry import lower_addr
+
 FAKE_CHAINID = 99
 FAKE_TOKEN_ADDR = "0xfake_token"
 
@@ -15,10 +17,10 @@ def mod_allocations(allocs: dict) -> dict:
         chainID2 = int(chainID)
         allocs2[chainID2] = {}
         for nft_addr in allocs[chainID]:
-            nft_addr2 = nft_addr.lower()
+            nft_addr2 = lower_addr(nft_addr)
             allocs2[chainID2][nft_addr2] = {}
             for LP_addr, alloc in allocs[chainID][nft_addr].items():
-                LP_addr2 = LP_addr.lower()
+                LP_addr2 = lower_addr(LP_addr)
                 allocs2[chainID2][nft_addr2][LP_addr2] = alloc
     assert_allocations(allocs2)
     return allocs2
@@ -53,10 +55,10 @@ def mod_stakes(stakes: dict) -> dict:
         chainID2 = int(chainID)
         stakes2[chainID2] = {}
         for nft_addr in stakes[chainID]:
-            nft_addr2 = nft_addr.lower()
+            nft_addr2 = lower_addr(nft_addr)
             stakes2[chainID2][nft_addr2] = {}
             for LP_addr, alloc in stakes[chainID][nft_addr].items():
-                LP_addr2 = LP_addr.lower()
+                LP_addr2 = lower_addr(LP_addr)
                 stakes2[chainID2][nft_addr2][LP_addr2] = alloc
     assert_stakes(stakes2)
     return stakes2
@@ -81,7 +83,7 @@ def mod_vebals(vebals: dict) -> dict:
     """vebals - dict of [LP_addr] : LP's ve balance"""
     vebals2 = {}
     for LP_addr, bal in vebals.items():
-        LP_addr2 = LP_addr.lower()
+        LP_addr2 = lower_addr(LP_addr)
         vebals2[LP_addr2] = bal
 
     assert_vebals(vebals2)
@@ -104,10 +106,10 @@ def mod_nft_vols(nftvols: dict) -> dict:
         chainID2 = chainID
         nftvols2[chainID2] = {}
         for base_addr in nftvols[chainID]:
-            base_addr2 = base_addr.lower()
+            base_addr2 = lower_addr(base_addr)
             nftvols2[chainID2][base_addr2] = {}
             for NFT_addr, vol in nftvols[chainID][base_addr].items():
-                NFT_addr2 = NFT_addr.lower()
+                NFT_addr2 = lower_addr(NFT_addr)
                 nftvols2[chainID2][base_addr2][NFT_addr2] = vol
 
     assert_nft_vols(nftvols2)
@@ -134,7 +136,7 @@ def mod_symbols(symbols: dict) -> dict:
         chainID2 = chainID
         symbols2[chainID2] = {}
         for base_addr, symbol in symbols[chainID].items():
-            base_addr2 = base_addr.lower()
+            base_addr2 = lower_addr(base_addr)
             symbol2 = symbol.upper()
             symbols2[chainID2][base_addr2] = symbol2
 
@@ -180,8 +182,8 @@ def mod_owners(owners: dict) -> dict:
         chainID2 = chainID
         owners2[chainID2] = {}
         for nft_addr, owner_addr in owners[chainID].items():
-            nft_addr2 = nft_addr.lower()
-            owner_addr2 = owner_addr.lower()
+            nft_addr2 = lower_addr(nft_addr)
+            owner_addr2 = lower_addr(owner_addr)
             owners2[chainID2][nft_addr2] = owner_addr2
 
     assert_owners(owners2)
@@ -1,17 +1,35 @@
-import csv
 import glob
 import os
 from typing import Any, Dict, List, Tuple
 
+import numpy as np
 from enforce_typing import enforce_types
-from web3.main import Web3
 
-from df_py.util.csv_helpers import _last_int, assert_is_eth_addr
+from df_py.util.csv_helpers import (
+    _last_int,
+    assert_is_eth_addr,
+    checksum_eth_addrs,
+    lower_eth_addrs,
+)
+from df_py.util.storage import (
+    Schema,
+    load_arrow_table,
+    load_table,
+    save_table,
+    table_filename,
+)
 from df_py.volume.models import SimpleDataNft
 
 # ========================================================================
 # allocation csvs
 
+ALLOCATION_SCHEMA: Schema = [
+    ("chainID", int),
+    ("nft_addr", str),
+    ("LP_addr", str),
+    ("percent", float),
+]
+
 
 @enforce_types
 def save_allocation_csv(allocs: dict, csv_dir: str, sampled=True):
@@ -27,22 +45,20 @@ def save_allocation_csv(allocs: dict, csv_dir: str, sampled=True):
     csv_file = allocation_csv_filename(csv_dir, sampled)
     assert not os.path.exists(csv_file), csv_file
     S = allocs
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-        row = ["chainID", "nft_addr", "LP_addr", "percent"]
-        writer.writerow(row)
-        for chainID in S.keys():
-            for nft_addr in S[chainID].keys():
+    rows = []
+    for chainID in S.keys():
+        for nft_addr in S[chainID].keys():
+            assert_is_eth_addr(nft_addr)
+            for LP_addr, percent in S[chainID][nft_addr].items():
                 assert_is_eth_addr(nft_addr)
-                for LP_addr, percent in S[chainID][nft_addr].items():
-                    assert_is_eth_addr(nft_addr)
-                    row = [
-                        chainID,
-                        nft_addr.lower(),
-                        LP_addr.lower(),
-                        percent,
-                    ]
-                    writer.writerow(row)
+                row = [
+                    chainID,
+                    nft_addr.lower(),
+                    LP_addr.lower(),
+                    percent,
+                ]
+                rows.append(row)
+    save_table(csv_file, ALLOCATION_SCHEMA, rows)
     print(f"Created {csv_file}")
 
 
@@ -55,34 +71,47 @@ def load_allocation_csvs(csv_dir: str) -> Dict[int, Dict[str, Dict[str, float]]]
     @return
       allocs -- dict of [chainID][basetoken_addr][nft_addr][LP_addr] : perc_flt
     """
-    csv_file = allocation_csv_filename(csv_dir)
+    arrays = load_allocation_arrays(csv_dir)
     allocs: Dict[int, Dict[str, Dict[str, float]]] = {}
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-        for row_i, row in enumerate(reader):
-            if row_i == 0:
-                assert row == ["chainID", "nft_addr", "LP_addr", "percent"]
-                continue
-            _chainID, nft_addr, LP_addr, _percent = row
-
-            chainID = int(_chainID)
-            nft_addr = nft_addr.lower()
-            LP_addr = Web3.to_checksum_address(LP_addr.lower())
-            percent = float(_percent)
+    for chainID, nft_addr, LP_addr, percent in zip(
+        arrays["chainID"].tolist(),
+        arrays["nft_addr"],
+        arrays["LP_addr"],
+        arrays["percent"].tolist(),
+    ):
+        if chainID not in allocs:
+            allocs[chainID] = {}
 
-            assert_is_eth_addr(nft_addr)
-            assert_is_eth_addr(LP_addr)
+        if nft_addr not in allocs[chainID]:
+            allocs[chainID][nft_addr] = {}
+
+        allocs[chainID][nft_addr][LP_addr] = percent
+
+    return allocs
 
-            if chainID not in allocs:
-                allocs[chainID] = {}
 
-            if nft_addr not in allocs[chainID]:
-                allocs[chainID][nft_addr] = {}
+@enforce_types
+def load_allocation_arrays(csv_dir: str) -> Dict[str, np.ndarray]:
+    """
+    @description
+      Load allocation csv as whole columns. Addresses get checked in bulk,
+      and each distinct LP address is checksummed once.
 
-            allocs[chainID][nft_addr][LP_addr] = percent
+    @return
+      arrays -- dict of [column_name] : array, with columns:
+        chainID (int), nft_addr (lowercase), LP_addr (checksum), percent (float)
+    """
+    csv_file = allocation_csv_filename(csv_dir)
+    table = load_arrow_table(csv_file, ALLOCATION_SCHEMA)
+    arrays = {
+        "chainID": table["chainID"].to_numpy(),
+        "nft_addr": lower_eth_addrs(table["nft_addr"]).to_numpy(),
+        "LP_addr": checksum_eth_addrs(table["LP_addr"]),
+        "percent": table["percent"].to_numpy(),
+    }
     print(f"Loaded {csv_file}")
 
-    return allocs
+    return arrays
 
 
 @enforce_types
@@ -91,11 +120,20 @@ def allocation_csv_filename(csv_dir: str, sampled=True) -> str:
     f = "allocations.csv"
     if not sampled:
         f = "allocations_realtime.csv"
-    return os.path.join(csv_dir, f)
+    return table_filename(os.path.join(csv_dir, f))
 
 
 # ========================================================================
 # vebals csvs
+
+VEBALS_SCHEMA: Schema = [
+    ("LP_addr", str),
+    ("balance", float),
+    ("locked_amt", float),
+    ("unlock_time", int),
+]
+
+
 def save_vebals_csv(
     vebals: dict, locked_amt: dict, unlock_time: dict, csv_dir: str, sampled=True
 ):
@@ -113,19 +151,17 @@ def save_vebals_csv(
     assert os.path.exists(csv_dir), csv_dir
     csv_file = vebals_csv_filename(csv_dir, sampled)
     assert not os.path.exists(csv_file), csv_file
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-        row = ["LP_addr", "balance", "locked_amt", "unlock_time"]
-        writer.writerow(row)
-        for LP_addr in vebals.keys():
-            assert_is_eth_addr(LP_addr)
-            row = [
-                LP_addr.lower(),
-                vebals[LP_addr],
-                locked_amt[LP_addr],
-                unlock_time[LP_addr],
-            ]
-            writer.writerow(row)
+    rows = []
+    for LP_addr in vebals.keys():
+        assert_is_eth_addr(LP_addr)
+        row = [
+            LP_addr.lower(),
+            vebals[LP_addr],
+            locked_amt[LP_addr],
+            unlock_time[LP_addr],
+        ]
+        rows.append(row)
+    save_table(csv_file, VEBALS_SCHEMA, rows)
 
     print(f"Created {csv_file}")
 
@@ -140,31 +176,37 @@ def load_vebals_csv(
     @return
       vebals -- dict of [LP_addr] : balance
     """
-    csv_file = vebals_csv_filename(csv_dir, sampled)
-    vebals: Dict[str, float] = {}
-    locked_amts: Dict[str, float] = {}
-    unlock_times: Dict[str, int] = {}
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-        for row_i, row in enumerate(reader):
-            if row_i == 0:
-                assert row == ["LP_addr", "balance", "locked_amt", "unlock_time"]
-                continue
-            LP_addr, _balance, _locked_amt, _unlock_time = row
-
-            LP_addr = Web3.to_checksum_address(LP_addr.lower())
-            balance = float(_balance)
-            locked_amt = float(_locked_amt)
-            unlock_time = int(_unlock_time)
+    arrays = load_vebals_arrays(csv_dir, sampled)
+    LP_addrs = arrays["LP_addr"].tolist()
+    vebals = dict(zip(LP_addrs, arrays["balance"].tolist()))
+    locked_amts = dict(zip(LP_addrs, arrays["locked_amt"].tolist()))
+    unlock_times = dict(zip(LP_addrs, arrays["unlock_time"].tolist()))
 
-            assert_is_eth_addr(LP_addr)
+    return vebals, locked_amts, unlock_times
 
-            vebals[LP_addr] = balance
-            locked_amts[LP_addr] = locked_amt
-            unlock_times[LP_addr] = unlock_time
 
+@enforce_types
+def load_vebals_arrays(csv_dir: str, sampled=True) -> Dict[str, np.ndarray]:
+    """
+    @description
+      Load veOCEAN balances csv as whole columns. Each distinct LP address
+      is checksummed once.
+
+    @return
+      arrays -- dict of [column_name] : array, with columns:
+        LP_addr (checksum), balance, locked_amt (float), unlock_time (int)
+    """
+    csv_file = vebals_csv_filename(csv_dir, sampled)
+    table = load_arrow_table(csv_file, VEBALS_SCHEMA)
+    arrays = {
+        "LP_addr": checksum_eth_addrs(table["LP_addr"]),
+        "balance": table["balance"].to_numpy(),
+        "locked_amt": table["locked_amt"].to_numpy(),
+        "unlock_time": table["unlock_time"].to_numpy(),
+    }
     print(f"Loaded {csv_file}")
-    return vebals, locked_amts, unlock_times
+
+    return arrays
 
 
 @enforce_types
@@ -173,12 +215,14 @@ def vebals_csv_filename(csv_dir: str, sampled=True) -> str:
     f = "vebals.csv"
     if not sampled:
         f = "vebals_realtime.csv"
-    return os.path.join(csv_dir, f)
+    return table_filename(os.path.join(csv_dir, f))
 
 
 # ========================================================================
 # passive csv
 
+PASSIVE_SCHEMA: Schema = [("LP_addr", str), ("balance", float), ("reward", float)]
+
 
 @enforce_types
 def save_passive_csv(rewards, balances, csv_dir):
@@ -194,14 +238,12 @@ def save_passive_csv(rewards, balances, csv_dir):
     assert os.path.exists(csv_dir), csv_dir
     csv_file = passive_csv_filename(csv_dir)
     assert not os.path.exists(csv_file), csv_file
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-        row = ["LP_addr", "balance", "reward"]
-        writer.writerow(row)
-        for LP_addr in rewards.keys():
-            assert_is_eth_addr(LP_addr)
-            row = [LP_addr.lower(), balances[LP_addr], rewards[LP_addr]]
-            writer.writerow(row)
+    rows = []
+    for LP_addr in rewards.keys():
+        assert_is_eth_addr(LP_addr)
+        row = [LP_addr.lower(), balances[LP_addr], rewards[LP_addr]]
+        rows.append(row)
+    save_table(csv_file, PASSIVE_SCHEMA, rows)
 
     print(f"Created {csv_file}")
 
@@ -210,12 +252,22 @@ def save_passive_csv(rewards, balances, csv_dir):
 def passive_csv_filename(csv_dir: str) -> str:
     """Returns the vebals filename"""
     f = "passive.csv"
-    return os.path.join(csv_dir, f)
+    return table_filename(os.path.join(csv_dir, f))
 
 
 # ========================================================================
 # nftinfo csv
 
+NFTINFO_SCHEMA: Schema = [
+    ("chainID", int),
+    ("nft_addr", str),
+    ("did", str),
+    ("symbol", str),
+    ("name", str),
+    ("is_purgatory", int),
+    ("owner_addr", str),
+]
+
 
 @enforce_types
 def save_nftinfo_csv(nftinfo: List[SimpleDataNft], csv_dir: str, chainID: int):
@@ -232,31 +284,20 @@ def save_nftinfo_csv(nftinfo: List[SimpleDataNft], csv_dir: str, chainID: int):
     csv_file = nftinfo_csv_filename(csv_dir, chainID)
     assert not os.path.exists(csv_file), csv_file
 
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
+    rows = []
+    for nft in nftinfo:
+        isinpurg = "1" if nft.is_purgatory else "0"
         row = [
-            "chainID",
-            "nft_addr",
-            "did",
-            "symbol",
-            "name",
-            "is_purgatory",
-            "owner_addr",
+            str(chainID),
+            nft.nft_addr.lower(),
+            nft.did,
+            nft.symbol,
+            nft.name.replace(",", "%@#"),
+            isinpurg,
+            nft.owner_addr,
         ]
-        writer.writerow(row)
-
-        for nft in nftinfo:
-            isinpurg = "1" if nft.is_purgatory else "0"
-            row = [
-                str(chainID),
-                nft.nft_addr.lower(),
-                nft.did,
-                nft.symbol,
-                nft.name.replace(",", "%@#"),
-                isinpurg,
-                nft.owner_addr,
-            ]
-            writer.writerow(row)
+        rows.append(row)
+    save_table(csv_file, NFTINFO_SCHEMA, rows)
 
 
 @enforce_types
@@ -285,36 +326,21 @@ def load_nftinfo_csv(csv_dir: str, chainID: int):
     """
     csv_file = nftinfo_csv_filename(csv_dir, chainID)
     nftinfo = []
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-        for row_i, row in enumerate(reader):
-            if row_i == 0:  # header
-                assert row == [
-                    "chainID",
-                    "nft_addr",
-                    "did",
-                    "symbol",
-                    "name",
-                    "is_purgatory",
-                    "owner_addr",
-                ]
-                continue
-
-            chainID2 = int(row[0])
-            nft_addr = row[1].lower()
-            symbol = row[3].upper()
-            name = row[4]
-            is_purgatory = bool(int(row[5]))
-            owner_addr = row[6]
-
-            assert chainID2 == chainID, "csv had data from different chain"
-            assert_is_eth_addr(nft_addr)
-            assert_is_eth_addr(owner_addr)
-
-            nft = SimpleDataNft(
-                chainID, nft_addr, symbol, owner_addr, is_purgatory, name
-            )
-            nftinfo.append(nft)
+    table = load_table(csv_file, NFTINFO_SCHEMA)
+    for row in zip(*table.values()):
+        chainID2 = row[0]
+        nft_addr = row[1].lower()
+        symbol = row[3].upper()
+        name = row[4]
+        is_purgatory = bool(row[5])
+        owner_addr = row[6]
+
+        assert chainID2 == chainID, "csv had data from different chain"
+        assert_is_eth_addr(nft_addr)
+        assert_is_eth_addr(owner_addr)
+
+        nft = SimpleDataNft(chainID, nft_addr, symbol, owner_addr, is_purgatory, name)
+        nftinfo.append(nft)
 
     print(f"Loaded {csv_file}")
 
@@ -324,13 +350,13 @@ def load_nftinfo_csv(csv_dir: str, chainID: int):
 @enforce_types
 def nftinfo_csv_filenames(csv_dir: str) -> List[str]:
     """Returns a list of nftinfo filenames in this directory"""
-    return glob.glob(os.path.join(csv_dir, "nftinfo*.csv"))
+    return glob.glob(table_filename(os.path.join(csv_dir, "nftinfo*.csv")))
 
 
 @enforce_types
 def nftinfo_csv_filename(csv_dir: str, chainID: int) -> str:
     """Returns the nftinfo filename"""
-    return os.path.join(csv_dir, f"nftinfo_{chainID}.csv")
+    return table_filename(os.path.join(csv_dir, f"nftinfo_{chainID}.csv"))
 
 
 @enforce_types
@@ -342,6 +368,13 @@ def chain_id_for_nftinfo_csv(filename) -> int:
 # ========================================================================
 # nftvols csvs
 
+NFTVOLS_SCHEMA: Schema = [
+    ("chainID", int),
+    ("basetoken_addr", str),
+    ("nft_addr", str),
+    ("vol_amt", float),
+]
+
 
 @enforce_types
 def save_nftvols_csv(nftvols_at_chain: dict, csv_dir: str, chainID: int):
@@ -359,15 +392,14 @@ def save_nftvols_csv(nftvols_at_chain: dict, csv_dir: str, chainID: int):
     csv_file = nftvols_csv_filename(csv_dir, chainID)
     assert not os.path.exists(csv_file), csv_file
     nftvols = nftvols_at_chain
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-        writer.writerow(["chainID", "basetoken_addr", "nft_addr", "vol_amt"])
-        for basetoken_addr in nftvols.keys():
-            assert_is_eth_addr(basetoken_addr)
-            for nft_addr, vol in nftvols[basetoken_addr].items():
-                assert_is_eth_addr(nft_addr)
-                row = [chainID, basetoken_addr.lower(), nft_addr.lower(), vol]
-                writer.writerow(row)
+    rows = []
+    for basetoken_addr in nftvols.keys():
+        assert_is_eth_addr(basetoken_addr)
+        for nft_addr, vol in nftvols[basetoken_addr].items():
+            assert_is_eth_addr(nft_addr)
+            row = [chainID, basetoken_addr.lower(), nft_addr.lower(), vol]
+            rows.append(row)
+    save_table(csv_file, NFTVOLS_SCHEMA, rows)
     print(f"Created {csv_file}")
 
 
@@ -399,26 +431,19 @@ def load_nftvols_csv(csv_dir: str, chainID: int):
     """
     csv_file = nftvols_csv_filename(csv_dir, chainID)
     nftvols: Dict[str, Dict[str, float]] = {}  # ie nftvols_at_chain
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-        for row_i, row in enumerate(reader):
-            if row_i == 0:  # header
-                assert row == ["chainID", "basetoken_addr", "nft_addr", "vol_amt"]
-                continue
-
-            chainID2 = int(row[0])
-            basetoken_addr = row[1].lower()
-            nft_addr = row[2].lower()
-            vol_amt = float(row[3])
-
-            assert chainID2 == chainID, "csv had data from different chain"
-            assert_is_eth_addr(basetoken_addr)
-            assert_is_eth_addr(nft_addr)
-
-            if basetoken_addr not in nftvols:
-                nftvols[basetoken_addr] = {}
-            assert nft_addr not in nftvols[basetoken_addr], "duplicate found"
-            nftvols[basetoken_addr][nft_addr] = vol_amt
+    table = load_table(csv_file, NFTVOLS_SCHEMA)
+    for chainID2, basetoken_addr, nft_addr, vol_amt in zip(*table.values()):
+        basetoken_addr = basetoken_addr.lower()
+        nft_addr = nft_addr.lower()
+
+        assert chainID2 == chainID, "csv had data from different chain"
+        assert_is_eth_addr(basetoken_addr)
+        assert_is_eth_addr(nft_addr)
+
+        if basetoken_addr not in nftvols:
+            nftvols[basetoken_addr] = {}
+        assert nft_addr not in nftvols[basetoken_addr], "duplicate found"
+        nftvols[basetoken_addr][nft_addr] = vol_amt
     print(f"Loaded {csv_file}")
 
     return nftvols
@@ -427,13 +452,13 @@ def load_nftvols_csv(csv_dir: str, chainID: int):
 @enforce_types
 def nftvols_csv_filenames(csv_dir: str) -> List[str]:
     """Returns a list of nftvols filenames in this directory"""
-    return glob.glob(os.path.join(csv_dir, "nftvols*.csv"))
+    return glob.glob(table_filename(os.path.join(csv_dir, "nftvols*.csv")))
 
 
 @enforce_types
 def nftvols_csv_filename(csv_dir: str, chainID: int) -> str:
     """Returns the nftvols filename for a given chainID"""
-    return os.path.join(csv_dir, f"nftvols-{chainID}.csv")
+    return table_filename(os.path.join(csv_dir, f"nftvols-{chainID}.csv"))
 
 
 @enforce_types
@@ -445,6 +470,8 @@ def chain_id_for_nftvols_csv(filename) -> int:
 # ========================================================================
 # owners csvs
 
+OWNERS_SCHEMA: Schema = [("chainID", int), ("nft_addr", str), ("owner_addr", str)]
+
 
 @enforce_types
 def save_owners_csv(owners_at_chain: Dict[str, str], csv_dir: str, chainID: int):
@@ -460,18 +487,17 @@ def save_owners_csv(owners_at_chain: Dict[str, str], csv_dir: str, chainID: int)
     assert os.path.exists(csv_dir), csv_dir
     csv_file = owners_csv_filename(csv_dir, chainID)
     assert not os.path.exists(csv_file), csv_file
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-        writer.writerow(["chainID", "nft_addr", "owner_addr"])
-        for nft_addr, owner_addr in owners_at_chain.items():
-            assert_is_eth_addr(nft_addr)
-            assert_is_eth_addr(owner_addr)
-            row = [
-                chainID,
-                nft_addr.lower(),
-                owner_addr.lower(),
-            ]
-            writer.writerow(row)
+    rows = []
+    for nft_addr, owner_addr in owners_at_chain.items():
+        assert_is_eth_addr(nft_addr)
+        assert_is_eth_addr(owner_addr)
+        row = [
+            chainID,
+            nft_addr.lower(),
+            owner_addr.lower(),
+        ]
+        rows.append(row)
+    save_table(csv_file, OWNERS_SCHEMA, rows)
 
     print(f"Created {csv_file}")
 
@@ -505,22 +531,16 @@ def load_owners_csv(csv_dir: str, chainID: int) -> Dict[str, str]:
     """
     csv_file = owners_csv_filename(csv_dir, chainID)
     owners_at_chain: dict = {}
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-        for row_i, row in enumerate(reader):
-            if row_i == 0:  # header
-                assert row == ["chainID", "nft_addr", "owner_addr"]
-                continue
-
-            chainID2 = int(row[0])
-            nft_addr = row[1].lower()
-            owner_addr = row[2].lower()
-
-            assert chainID2 == chainID, "csv had data from different chain"
-            assert_is_eth_addr(nft_addr)
-            assert_is_eth_addr(owner_addr)
+    table = load_table(csv_file, OWNERS_SCHEMA)
+    for chainID2, nft_addr, owner_addr in zip(*table.values()):
+        nft_addr = nft_addr.lower()
+        owner_addr = owner_addr.lower()
+
+        assert chainID2 == chainID, "csv had data from different chain"
+        assert_is_eth_addr(nft_addr)
+        assert_is_eth_addr(owner_addr)
 
-            owners_at_chain[nft_addr] = owner_addr
+        owners_at_chain[nft_addr] = owner_addr
 
     print(f"Loaded {csv_file}")
     return owners_at_chain
@@ -529,13 +549,13 @@ def load_owners_csv(csv_dir: str, chainID: int) -> Dict[str, str]:
 @enforce_types
 def owners_csv_filenames(csv_dir: str) -> List[str]:
     """Returns a list of owners filenames in this directory"""
-    return glob.glob(os.path.join(csv_dir, "owners*.csv"))
+    return glob.glob(table_filename(os.path.join(csv_dir, "owners*.csv")))
 
 
 @enforce_types
 def owners_csv_filename(csv_dir: str, chainID: int) -> str:
     """Returns the owners filename for a given chainID"""
-    return os.path.join(csv_dir, f"owners-{chainID}.csv")
+    return table_filename(os.path.join(csv_dir, f"owners-{chainID}.csv"))
 
 
 @enforce_types
@@ -547,6 +567,8 @@ def chain_id_for_owners_csv(filename) -> int:
 # ========================================================================
 # symbols csvs
 
+SYMBOLS_SCHEMA: Schema = [("chainID", int), ("token_addr", str), ("token_symbol", str)]
+
 
 @enforce_types
 def save_symbols_csv(symbols_at_chain: Dict[str, str], csv_dir: str, chainID: int):
@@ -562,17 +584,16 @@ def save_symbols_csv(symbols_at_chain: Dict[str, str], csv_dir: str, chainID: in
     assert os.path.exists(csv_dir), csv_dir
     csv_file = symbols_csv_filename(csv_dir, chainID)
     assert not os.path.exists(csv_file), csv_file
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-        writer.writerow(["chainID", "token_addr", "token_symbol"])
-        for token_addr, token_symbol in symbols_at_chain.items():
-            assert_is_eth_addr(token_addr)
-            row = [
-                chainID,
-                token_addr.lower(),
-                token_symbol.upper(),
-            ]
-            writer.writerow(row)
+    rows = []
+    for token_addr, token_symbol in symbols_at_chain.items():
+        assert_is_eth_addr(token_addr)
+        row = [
+            chainID,
+            token_addr.lower(),
+            token_symbol.upper(),
+        ]
+        rows.append(row)
+    save_table(csv_file, SYMBOLS_SCHEMA, rows)
 
     print(f"Created {csv_file}")
 
@@ -606,21 +627,15 @@ def load_symbols_csv(csv_dir: str, chainID: int) -> Dict[str, str]:
     """
     csv_file = symbols_csv_filename(csv_dir, chainID)
     symbols_at_chain: dict = {}
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-        for row_i, row in enumerate(reader):
-            if row_i == 0:  # header
-                assert row == ["chainID", "token_addr", "token_symbol"]
-                continue
+    table = load_table(csv_file, SYMBOLS_SCHEMA)
+    for chainID2, token_addr, token_symbol in zip(*table.values()):
+        token_addr = token_addr.lower()
+        token_symbol = token_symbol.upper()
 
-            chainID2 = int(row[0])
-            token_addr = row[1].lower()
-            token_symbol = row[2].upper()
+        assert chainID2 == chainID, "csv had data from different chain"
+        assert_is_eth_addr(token_addr)
 
-            assert chainID2 == chainID, "csv had data from different chain"
-            assert_is_eth_addr(token_addr)
-
-            symbols_at_chain[token_addr] = token_symbol
+        symbols_at_chain[token_addr] = token_symbol
 
     print(f"Loaded {csv_file}")
     return symbols_at_chain
@@ -629,13 +644,13 @@ def load_symbols_csv(csv_dir: str, chainID: int) -> Dict[str, str]:
 @enforce_types
 def symbols_csv_filenames(csv_dir: str) -> List[str]:
     """Returns a list of symbols filenames in this directory"""
-    return glob.glob(os.path.join(csv_dir, "symbols*.csv"))
+    return glob.glob(table_filename(os.path.join(csv_dir, "symbols*.csv")))
 
 
 @enforce_types
 def symbols_csv_filename(csv_dir: str, chainID: int) -> str:
     """Returns the symbols filename for a given chainID"""
-    return os.path.join(csv_dir, f"symbols-{chainID}.csv")
+    return table_filename(os.path.join(csv_dir, f"symbols-{chainID}.csv"))
 
 
 @enforce_types
@@ -647,6 +662,8 @@ def chain_id_for_symbols_csv(filename) -> int:
 # ========================================================================
 # exchange rate csvs
 
+RATE_SCHEMA: Schema = [("token_symbol", str), ("rate", float)]
+
 
 @enforce_types
 def save_rate_csv(token_symbol: str, rate: float, csv_dir: str):
@@ -662,10 +679,7 @@ def save_rate_csv(token_symbol: str, rate: float, csv_dir: str):
     token_symbol = token_symbol.upper()
     csv_file = rate_csv_filename(token_symbol, csv_dir)
     assert not os.path.exists(csv_file), f"{csv_file} can't already exist"
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-        writer.writerow(["token_symbol", "rate"])
-        writer.writerow([token_symbol, str(rate)])
+    save_table(csv_file, RATE_SCHEMA, [[token_symbol, str(rate)]])
     print(f"Created {csv_file}")
 
 
@@ -681,17 +695,11 @@ def load_rate_csvs(csv_dir: str) -> Dict[str, float]:
     csv_files = rate_csv_filenames(csv_dir)
     rates = {}
     for csv_file in csv_files:
-        with open(csv_file, "r") as f:
-            reader = csv.reader(f)
-            for row_i, row in enumerate(reader):
-                if row_i == 0:  # header
-                    assert row == ["token_symbol", "rate"]
-                elif row_i == 1:
-                    token_symbol = row[0].upper()
-                    rate = float(row[1])
-                    rates[token_symbol] = rate
-                else:
-                    raise ValueError("csv should only have two rows")
+        table = load_table(csv_file, RATE_SCHEMA)
+        if len(table["rate"]) > 1:
+            raise ValueError("csv should only have two rows")
+        for token_symbol, rate in zip(*table.values()):
+            rates[token_symbol.upper()] = rate
         print(f"Loaded {csv_file}")
 
     # have rates for non-standard token names like MOCEAN
@@ -704,18 +712,24 @@ def load_rate_csvs(csv_dir: str) -> Dict[str, float]:
 @enforce_types
 def rate_csv_filenames(csv_dir: str) -> List[str]:
     """Returns a list of exchange rate filenames in this directory"""
-    return glob.glob(os.path.join(csv_dir, "rate*.csv"))
+    return glob.glob(table_filename(os.path.join(csv_dir, "rate*.csv")))
 
 
 @enforce_types
 def rate_csv_filename(token_symbol: str, csv_dir: str) -> str:
     """Returns the exchange rate filename for a given token"""
-    return os.path.join(csv_dir, f"rate-{token_symbol.upper()}.csv")
+    return table_filename(os.path.join(csv_dir, f"rate-{token_symbol.upper()}.csv"))
 
 
 # ========================================================================
 # rewardsperlp csvs
 
+VOLUME_REWARDS_SCHEMA: Schema = [
+    ("chainID", int),
+    ("LP_addr", str),
+    ("OCEAN_amt", float),
+]
+
 
 @enforce_types
 def save_volume_rewards_csv(
@@ -733,17 +747,13 @@ def save_volume_rewards_csv(
     """
     csv_file = volume_rewards_csv_filename(csv_dir)
     assert not os.path.exists(csv_file), f"{csv_file} can't already exist"
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-
-        header = ["chainID", "LP_addr", "OCEAN_amt"]
-        writer.writerow(header)
-
-        for chainID, innerdict in rewards.items():
-            for LP_addr, value in innerdict.items():
-                assert_is_eth_addr(LP_addr)
-                row = [chainID, LP_addr.lower(), value]
-                writer.writerow(row)
+    rows = []
+    for chainID, innerdict in rewards.items():
+        for LP_addr, value in innerdict.items():
+            assert_is_eth_addr(LP_addr)
+            row = [chainID, LP_addr.lower(), value]
+            rows.append(row)
+    save_table(csv_file, VOLUME_REWARDS_SCHEMA, rows)
     print(f"Created {csv_file}")
 
 
@@ -753,22 +763,17 @@ def load_volume_rewards_csv(csv_dir: str) -> Dict[str, Dict[str, float]]:
     csv_file = volume_rewards_csv_filename(csv_dir)
     rewards: Dict[Any, Dict[str, float]] = {}
 
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-        for row_i, row in enumerate(reader):
-            if row_i == 0:  # header
-                assert row == ["chainID", "LP_addr", "OCEAN_amt"]
-            else:
-                chainID = int(row[0])
-                LP_addr = Web3.to_checksum_address(row[1].lower())
-                amt = float(row[2])
+    table = load_arrow_table(csv_file, VOLUME_REWARDS_SCHEMA)
+    for chainID, LP_addr, amt in zip(
+        table["chainID"].to_pylist(),
+        checksum_eth_addrs(table["LP_addr"]),
+        table["OCEAN_amt"].to_pylist(),
+    ):
+        if chainID not in rewards:
+            rewards[chainID] = {}
+        assert LP_addr not in rewards[chainID], "duplicate found"
 
-                assert_is_eth_addr(LP_addr)
-                if chainID not in rewards:
-                    rewards[chainID] = {}
-                assert LP_addr not in rewards[chainID], "duplicate found"
-
-                rewards[chainID][LP_addr] = amt
+        rewards[chainID][LP_addr] = amt
 
     print(f"Loaded {csv_file}")
 
@@ -777,12 +782,20 @@ def load_volume_rewards_csv(csv_dir: str) -> Dict[str, Dict[str, float]]:
 
 @enforce_types
 def volume_rewards_csv_filename(csv_dir: str) -> str:
-    return os.path.join(csv_dir, "volume_rewards.csv")
+    return table_filename(os.path.join(csv_dir, "volume_rewards.csv"))
 
 
 # ========================================================================
 # rewardsinfo csvs
 
+VOLUME_REWARDSINFO_SCHEMA: Schema = [
+    ("chainID", int),
+    ("nft_addr", str),
+    ("LP_addr", str),
+    ("amt", float),
+    ("token", str),
+]
+
 
 @enforce_types
 def save_volume_rewardsinfo_csv(
@@ -799,31 +812,27 @@ def save_volume_rewardsinfo_csv(
     """
     csv_file = volume_rewardsinfo_csv_filename(csv_dir)
     assert not os.path.exists(csv_file), f"{csv_file} can't already exist"
-    with open(csv_file, "w") as f:
-        writer = csv.writer(f)
-
-        header = ["chainID", "nft_addr", "LP_addr", "amt", "token"]
-        writer.writerow(header)
-
-        for chainID, innerdict in rewards.items():
-            for LP_addr, innerdict2 in innerdict.items():
-                assert_is_eth_addr(LP_addr)
-                for nft_addr, value in innerdict2.items():
-                    assert_is_eth_addr(nft_addr)
-                    row = [
-                        chainID,
-                        LP_addr.lower(),
-                        nft_addr.lower(),
-                        value,
-                        "OCEAN",
-                    ]
-                    writer.writerow(row)
+    rows = []
+    for chainID, innerdict in rewards.items():
+        for LP_addr, innerdict2 in innerdict.items():
+            assert_is_eth_addr(LP_addr)
+            for nft_addr, value in innerdict2.items():
+                assert_is_eth_addr(nft_addr)
+                row = [
+                    chainID,
+                    LP_addr.lower(),
+                    nft_addr.lower(),
+                    value,
+                    "OCEAN",
+                ]
+                rows.append(row)
+    save_table(csv_file, VOLUME_REWARDSINFO_SCHEMA, rows)
     print(f"Created {csv_file}")
 
 
 @enforce_types
 def volume_rewardsinfo_csv_filename(csv_dir: str) -> str:
-    return os.path.join(csv_dir, "rewardsinfo.csv")
+    return table_filename(os.path.join(csv_dir, "rewardsinfo.csv"))
 
 
 @enforce_types
@@ -832,30 +841,23 @@ def load_volume_rewardsinfo_csv(csv_dir: str) -> Dict[int, Dict[str, Dict[str, A
     csv_file = volume_rewardsinfo_csv_filename(csv_dir)
     rewardsinfo: Dict[int, Dict[str, Dict[str, Any]]] = {}
 
-    with open(csv_file, "r") as f:
-        reader = csv.reader(f)
-        for row_i, row in enumerate(reader):
-            if row_i == 0:  # header
-                assert row == ["chainID", "nft_addr", "LP_addr", "amt", "token"]
-            else:
-                chainID = int(row[0])
-                nft_addr = Web3.to_checksum_address(row[1].lower())
-                LP_addr = Web3.to_checksum_address(row[2].lower())
-                amt = float(row[3])
-
-                assert_is_eth_addr(nft_addr)
-                assert_is_eth_addr(LP_addr)
-
-                if chainID not in rewardsinfo:
-                    rewardsinfo[chainID] = {}
+    table = load_arrow_table(csv_file, VOLUME_REWARDSINFO_SCHEMA)
+    for chainID, nft_addr, LP_addr, amt in zip(
+        table["chainID"].to_pylist(),
+        checksum_eth_addrs(table["nft_addr"]),
+        checksum_eth_addrs(table["LP_addr"]),
+        table["amt"].to_pylist(),
+    ):
+        if chainID not in rewardsinfo:
+            rewardsinfo[chainID] = {}
 
-                if nft_addr not in rewardsinfo[chainID]:
-                    rewardsinfo[chainID][nft_addr] = {}
+        if nft_addr not in rewardsinfo[chainID]:
+            rewardsinfo[chainID][nft_addr] = {}
 
-                if LP_addr not in rewardsinfo[chainID][nft_addr]:
-                    rewardsinfo[chainID][nft_addr][LP_addr] = {}
+        if LP_addr not in rewardsinfo[chainID][nft_addr]:
+            rewardsinfo[chainID][nft_addr][LP_addr] = {}
 
-                rewardsinfo[chainID][nft_addr][LP_addr] = amt
+        rewardsinfo[chainID][nft_addr][LP_addr] = amt
 
     print(f"Loaded {csv_file}")
 
@@ -2,7 +2,7 @@ from typing import Dict, List, Union
 
 from enforce_typing import enforce_types
 
-from df_py.util import oceanutil
+from df_py.util.addr_registry import lower_addr, nft_did
 
 
 @enforce_types
@@ -17,12 +17,12 @@ class SimpleDataNft:
         name: str = "",
     ):
         self.chain_id = chain_id
-        self.nft_addr = nft_addr.lower()
+        self.nft_addr = lower_addr(nft_addr)
         self.symbol = _symbol.upper()
-        self.owner_addr = owner_addr.lower()
+        self.owner_addr = lower_addr(owner_addr)
         self.is_purgatory = is_purgatory
         self.name = name  # can be any mix of upper and lower case
-        self.did = oceanutil.calc_did(nft_addr, chain_id)
+        self.did = nft_did(nft_addr, chain_id)
 
     def set_name(self, name: str):
         self.name = name
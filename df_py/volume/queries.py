@@ -1,21 +1,50 @@
+# pylint: disable=too-many-lines
 import json
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import requests
 from enforce_typing import enforce_types
-from web3.main import Web3
 
 from df_py.predictoor.queries import query_predictoor_contracts
 from df_py.util import networkutil, oceanutil
+from df_py.util.addr_registry import checksum_addr, lower_addr, nft_did
 from df_py.util.base18 import from_wei
 from df_py.util.blockrange import BlockRange
-from df_py.util.constants import AQUARIUS_BASE_URL, MAX_ALLOCATE
-from df_py.util.contract_base import ContractBase
-from df_py.util.graphutil import submit_query
+from df_py.util.constants import AQUARIUS_BASE_URL, MAX_ALLOCATE, MAX_QUERY_WORKERS
+from df_py.util.contract_utils import load_contract
+from df_py.util.graphutil import (
+    CHUNK_SIZE,
+    map_concurrently,
+    paginate_query,
+    paginate_query_at_blocks,
+)
+from df_py.util.rpc_batch import batch_contract_calls, raise_errors
 from df_py.volume.models import SimpleDataNft, TokSet
 
 MAX_TIME = 4 * 365 * 86400  # max lock time
 
+VEOCEAN_FIELDS = """
+  id
+  lockedAmount
+  unlockTime
+  delegation {
+    id
+    receiver {
+      id
+    }
+    amount
+    expireTime
+    timeLeftUnlock
+    lockedAmount
+    updates(orderBy:timestamp orderDirection:asc){
+      timestamp
+      sender
+      amount
+      type
+    }
+  }
+"""
+
 
 @enforce_types
 def queryVolsOwnersSymbols(
@@ -50,8 +79,7 @@ def queryVolsOwnersSymbols(
 
     # get all basetokens from Vi
     basetokens = TokSet()
-    for basetoken in Vi:
-        _symbol = symbol(rng.web3, basetoken)
+    for basetoken, _symbol in symbols(rng.web3, list(Vi)).items():
         basetokens.add(chainID, basetoken, _symbol)
     SYMi = getSymbols(basetokens, chainID)
     return (Vi, Ci, SYMi)
@@ -84,7 +112,7 @@ def _process_delegation(
     delegation_amt = time_left_unlock * delegated_amt_past / time_left_to_unlock_past
 
     # receiver address
-    delegated_to = str(Web3.to_checksum_address(delegation["receiver"]["id"]))
+    delegated_to = checksum_addr(delegation["receiver"]["id"])
 
     balance = balance - delegation_amt
 
@@ -93,12 +121,22 @@ def _process_delegation(
 
 @enforce_types
 def queryVebalances(
-    rng: BlockRange, CHAINID: int
+    rng: BlockRange,
+    CHAINID: int,
+    max_workers: int = MAX_QUERY_WORKERS,
+    incremental: bool = False,
 ) -> Tuple[Dict[str, float], Dict[str, float], Dict[str, int]]:
     """
     @description
       Return all ve balances
 
+    @arguments
+      max_workers -- max # sampled blocks to query concurrently
+      incremental -- take a full snapshot at the first sampled block only,
+        then just fetch the veOCEANs that changed since the previous sample.
+        Same result, far less data. See _queryVeOCEANsAtBlocksIncremental()
+        If the incremental query fails, falls back to the full scan
+
     @return
       vebals -- dict of [LP_addr] : veOCEAN_float
       locked_amt -- dict of [LP_addr] : locked_amt
@@ -117,101 +155,69 @@ def queryVebalances(
     unixEpochTime = web3.eth.get_block("latest").timestamp
     n_blocks = rng.num_blocks()
     n_blocks_sampled = 0
-    blocks = rng.get_blocks()
+    blocks = [int(block) for block in rng.get_blocks()]
     print("queryVebalances: begin")
 
+    veOCEANs_at_blocks: Optional[Dict[int, List[dict]]] = None
+    if incremental:
+        try:
+            veOCEANs_at_blocks = _queryVeOCEANsAtBlocksIncremental(
+                blocks, CHAINID, max_workers
+            )
+        except AssertionError as e:
+            # eg subgraph doesn't support the _change_block filter
+            print(f"  incremental query failed, doing full scan instead: {e}")
+
+    if veOCEANs_at_blocks is None:
+        try:
+            veOCEANs_at_blocks = _queryVeOCEANsAtBlocks(blocks, CHAINID, max_workers)
+        except AssertionError:
+            # subgraph returned no data
+            return ({}, {}, {})
+
     for block_i, block in enumerate(blocks):
         if (block_i % 50) == 0 or (block_i == n_blocks - 1):
             print(f"  {(block_i+1) / float(n_blocks) * 100.0:.1f}% done")
-        chunk_size = 1000
-        offset = 0
-        while True:
-            query = """
-              {
-                veOCEANs(first: %d, skip: %d,block:{number: %d}) {
-                  id
-                  lockedAmount
-                  unlockTime
-                  delegation {
-                    id
-                    receiver {
-                      id
-                    }
-                    amount
-                    expireTime
-                    timeLeftUnlock
-                    lockedAmount
-                    updates(orderBy:timestamp orderDirection:asc){
-                      timestamp
-                      sender
-                      amount
-                      type
-                    }
-                  }
-                }
-              }
-            """ % (
-                chunk_size,
-                offset,
-                block,
-            )
 
-            result = submit_query(query, CHAINID)
-            if "data" in result:
-                assert "veOCEANs" in result["data"]
-                veOCEANs = result["data"]["veOCEANs"]
-            else:
-                return ({}, {}, {})
-
-            if len(veOCEANs) == 0:
-                # means there are no records left
-                break
-
-            for user in veOCEANs:
-                ve_unlock_time = int(user["unlockTime"])
-                time_left_to_unlock = (
-                    ve_unlock_time - unixEpochTime
-                )  # time left in seconds
-                if time_left_to_unlock < 0:  # check if the lock has expired
-                    continue
+        for user in veOCEANs_at_blocks[block]:
+            ve_unlock_time = int(user["unlockTime"])
+            time_left_to_unlock = ve_unlock_time - unixEpochTime  # time left in seconds
+            if time_left_to_unlock < 0:  # check if the lock has expired
+                continue
 
-                # initial balance before accounting in delegations
-                balance_init = (
-                    float(user["lockedAmount"]) * time_left_to_unlock / MAX_TIME
-                )
+            # initial balance before accounting in delegations
+            balance_init = float(user["lockedAmount"]) * time_left_to_unlock / MAX_TIME
 
-                # this will the balance after accounting in delegations
-                # see the calculations below
-                balance = balance_init
+            # this will the balance after accounting in delegations
+            # see the calculations below
+            balance = balance_init
 
-                for delegation in user["delegation"]:
-                    balance, delegation_amt, delegated_to = _process_delegation(
-                        delegation, balance, unixEpochTime, time_left_to_unlock
-                    )
+            for delegation in user["delegation"]:
+                balance, delegation_amt, delegated_to = _process_delegation(
+                    delegation, balance, unixEpochTime, time_left_to_unlock
+                )
 
-                    if delegation_amt == 0:
-                        continue
+                if delegation_amt == 0:
+                    continue
 
-                    vebals.setdefault(delegated_to, 0)
-                    locked_amts.setdefault(delegated_to, 0)
-                    unlock_times.setdefault(delegated_to, 0)
-                    vebals[delegated_to] += delegation_amt
+                vebals.setdefault(delegated_to, 0)
+                locked_amts.setdefault(delegated_to, 0)
+                unlock_times.setdefault(delegated_to, 0)
+                vebals[delegated_to] += delegation_amt
 
-                if balance < 0:
-                    raise ValueError("balance < 0, something is wrong")
-                # set user balance
-                LP_addr = str(Web3.to_checksum_address(user["id"]))
-                vebals.setdefault(LP_addr, 0)
-                vebals[LP_addr] += balance
+            if balance < 0:
+                raise ValueError("balance < 0, something is wrong")
+            # set user balance
+            LP_addr = checksum_addr(user["id"])
+            vebals.setdefault(LP_addr, 0)
+            vebals[LP_addr] += balance
 
-                # set locked amount
-                locked_amts[LP_addr] = float(user["lockedAmount"])
+            # set locked amount
+            locked_amts[LP_addr] = float(user["lockedAmount"])
 
-                # set unlock time
-                unlock_times[LP_addr] = ve_unlock_time
+            # set unlock time
+            unlock_times[LP_addr] = ve_unlock_time
 
-            # increase offset
-            offset += chunk_size
         n_blocks_sampled += 1
 
     # TO DO: this assertion doesn't work with nsamples = 1, failing in test_queries all
@@ -226,14 +232,122 @@ def queryVebalances(
     return vebals, locked_amts, unlock_times
 
 
+@enforce_types
+def _queryVeOCEANsAtBlocks(
+    blocks: List[int], chainID: int, max_workers: int
+) -> Dict[int, List[dict]]:
+    """
+    @description
+      Return all veOCEAN records, as of each of the given blocks
+
+    @return
+      veOCEANs_at_blocks -- dict of [block] : list of veOCEAN records
+    """
+    return paginate_query_at_blocks(
+        "veOCEANs", VEOCEAN_FIELDS, chainID, blocks, max_workers=max_workers
+    )
+
+
+@enforce_types
+def _queryVeOCEANsAtBlocksIncremental(
+    blocks: List[int], chainID: int, max_workers: int
+) -> Dict[int, List[dict]]:
+    """
+    @description
+      Like _queryVeOCEANsAtBlocks(), but only the first block gets a full
+      snapshot. For each later block, fetch just the veOCEANs changed since
+      the previous block, and apply them to the snapshot.
+
+      A veOCEAN counts as changed if the subgraph reports a change
+      (_change_block) to it or to one of its delegations.
+
+    @return
+      veOCEANs_at_blocks -- dict of [block] : list of veOCEAN records,
+        in ascending id order
+    """
+    if not blocks:
+        return {}
+    if blocks != sorted(set(blocks)):
+        # deltas need strictly increasing blocks
+        return _queryVeOCEANsAtBlocks(blocks, chainID, max_workers)
+
+    def _fetch(block_i: int) -> Tuple[List[str], List[dict]]:
+        """@return -- ids of changed veOCEANs, and their records"""
+        block = blocks[block_i]
+        if block_i == 0:
+            records: List[dict] = []
+            for page in paginate_query(
+                "veOCEANs", VEOCEAN_FIELDS, chainID, block=block
+            ):
+                records += page
+            return [record["id"] for record in records], records
+
+        changed_ids = _queryChangedVeOCEANIds(blocks[block_i - 1] + 1, block, chainID)
+        return changed_ids, _queryVeOCEANsById(changed_ids, block, chainID)
+
+    veOCEANs_at_blocks: Dict[int, List[dict]] = {}
+    snapshot: Dict[str, dict] = {}  # [veOCEAN id] : record
+    deltas = map_concurrently(_fetch, list(range(len(blocks))), max_workers)
+    for block, (changed_ids, records) in zip(blocks, deltas):
+        for id_ in changed_ids:
+            snapshot.pop(id_, None)
+        for record in records:
+            snapshot[record["id"]] = record
+        veOCEANs_at_blocks[block] = [snapshot[id_] for id_ in sorted(snapshot)]
+
+    return veOCEANs_at_blocks
+
+
+@enforce_types
+def _queryChangedVeOCEANIds(from_block: int, block: int, chainID: int) -> List[str]:
+    """
+    @description
+      Return ids of veOCEANs that changed in blocks [from_block, block],
+      directly or via one of their delegations
+
+    @return
+      changed_ids -- sorted list of veOCEAN ids
+    """
+    where = f"_change_block: {{number_gte: {from_block}}}"
+    changed_ids: Set[str] = set()
+    for veOCEANs in paginate_query("veOCEANs", "id", chainID, where, block):
+        changed_ids.update(veOCEAN["id"] for veOCEAN in veOCEANs)
+
+    fields = "id delegator { id }"
+    for delegations in paginate_query("veDelegations", fields, chainID, where, block):
+        changed_ids.update(delegation["delegator"]["id"] for delegation in delegations)
+
+    return sorted(changed_ids)
+
+
+@enforce_types
+def _queryVeOCEANsById(ids: List[str], block: int, chainID: int) -> List[dict]:
+    """
+    @description
+      Return the veOCEAN records with the given ids, as of the given block
+
+    @return
+      veOCEANs -- list of veOCEAN records, in ascending id order
+    """
+    veOCEANs: List[dict] = []
+    for i in range(0, len(ids), CHUNK_SIZE):
+        where = f"id_in: {json.dumps(ids[i : i + CHUNK_SIZE])}"
+        for page in paginate_query("veOCEANs", VEOCEAN_FIELDS, chainID, where, block):
+            veOCEANs += page
+    return veOCEANs
+
+
 @enforce_types
 def queryAllocations(
-    rng: BlockRange, CHAINID: int
+    rng: BlockRange, CHAINID: int, max_workers: int = MAX_QUERY_WORKERS
 ) -> Dict[int, Dict[str, Dict[str, float]]]:
     """
     @description
       Return all allocations.
 
+    @arguments
+      max_workers -- max # sampled blocks to query concurrently
+
     @return
       allocations -- dict of [chain_id][nft_addr][LP_addr]: percent
     """
@@ -243,73 +357,37 @@ def queryAllocations(
 
     n_blocks = rng.num_blocks()
     n_blocks_sampled = 0
-    blocks = rng.get_blocks()
+    blocks = [int(block) for block in rng.get_blocks()]
+
+    try:
+        allocs_at_blocks = _queryVeAllocationsAtBlocks(blocks, CHAINID, max_workers)
+    except AssertionError:
+        # subgraph returned no data
+        return {}
 
     for block_i, block in enumerate(blocks):
         if (block_i % 50) == 0 or (block_i == n_blocks - 1):
             print(f"  {(block_i+1) / float(n_blocks) * 100.0:.1f}% done")
 
-        offset = 0
-        chunk_size = 1000
-        while True:
-            query = """
-            {
-              veAllocations(
-                first: %d, skip: %d, block:{number:%d}, 
-                    where:{
-                      allocated_not:"0"
-                    }
-                  ) {
-                    id
-                    allocated
-                    chainId
-                    nftAddress
-                    allocationUser {
-                      id
-                    }
-                  }
-              }
-          """ % (
-                chunk_size,
-                offset,
-                block,
-            )
-            result = submit_query(query, CHAINID)
-            if "data" in result:
-                assert "veAllocations" in result["data"]
-                _allocs = result["data"]["veAllocations"]
-            else:
-                return {}
-
-            if len(_allocs) == 0:
-                # means there are no records left
-                break
+        for allocation in allocs_at_blocks[block]:
+            LP_addr = checksum_addr(allocation["allocationUser"]["id"])
 
-            for allocation in _allocs:
-                LP_addr = str(
-                    Web3.to_checksum_address(allocation["allocationUser"]["id"])
-                )
-
-                nft_addr = str(Web3.to_checksum_address(allocation["nftAddress"]))
-                chain_id = int(allocation["chainId"])
-                allocated = float(allocation["allocated"])
-                if allocated == 0:
-                    continue
+            nft_addr = checksum_addr(allocation["nftAddress"])
+            chain_id = int(allocation["chainId"])
+            allocated = float(allocation["allocated"])
+            if allocated == 0:
+                continue
 
-                if chain_id not in allocs:
-                    allocs[chain_id] = {}
-                if nft_addr not in allocs[chain_id]:
-                    allocs[chain_id][nft_addr] = {}
+            if chain_id not in allocs:
+                allocs[chain_id] = {}
+            if nft_addr not in allocs[chain_id]:
+                allocs[chain_id][nft_addr] = {}
 
-                if LP_addr not in allocs[chain_id][nft_addr]:
-                    allocs[chain_id][nft_addr][LP_addr] = allocated
-                else:
-                    allocs[chain_id][nft_addr][LP_addr] += allocated
+            if LP_addr not in allocs[chain_id][nft_addr]:
+                allocs[chain_id][nft_addr][LP_addr] = allocated
+            else:
+                allocs[chain_id][nft_addr][LP_addr] += allocated
 
-            if len(_allocs) < chunk_size:
-                # means there are no records left
-                break
-            offset += chunk_size
         n_blocks_sampled += 1
 
     # TO DO: this assertion doesn't work with nsamples = 1, failing in test_queries all
@@ -346,6 +424,32 @@ def queryAllocations(
     return allocs
 
 
+@enforce_types
+def _queryVeAllocationsAtBlocks(
+    blocks: List[int], chainID: int, max_workers: int
+) -> Dict[int, List[dict]]:
+    """
+    @description
+      Return all nonzero veAllocation records, as of each of the given blocks
+
+    @return
+      allocs_at_blocks -- dict of [block] : list of veAllocation records
+    """
+    fields = """
+      id
+      allocated
+      chainId
+      nftAddress
+      allocationUser {
+        id
+      }
+    """
+    where = 'allocated_not: "0"'
+    return paginate_query_at_blocks(
+        "veAllocations", fields, chainID, blocks, where, max_workers=max_workers
+    )
+
+
 @enforce_types
 def queryNftinfo(chainID, endBlock="latest") -> List[SimpleDataNft]:
     """
@@ -405,35 +509,19 @@ def _queryNftinfo(chainID, endBlock) -> List[SimpleDataNft]:
       nftInfo -- list of SimpleDataNft objects
     """
     nftinfo = []
-    chunk_size = 1000
-    offset = 0
 
     if endBlock == "latest":
         w3 = networkutil.chain_id_to_web3(chainID)
         endBlock = w3.eth.get_block("latest").number
 
-    while True:
-        query = """
-      {
-         nfts(first: %d, skip: %d, block:{number:%d}) {
-            id
-            symbol
-            owner {
-              id
-            }
-        }
+    fields = """
+      id
+      symbol
+      owner {
+        id
       }
-      """ % (
-            chunk_size,
-            offset,
-            endBlock,
-        )
-        result = submit_query(query, chainID)
-        nft_records = result["data"]["nfts"]
-        if len(nft_records) == 0:
-            # means there are no records left
-            break
-
+    """
+    for nft_records in paginate_query("nfts", fields, chainID, block=endBlock):
         for nft_record in nft_records:
             nft_addr = nft_record["id"]
             _symbol = nft_record["symbol"]
@@ -446,8 +534,6 @@ def _queryNftinfo(chainID, endBlock) -> List[SimpleDataNft]:
             )
             nftinfo.append(simple_data_nft)
 
-        offset += chunk_size
-
     return nftinfo
 
 
@@ -483,74 +569,56 @@ def _calculate_gas_vols(
 @enforce_types
 def _queryVolsOwners(
     st_block: int, end_block: int, chainID: int
-) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float], Dict[str, Dict[str, float]]]:
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, str], Dict[str, Dict[str, float]]]:
     """
     @description
       Query the chain for datanft volumes within the given block range.
 
     @return
       vols (at chain) -- dict of [nativetoken/basetoken_addr][nft_addr]:vol_amt
-      owners (at chain) -- dict of [nft_addr]:vol_amt
+      owners (at chain) -- dict of [nft_addr]:owner_addr
     """
     print("_queryVolsOwners(): begin")
 
     vols: Dict[str, Dict[str, float]] = {}
     gasvols: Dict[str, Dict[str, float]] = {}
-    owners: Dict[str, float] = {}
+    owners: Dict[str, str] = {}
     txgascost: Dict[str, Dict[str, float]] = {}  # tx hash : gas cost
     native_token_addr = networkutil._CHAINID_TO_ADDRS[chainID].lower()
 
-    chunk_size = 1000  # max for subgraph = 1000
-    offset = 0
-    while True:
-        query = """
-        {
-          orders(where: {block_gte:%s, block_lte:%s}, skip:%s, first:%s) {
-            id,
-            datatoken {
-              id
-              symbol
-              nft {
-                id
-                owner{
-                  id
-                }
-              }
-              dispensers {
-                id
-              }
-            },
-            lastPriceToken{
-              id
-            },
-            lastPriceValue,
-            block,
-            gasPrice,
-            gasUsed,
-            tx
+    fields = """
+      id,
+      datatoken {
+        id
+        symbol
+        nft {
+          id
+          owner{
+            id
           }
         }
-        """ % (
-            st_block,
-            end_block,
-            offset,
-            chunk_size,
-        )
-        offset += chunk_size
-        result = submit_query(query, chainID)
-        if "errors" in result:
-            raise AssertionError(result)
-        new_orders = result["data"]["orders"]
-
-        if new_orders == []:
-            break
+        dispensers {
+          id
+        }
+      },
+      lastPriceToken{
+        id
+      },
+      lastPriceValue,
+      block,
+      gasPrice,
+      gasUsed,
+      tx
+    """
+    where = f"block_gte: {st_block}, block_lte: {end_block}"
+    for new_orders in paginate_query("orders", fields, chainID, where=where):
         for order in new_orders:
             lastPriceValue = float(order["lastPriceValue"])
             if len(order["datatoken"]["dispensers"]) == 0 and lastPriceValue == 0:
                 continue
-            basetoken_addr = order["lastPriceToken"]["id"].lower()
-            nft_addr = order["datatoken"]["nft"]["id"].lower()
-            owner_addr = order["datatoken"]["nft"]["owner"]["id"].lower()
+            basetoken_addr = lower_addr(order["lastPriceToken"]["id"])
+            nft_addr = lower_addr(order["datatoken"]["nft"]["id"])
+            owner_addr = lower_addr(order["datatoken"]["nft"]["owner"]["id"])
 
             # add owner
             owners[nft_addr] = owner_addr
@@ -604,49 +672,34 @@ def _querySwaps(
     # base token, nft addr, vol
     swaps: Dict[str, Dict[str, float]] = {}
 
-    chunk_size = 1000  # max for subgraph = 1000
-    offset = 0
-    while True:
-        query = """
-        {
-          fixedRateExchangeSwaps(where: {block_gte:%s, block_lte:%s}, skip:%s, first:%s) {
+    fields = """
+      id
+      baseTokenAmount
+      block
+      exchangeId {
+        id
+        baseToken {
+          id
+        }
+        datatoken {
+          id
+          symbol
+          nft {
             id
-            baseTokenAmount
-            block
-            exchangeId {
-              id
-              baseToken {
-                id
-              }
-              datatoken {
-                id
-                symbol
-                nft {
-                  id
-                }
-              }
-            }
           }
         }
-        """ % (
-            st_block,
-            end_block,
-            offset,
-            chunk_size,
-        )
-        offset += chunk_size
-        result = submit_query(query, chainID)
-        if "errors" in result:
-            raise AssertionError(result)
-        new_swaps = result["data"]["fixedRateExchangeSwaps"]
-        if new_swaps == []:
-            break
+      }
+    """
+    where = f"block_gte: {st_block}, block_lte: {end_block}"
+    for new_swaps in paginate_query(
+        "fixedRateExchangeSwaps", fields, chainID, where=where
+    ):
         for swap in new_swaps:
             amt = float(swap["baseTokenAmount"])
             if amt == 0:
                 continue
-            nft_addr = swap["exchangeId"]["datatoken"]["nft"]["id"].lower()
-            basetoken_addr = swap["exchangeId"]["baseToken"]["id"].lower()
+            nft_addr = lower_addr(swap["exchangeId"]["datatoken"]["nft"]["id"])
+            basetoken_addr = lower_addr(swap["exchangeId"]["baseToken"]["id"])
             if basetoken_addr not in swaps:
                 swaps[basetoken_addr] = {}
             if nft_addr not in swaps[basetoken_addr]:
@@ -688,8 +741,13 @@ def queryPassiveRewards(
     if ve_supply_float == 0:
         return balances, rewards
 
-    for addr in addresses:
-        balance = fee_distributor.ve_for_at(addr, timestamp)
+    # one batch of calls, rather than a call per address
+    fns = [
+        fee_distributor.contract.functions.ve_for_at(checksum_addr(addr), timestamp)
+        for addr in addresses
+    ]
+    ve_balances = raise_errors(batch_contract_calls(fns))
+    for addr, balance in zip(addresses, ve_balances):
         balance_float = from_wei(balance)
         balances[addr] = balance_float
         rewards[addr] = total_rewards_float * balance_float / ve_supply_float
@@ -816,13 +874,13 @@ def _filterNftvols(nftvols: dict, chainID: int) -> dict:
 
     for basetoken_addr in nftvols:
         for nft_addr in nftvols[basetoken_addr]:
-            nft_dids.append(oceanutil.calc_did(nft_addr, chainID))
+            nft_dids.append(nft_did(nft_addr, chainID))
 
-    filtered_dids = _filterDids(nft_dids)
+    filtered_dids = set(_filterDids(nft_dids))
 
     for basetoken_addr in nftvols:
         for nft_addr in nftvols[basetoken_addr]:
-            did = oceanutil.calc_did(nft_addr, chainID)
+            did = nft_did(nft_addr, chainID)
             if did in filtered_dids:
                 if basetoken_addr not in filtered_nftvols:
                     filtered_nftvols[basetoken_addr] = {}
@@ -894,12 +952,26 @@ _ADDR_TO_SYMBOL = networkutil._ADDRS_TO_SYMBOL  # address : TOKEN_symbol
 @enforce_types
 def symbol(web3, addr: str):
     """Returns token symbol, given its address."""
-    global _ADDR_TO_SYMBOL
-    if addr not in _ADDR_TO_SYMBOL:
-        _symbol = ContractBase(web3, "OceanToken", addr).symbol()
-        _symbol = _symbol.upper()  # follow lower-upper rules
-        _ADDR_TO_SYMBOL[addr] = _symbol
-    return _ADDR_TO_SYMBOL[addr]
+    return symbols(web3, [addr])[addr]
+
+
+@enforce_types
+def symbols(web3, addrs: List[str]) -> Dict[str, str]:
+    """
+    @description
+      Returns dict of [addr] : token symbol, given token addresses.
+      Symbols that aren't known yet get queried in one batch of calls.
+    """
+    unknown_addrs = [
+        addr for addr in dict.fromkeys(addrs) if addr not in _ADDR_TO_SYMBOL
+    ]
+    fns = [
+        load_contract(web3, "OceanToken", addr).functions.symbol()
+        for addr in unknown_addrs
+    ]
+    for addr, _symbol in zip(unknown_addrs, raise_errors(batch_contract_calls(fns))):
+        _ADDR_TO_SYMBOL[addr] = _symbol.upper()  # follow lower-upper rules
+    return {addr: _ADDR_TO_SYMBOL[addr] for addr in addrs}
 
 
 @enforce_types
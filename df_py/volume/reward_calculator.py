@@ -1,15 +1,98 @@
-from typing import Dict, List, Tuple
+import copy
+import math
+import warnings
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 from enforce_typing import enforce_types
+from scipy import sparse
 
 from df_py.predictoor.queries import query_predictoor_contracts
-from df_py.util.constants import DEPLOYER_ADDRS, TARGET_WPY
+from df_py.util.addr_registry import lower_addr
+from df_py.util.constants import (
+    DEPLOYER_ADDRS,
+    MAX_N_RANK_ASSETS,
+    RANK_SCALE_OP,
+    TARGET_WPY,
+)
 from df_py.util.dcv_multiplier import calc_dcv_multiplier
 from df_py.volume import cleancase as cc
 from df_py.volume.rank import rank_based_allocate
 from df_py.volume.to_usd import nft_vols_to_usd
 
+# If at most this fraction of (LP, nft) pairs have stake, S, L and R are
+# scipy.sparse matrices rather than dense arrays
+SPARSE_DENSITY_THRESHOLD = 0.05
+
+# 2d array of [LP i, chain_nft j]; see SPARSE_DENSITY_THRESHOLD
+Matrix = Union[np.ndarray, sparse.csr_matrix]
+
+
+def _sparse_values_at(A, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Return 1d array of A[i[k], j[k]] for sparse matrix A; 0.0 if not stored"""
+    A = sparse.coo_matrix(A)
+    if A.nnz == 0:
+        return np.zeros(len(i), dtype=float)
+
+    # look up flat indices by binary search
+    N_j = A.shape[1]
+    A_keys = A.row.astype(np.int64) * N_j + A.col
+    order = np.argsort(A_keys)
+    A_keys, A_vals = A_keys[order], A.data[order]
+
+    keys = i.astype(np.int64) * N_j + j
+    pos = np.minimum(np.searchsorted(A_keys, keys), len(A_keys) - 1)
+    return np.where(A_keys[pos] == keys, A_vals[pos], 0.0)
+
+
+def _or(value, default):
+    """Return value, or default if value is None"""
+    return default if value is None else value
+
+
+def _nonzeros(v) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (indices, values) of the nonzero entries of a 1d np array or of a
+    sparse row / column, in index order
+    """
+    if sparse.issparse(v):
+        v = sparse.coo_matrix(v)
+        idx = v.col if v.shape[0] == 1 else v.row
+        order = np.argsort(idx, kind="stable")
+        idx, vals = idx[order], v.data[order]
+        return idx[vals != 0.0], vals[vals != 0.0]
+
+    idx = np.nonzero(v)[0]
+    return idx, v[idx]
+
+
+def _set_or_pop(d: dict, key1, key2, value):
+    """Set d[key1][key2] = value, or remove it (and empty d[key1]) if falsy"""
+    if value:
+        d.setdefault(key1, {})[key2] = value
+    elif key2 in d.get(key1, {}):
+        del d[key1][key2]
+        if not d[key1]:
+            del d[key1]
+
+
+def _diff_rewards(name: str, a: dict, b: dict, rel_tol: float) -> List[str]:
+    """Return a description of each leaf where nested dicts a & b differ"""
+    if not isinstance(a, dict) or not isinstance(b, dict):
+        if math.isclose(a, b, rel_tol=rel_tol):
+            return []
+        return [f"{name}: {a} != {b}"]
+
+    diffs = []
+    for key in sorted(set(a) | set(b), key=str):
+        if key not in b:
+            diffs.append(f"{name}[{key!r}]: only in incremental")
+        elif key not in a:
+            diffs.append(f"{name}[{key!r}]: only in full recompute")
+        else:
+            diffs += _diff_rewards(f"{name}[{key!r}]", a[key], b[key], rel_tol)
+    return diffs
+
 
 def freeze_attributes(func):
     # makes sure the state is not changed during the function call
@@ -24,6 +107,37 @@ def freeze_attributes(func):
     return wrapper
 
 
+@enforce_types
+class RewardScenario:
+    """
+    One set of reward parameters, for RewardCalculator.calculate_scenarios().
+    OCEAN_avail, do_pubrewards and do_rank default to the calculator's.
+    """
+
+    def __init__(
+        self,
+        OCEAN_avail: Optional[float] = None,
+        do_pubrewards: Optional[bool] = None,
+        do_rank: Optional[bool] = None,
+        rank_scale_op: str = RANK_SCALE_OP,
+        max_n_rank_assets: int = MAX_N_RANK_ASSETS,
+        target_wpy: float = TARGET_WPY,
+    ):
+        self.OCEAN_avail = OCEAN_avail
+        self.do_pubrewards = do_pubrewards
+        self.do_rank = do_rank
+        self.rank_scale_op = rank_scale_op
+        self.max_n_rank_assets = max_n_rank_assets
+        self.target_wpy = target_wpy
+
+    def __repr__(self) -> str:
+        return (
+            f"RewardScenario({self.OCEAN_avail}, {self.do_pubrewards}, "
+            f"{self.do_rank}, '{self.rank_scale_op}', {self.max_n_rank_assets}, "
+            f"{self.target_wpy})"
+        )
+
+
 # pylint: disable=too-many-instance-attributes
 class RewardCalculator:
     def __setattr__(self, attr, value):
@@ -68,8 +182,11 @@ class RewardCalculator:
 
         self.nftvols_USD = nft_vols_to_usd(self.nftvols, self.symbols, self.rates)
 
-        self.chain_nft_tups = self._get_chain_nft_tups()
-        self.LP_addrs = self._get_lp_addrs()
+        self.chain_nft_tups: List[Tuple[int, str]]
+        self.LP_addrs: List[str]
+        self.chain_nft_index: Dict[Tuple[int, str], int]  # [(chainID, nft)] : j
+        self.LP_index: Dict[str, int]  # [LP_addr] : i
+        self._set_tups()
 
         self.df_week = df_week
         self.OCEAN_avail = OCEAN_avail
@@ -79,14 +196,18 @@ class RewardCalculator:
         self.predictoor_feed_addrs = self._get_predictoor_feed_addrs()
 
         # will be filled in by calculate()
-        self.S: np.ndarray
+        self.S: Matrix
         self.V_USD: np.ndarray
         self.M: np.ndarray
-        self.R: np.ndarray
-        self.L: np.ndarray
+        self.R: Matrix
+        self.L: Matrix
 
         self.C: np.ndarray
 
+        # rewardsperlp & rewardsinfo; see _reward_array_to_dicts()
+        self.rewardsperlp: dict
+        self.rewardsinfo: dict
+
         self._freeze_attributes = True
 
     @enforce_types
@@ -102,108 +223,630 @@ class RewardCalculator:
             self._stake_vol_owner_dicts_to_arrays()
         )
         self.R = self.calc_rewards__usd()
+        self.rewardsperlp, self.rewardsinfo = self._reward_array_to_dicts()
 
         self._freeze_attributes = True
 
-        (rewardsperlp, rewardsinfo) = self._reward_array_to_dicts()
+        return self.rewardsperlp, self.rewardsinfo
 
-        return rewardsperlp, rewardsinfo
+    # ======================================================================
+    # incremental updates, after calculate()
+
+    @enforce_types
+    def update_stake(
+        self,
+        chainID: int,
+        nft_addr: str,
+        LP_addr: str,
+        stake: float,
+        locked_amt: Optional[float] = None,
+        verify: bool = False,
+    ) -> Tuple[dict, dict]:
+        """
+        @description
+          Set LP's stake (and optionally its locked OCEAN) on an nft, then
+          recompute rewards of just that nft.
+
+          A new LP or a newly staked nft changes the shape of S, so it
+          triggers a full recompute.
+
+        @arguments
+          verify -- if True, also do a full recompute and assert equality
+
+        @return
+          rewardsperlp, rewardsinfo -- like calculate(), patched in place
+        """
+        self._freeze_attributes = False
+        nft_addr, LP_addr = lower_addr(nft_addr), lower_addr(LP_addr)
+
+        known_nft = nft_addr in self.stakes.get(chainID, {})
+        self.stakes.setdefault(chainID, {}).setdefault(nft_addr, {})[LP_addr] = stake
+        if locked_amt is not None:
+            locked_amts = self.locked_ocean_amts.setdefault(chainID, {})
+            locked_amts.setdefault(nft_addr, {})[LP_addr] = locked_amt
+
+        j = self.chain_nft_index.get((chainID, nft_addr))
+        i = self.LP_index.get(LP_addr)
+        if not known_nft or j is None or i is None:
+            return self._recalculate_all(verify)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", sparse.SparseEfficiencyWarning)
+            self.S[i, j] = stake
+            if locked_amt is not None:
+                self.L[i, j] = locked_amt
+
+        return self._update_columns([j], self._calc_perc_per_j(), verify)
+
+    @enforce_types
+    def update_nftvol(
+        self,
+        chainID: int,
+        basetoken_addr: str,
+        nft_addr: str,
+        vol: float,
+        verify: bool = False,
+    ) -> Tuple[dict, dict]:
+        """
+        @description
+          Set the volume of an nft in a basetoken, then recompute rewards of
+          that nft, plus of any nfts whose perc_per_j moved (e.g. ranks shift).
+
+        @arguments
+          verify -- if True, also do a full recompute and assert equality
+
+        @return
+          rewardsperlp, rewardsinfo -- like calculate(), patched in place
+        """
+        self._freeze_attributes = False
+        basetoken_addr, nft_addr = lower_addr(basetoken_addr), lower_addr(nft_addr)
+        nftvols = self.nftvols.setdefault(chainID, {})
+        nftvols.setdefault(basetoken_addr, {})[nft_addr] = vol
+
+        return self._update_V_USD(verify)
+
+    @enforce_types
+    def update_rate(
+        self, symbol: str, rate: float, verify: bool = False
+    ) -> Tuple[dict, dict]:
+        """
+        @description
+          Set the USD rate of a basetoken, then recompute rewards of the nfts
+          it affects. A new OCEAN rate affects all nfts.
+
+        @arguments
+          verify -- if True, also do a full recompute and assert equality
+
+        @return
+          rewardsperlp, rewardsinfo -- like calculate(), patched in place
+        """
+        self._freeze_attributes = False
+        symbol = symbol.upper()
+        self.rates[symbol] = rate
+        if symbol == "OCEAN":
+            return self._recalculate_all(verify)
+
+        return self._update_V_USD(verify)
+
+    @enforce_types
+    def update_OCEAN_avail(
+        self, OCEAN_avail: float, verify: bool = False
+    ) -> Tuple[dict, dict]:
+        """
+        @description
+          Set the OCEAN budget, then recompute rewards. Affects all nfts, but
+          doesn't rebuild S, L etc.
+
+        @arguments
+          verify -- if True, also do a full recompute and assert equality
+
+        @return
+          rewardsperlp, rewardsinfo -- like calculate(), patched in place
+        """
+        self._freeze_attributes = False
+        self.OCEAN_avail = OCEAN_avail
+        N_j = len(self.chain_nft_tups)
+
+        return self._update_columns(range(N_j), self._calc_perc_per_j(), verify)
+
+    def _update_V_USD(self, verify: bool) -> Tuple[dict, dict]:
+        """Refresh nftvols_USD & V_USD after a volume or rate change"""
+        old_perc_per_j = self._calc_perc_per_j()
+        self.nftvols_USD = nft_vols_to_usd(self.nftvols, self.symbols, self.rates)
+        if self._get_chain_nft_tups() != self.chain_nft_tups:
+            return self._recalculate_all(verify)
+
+        V_USD = np.array(
+            [
+                self.nftvols_USD[chainID].get(nft_addr, 0.0)
+                for chainID, nft_addr in self.chain_nft_tups
+            ],
+            dtype=float,
+        )
+        js = np.nonzero(V_USD != self.V_USD)[0]
+        self.V_USD = V_USD
+
+        return self._update_columns(js, old_perc_per_j, verify)
+
+    def _update_columns(
+        self, js: Iterable[int], old_perc_per_j: np.ndarray, verify: bool
+    ) -> Tuple[dict, dict]:
+        """
+        @description
+          Recompute columns js of R, plus any column whose perc_per_j moved.
+          Then patch rewardsperlp & rewardsinfo for the affected entries.
+        """
+        perc_per_j = self._calc_perc_per_j()
+        moved_js = np.nonzero(perc_per_j != old_perc_per_j)[0]
+        js = np.union1d(np.fromiter(js, dtype=int), moved_js).astype(int)
+
+        if len(js) == len(self.chain_nft_tups):
+            self.R = self.calc_rewards__usd()
+            self._replace_reward_dicts(*self._reward_array_to_dicts())
+            return self._finish_update(verify)
+
+        R_js = self._calc_rewards_columns(js, perc_per_j)
+        R_js[R_js < 0.000001] = 0.0  # filter negligible values
+
+        old_is = self.R[:, js].nonzero()[0]
+        self._set_R_columns(js, R_js)
+        new_is = R_js.nonzero()[0]
+
+        # postconditions, over all of R
+        R_vals = self.R.data if sparse.issparse(self.R) else self.R
+        assert not np.isnan(np.min(R_vals, initial=0.0)), R_vals
+        total = np.sum(R_vals)
+        tol = 1e-13
+        assert total <= self.OCEAN_avail * (1 + tol), (total, self.OCEAN_avail)
+        if total > self.OCEAN_avail:  # every entry shrinks
+            self.R = self.R / (1 + tol)
+            self._replace_reward_dicts(*self._reward_array_to_dicts())
+            return self._finish_update(verify)
+
+        self._patch_reward_dicts(js, np.union1d(old_is, new_is).astype(int))
+        return self._finish_update(verify)
+
+    def _set_R_columns(self, js: np.ndarray, R_js: np.ndarray):
+        """Overwrite columns js of R with R_js"""
+        if not sparse.issparse(self.R):
+            self.R[:, js] = R_js
+            return
+
+        keep = np.ones(self.R.shape[1], dtype=float)
+        keep[js] = 0.0
+        R = sparse.csr_matrix(self.R @ sparse.diags(keep))
+        block = sparse.coo_matrix(R_js)
+        R += sparse.csr_matrix(
+            (block.data, (block.row, js[block.col])), shape=self.R.shape
+        )
+        R.eliminate_zeros()
+        self.R = R
+
+    def _patch_reward_dicts(self, js: np.ndarray, LP_is: np.ndarray):
+        """
+        @description
+          Bring rewardsinfo up to date for nfts js, and rewardsperlp for LPs
+          LP_is, from R. Sums run in the same order as _reward_array_to_dicts()
+        """
+        for j in js:
+            chainID, nft_addr = self.chain_nft_tups[j]
+            LP_is_j, R_j = _nonzeros(self.R[:, j])
+            rewards_j = {self.LP_addrs[i]: R_ij for i, R_ij in zip(LP_is_j, R_j)}
+            _set_or_pop(self.rewardsinfo, chainID, nft_addr, rewards_j)
+
+        chain_of_j = np.array([chainID for chainID, _ in self.chain_nft_tups])
+        chainIDs = {self.chain_nft_tups[j][0] for j in js}
+        for i in LP_is:
+            LP_addr = self.LP_addrs[i]
+            row_js, R_i = _nonzeros(self.R[i, :])
+            for chainID in chainIDs:
+                reward = 0.0
+                for R_ij in R_i[chain_of_j[row_js] == chainID]:
+                    reward += R_ij
+                _set_or_pop(self.rewardsperlp, chainID, LP_addr, reward)
+
+    def _replace_reward_dicts(self, rewardsperlp: dict, rewardsinfo: dict):
+        """Swap in new contents, keeping the dicts that callers hold"""
+        self.rewardsperlp.clear()
+        self.rewardsperlp.update(rewardsperlp)
+        self.rewardsinfo.clear()
+        self.rewardsinfo.update(rewardsinfo)
+
+    def _recalculate_all(self, verify: bool) -> Tuple[dict, dict]:
+        """Full recompute, for when the set of LPs or nfts changed"""
+        rewardsperlp, rewardsinfo = self.rewardsperlp, self.rewardsinfo
+        self._refresh_tups()
+        self.calculate()
+
+        self._freeze_attributes = False
+        new_dicts = self.rewardsperlp, self.rewardsinfo
+        self.rewardsperlp, self.rewardsinfo = rewardsperlp, rewardsinfo
+        self._replace_reward_dicts(*new_dicts)
+        return self._finish_update(verify)
+
+    def _refresh_tups(self):
+        """Recompute what __init__ derives from the input dicts"""
+        self.nftvols_USD = nft_vols_to_usd(self.nftvols, self.symbols, self.rates)
+        self._set_tups()
+        for chainID in self.stakes:
+            self.predictoor_feed_addrs.setdefault(chainID, [])
+
+    def _set_tups(self):
+        """Set chain_nft_tups & LP_addrs from the input dicts, and their indices"""
+        self.chain_nft_tups = self._get_chain_nft_tups()
+        self.LP_addrs = self._get_lp_addrs()
+        self.chain_nft_index = {tup: j for j, tup in enumerate(self.chain_nft_tups)}
+        self.LP_index = {LP_addr: i for i, LP_addr in enumerate(self.LP_addrs)}
+
+    def _finish_update(self, verify: bool) -> Tuple[dict, dict]:
+        self._freeze_attributes = True
+        if verify:
+            self.verify()
+        return self.rewardsperlp, self.rewardsinfo
+
+    @enforce_types
+    def verify(self, rel_tol: float = 1e-9):
+        """
+        @description
+          Recompute everything from the input dicts, on a copy, and assert
+          that rewardsperlp & rewardsinfo match. Use after update_*() calls.
+        """
+        full = copy.copy(self)
+        full._freeze_attributes = False  # pylint: disable=protected-access
+        full._refresh_tups()  # pylint: disable=protected-access
+        full.calculate()
+
+        diffs = _diff_rewards(
+            "rewardsperlp", self.rewardsperlp, full.rewardsperlp, rel_tol
+        )
+        diffs += _diff_rewards(
+            "rewardsinfo", self.rewardsinfo, full.rewardsinfo, rel_tol
+        )
+        assert not diffs, "incremental != full recompute:\n" + "\n".join(diffs)
+
+    @freeze_attributes
+    @enforce_types
+    def calculate_scenarios(
+        self, scenarios: List[RewardScenario]
+    ) -> Tuple[np.ndarray, List[Dict[int, Dict[str, float]]]]:
+        """
+        @description
+          Evaluate many sets of reward parameters at once, for what-if
+          comparisons. Inputs get cleaned and turned into arrays just once.
+          Then all scenarios are computed together, as 2d arrays of
+          [scenario k, stake entry], over the nonzero stakes only.
+
+          Doesn't change the calculator's state; calculate() is independent.
+
+        @return
+          totals -- 1d array of [scenario k] -- total OCEAN rewarded
+          rewardsperlp_per_scenario -- list of rewardsperlp, one per scenario.
+            Each is a dict of [chainID][LP_addr] : OCEAN_reward_float
+        """
+        S, V_USD, M, C, L = self._stake_vol_owner_dicts_to_arrays()
+        N_k = len(scenarios)
+        if sparse.issparse(S):
+            S = sparse.coo_matrix(S)
+            i, j, stake_ij = S.row, S.col, S.data
+            ocean_locked_ij = _sparse_values_at(L, i, j)
+        else:
+            i, j = np.nonzero(S)
+            stake_ij, ocean_locked_ij = S[i, j], L[i, j]
+
+        OCEAN_avail = np.array(
+            [_or(sc.OCEAN_avail, self.OCEAN_avail) for sc in scenarios], dtype=float
+        )
+        do_pubrewards = np.array(
+            [_or(sc.do_pubrewards, self.do_pubrewards) for sc in scenarios], bool
+        )
+        target_wpy = np.array([sc.target_wpy for sc in scenarios], dtype=float)
+
+        R = np.zeros((N_k, len(stake_ij)), dtype=float)  # [scenario k, entry]
+        if N_k > 0 and np.sum(V_USD) > 0.0:
+            # stake_kij: owners get rewarded as if 2x stake on their asset
+            boost = np.where(i == C[j], 2.0, 1.0)
+            stake_kij = np.where(do_pubrewards[:, None], stake_ij * boost, stake_ij)
+            stake_kj = np.stack(
+                [np.bincount(j, weights=w, minlength=len(V_USD)) for w in stake_kij]
+            )
+            perc_per_kj = np.stack(
+                [self._scenario_perc_per_j(sc, V_USD) for sc in scenarios]
+            )
+
+            DCV_OCEAN_j = V_USD / self.rates["OCEAN"]
+            stake_at_kij = stake_kj[:, j]
+            zero_kij = (stake_at_kij == 0.0) | (DCV_OCEAN_j[j] == 0.0)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                perc_at_kij = stake_kij / stake_at_kij
+
+                # main formula, as in calc_rewards__usd()
+                R = np.fmin(
+                    np.fmin(
+                        perc_per_kj[:, j] * perc_at_kij * OCEAN_avail[:, None],
+                        ocean_locked_ij * target_wpy[:, None],
+                    ),
+                    DCV_OCEAN_j[j] * perc_at_kij * M[j],
+                )
+            R[zero_kij] = 0.0
+
+            # filter negligible values, then postconditions per scenario
+            R[R < 0.000001] = 0.0
+            assert not np.isnan(R).any(), R
+            totals = np.sum(R, axis=1)
+            tol = 1e-13
+            assert (totals <= OCEAN_avail * (1 + tol)).all(), (totals, OCEAN_avail)
+            R[totals > OCEAN_avail] /= 1 + tol
+
+        return np.sum(R, axis=1), self._scenario_rewardsperlp(R, i, j)
+
+    @freeze_attributes
+    @enforce_types
+    def _scenario_perc_per_j(
+        self, scenario: RewardScenario, V_USD: np.ndarray
+    ) -> np.ndarray:
+        """
+        @return
+          perc_per_j -- 1d array of [chain_nft j] -- percentage, for this scenario
+        """
+        if _or(scenario.do_rank, self.do_rank):
+            return rank_based_allocate(
+                V_USD,
+                max_n_rank_assets=scenario.max_n_rank_assets,
+                rank_scale_op=scenario.rank_scale_op,
+            )
+        return V_USD / np.sum(V_USD)
+
+    @freeze_attributes
+    @enforce_types
+    def _scenario_rewardsperlp(
+        self, R: np.ndarray, i: np.ndarray, j: np.ndarray
+    ) -> List[Dict[int, Dict[str, float]]]:
+        """
+        @arguments
+          R -- 2d array of [scenario k, entry] -- rewards in OCEAN
+          i, j -- 1d arrays of [entry] -- LP index, chain_nft index
+
+        @return
+          rewardsperlp_per_scenario -- list of dict of [chainID][LP_addr] : OCEAN
+        """
+        chainIDs = sorted({chainID for chainID, _ in self.chain_nft_tups})
+        chain_index = {chainID: c for c, chainID in enumerate(chainIDs)}
+        chain_of_j = np.array(
+            [chain_index[chainID] for chainID, _ in self.chain_nft_tups], dtype=int
+        )
+
+        # sum over nfts, grouped by (chain c, LP i)
+        N_i = len(self.LP_addrs)
+        keys = chain_of_j[j] * N_i + i
+        n_keys = len(chainIDs) * N_i
+
+        rewardsperlp_per_scenario = []
+        for R_k in R:
+            sums = np.bincount(keys, weights=R_k, minlength=n_keys)
+            rewardsperlp: Dict[int, Dict[str, float]] = {}
+            for key in np.nonzero(sums)[0]:
+                chainID = chainIDs[key // N_i]
+                LP_addr = self.LP_addrs[key % N_i]
+                rewardsperlp.setdefault(chainID, {})[LP_addr] = float(sums[key])
+            rewardsperlp_per_scenario.append(rewardsperlp)
+
+        return rewardsperlp_per_scenario
 
     @freeze_attributes
     @enforce_types
     def _stake_vol_owner_dicts_to_arrays(
         self,
-    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    ) -> Tuple[Matrix, np.ndarray, np.ndarray, np.ndarray, Matrix]:
         """
         @return
           S -- 2d array of [LP i, chain_nft j] -- stake for each {i,j}, in veOCEAN
           V_USD -- 1d array of [chain_nft j] -- nftvol for each {j}, in USD
+          M -- 1d array of [chain_nft j] -- DCV multiplier for each {j}
+          C -- 1d array of [chain_nft j] -- LP index i of owner of {j}, or -1
+          L -- 2d array of [LP i, chain_nft j] -- locked OCEAN for each {i,j}
+
+        @notes
+          S and L are csr matrices if they're sparse enough, else np arrays
         """
         N_j = len(self.chain_nft_tups)
         N_i = len(self.LP_addrs)
 
         M = np.zeros(N_j, dtype=float)
-        S = np.zeros((N_i, N_j), dtype=float)
         V_USD = np.zeros(N_j, dtype=float)
         C = np.zeros(N_j, dtype=int)
-        L = np.zeros((N_i, N_j), dtype=float)
+
+        # (i, j, value) of each nonzero entry, scattered into S & L at the end
+        S_i: List[int] = []
+        S_j: List[int] = []
+        S_vals: List[float] = []
+        L_i: List[int] = []
+        L_j: List[int] = []
+        L_vals: List[float] = []
 
         for j, (chainID, nft_addr) in enumerate(self.chain_nft_tups):
-            for i, LP_addr in enumerate(self.LP_addrs):
-                assert nft_addr in self.stakes[chainID], "each tup should be in stakes"
-                S[i, j] = self.stakes[chainID][nft_addr].get(LP_addr, 0.0)
-                L[i, j] = self.locked_ocean_amts[chainID][nft_addr].get(LP_addr, 0.0)
+            assert nft_addr in self.stakes[chainID], "each tup should be in stakes"
+            for LP_addr, stake in self.stakes[chainID][nft_addr].items():
+                if LP_addr in self.LP_index and stake != 0.0:
+                    S_i.append(self.LP_index[LP_addr])
+                    S_j.append(j)
+                    S_vals.append(stake)
+
+            locked_amts_j = self.locked_ocean_amts[chainID].get(nft_addr, {})
+            for LP_addr, amt in locked_amts_j.items():
+                if LP_addr in self.LP_index and amt != 0.0:
+                    L_i.append(self.LP_index[LP_addr])
+                    L_j.append(j)
+                    L_vals.append(amt)
+
             V_USD[j] += self.nftvols_USD[chainID].get(nft_addr, 0.0)
 
             M[j] = calc_dcv_multiplier(
                 self.df_week, nft_addr in self.predictoor_feed_addrs[chainID]
             )
 
-            owner_addr = self.owners[chainID][nft_addr]
-            C[j] = (
-                -1
-                if owner_addr not in self.LP_addrs
-                else self.LP_addrs.index(owner_addr)
-            )
+            # -1 = owner didn't stake
+            C[j] = self.LP_index.get(self.owners[chainID][nft_addr], -1)
+
+        if len(S_vals) <= SPARSE_DENSITY_THRESHOLD * N_i * N_j:
+            S = sparse.csr_matrix((S_vals, (S_i, S_j)), shape=(N_i, N_j), dtype=float)
+            L = sparse.csr_matrix((L_vals, (L_i, L_j)), shape=(N_i, N_j), dtype=float)
+            return S, V_USD, M, C, L
+
+        S = np.zeros((N_i, N_j), dtype=float)
+        L = np.zeros((N_i, N_j), dtype=float)
+        S[S_i, S_j] = S_vals
+        L[L_i, L_j] = L_vals
 
         return S, V_USD, M, C, L
 
     @freeze_attributes
     @enforce_types
-    def calc_rewards__usd(self) -> np.ndarray:
+    def calc_rewards__usd(self) -> Matrix:
         """
         @return
-          R -- 2d array of [LP i, chain_nft j] -- rewards denominated in OCEAN
+          R -- 2d array of [LP i, chain_nft j] -- rewards denominated in OCEAN.
+            A csr matrix if S is one, else an np array
         """
+        if sparse.issparse(self.S):
+            return self._calc_rewards__usd_sparse()
+
         N_i, N_j = self.S.shape
 
         # corner case
         if np.sum(self.V_USD) == 0.0:
             return np.zeros((N_i, N_j), dtype=float)
 
-        S = np.copy(self.S)
-        L = np.copy(self.L)
-        # modify S's: owners get rewarded as if 2x stake on their asset
-        if self.do_pubrewards:
-            for j in range(N_j):
-                if self.C[j] != -1:  # -1 = owner didn't stake
-                    S[self.C[j], j] *= 2.0
-        # perc_per_j
+        R = self._calc_rewards_columns(np.arange(N_j), self._calc_perc_per_j())
+
+        return self._filter_and_check_rewards(R)
+
+    @freeze_attributes
+    @enforce_types
+    def _calc_perc_per_j(self) -> np.ndarray:
+        """
+        @return
+          perc_per_j -- 1d array of [chain_nft j] -- percentage of OCEAN_avail
+        """
+        if np.sum(self.V_USD) == 0.0:
+            return np.zeros(len(self.V_USD), dtype=float)
         if self.do_rank:
-            perc_per_j = rank_based_allocate(self.V_USD)
+            return rank_based_allocate(self.V_USD)
+        return self.V_USD / np.sum(self.V_USD)
+
+    @freeze_attributes
+    @enforce_types
+    def _calc_rewards_columns(
+        self, js: np.ndarray, perc_per_j: np.ndarray
+    ) -> np.ndarray:
+        """
+        @description
+          Apply the reward formula to columns js of S & L. No postconditions.
+
+        @return
+          R_js -- 2d array of [LP i, column index into js] -- rewards in OCEAN
+        """
+        if sparse.issparse(self.S):
+            S = sparse.csc_matrix(self.S)[:, js].toarray()
+            L = sparse.csc_matrix(self.L)[:, js].toarray()
         else:
-            perc_per_j = self.V_USD / np.sum(self.V_USD)
+            S = self.S[:, js]  # fancy indexing copies
+            L = self.L[:, js]
+
+        # modify S's: owners get rewarded as if 2x stake on their asset
+        if self.do_pubrewards:
+            owned = np.nonzero(self.C[js] != -1)[0]  # -1 = owner didn't stake
+            S[self.C[js][owned], owned] *= 2.0
+
+        # compute rewards. Rows are i, columns are j in js
+        stake_j = np.sum(S, axis=0)
+        DCV_OCEAN_j = self.V_USD[js] / self.rates["OCEAN"]
+        zero_j = (stake_j == 0.0) | (DCV_OCEAN_j == 0.0)
+        perc_per_j = perc_per_j[js]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            perc_at_ij = S / stake_j
+
+            # main formula!
+            # reward amount in OCEAN. fmin ignores the nans of 0 * inf multiplier
+            R = np.fmin(
+                np.fmin(
+                    perc_per_j * perc_at_ij * self.OCEAN_avail,
+                    L * TARGET_WPY,  # bound rewards by max APY
+                ),
+                DCV_OCEAN_j * perc_at_ij * self.M[js],  # bound rewards by DCV
+            )
+        R[:, zero_j] = 0.0
+
+        return R
+
+    @freeze_attributes
+    @enforce_types
+    def _calc_rewards__usd_sparse(self) -> sparse.csr_matrix:
+        """
+        @description
+          Like calc_rewards__usd(), for csr S and L. Only visits the
+          nonzero stakes, since R[i, j] is 0 wherever S[i, j] is.
+
+        @return
+          R -- csr matrix of [LP i, chain_nft j] -- rewards denominated in OCEAN
+        """
+        N_i, N_j = self.S.shape
 
-        # compute rewards
-        R = np.zeros((N_i, N_j), dtype=float)
-        for j in range(N_j):
-            stake_j = sum(S[:, j])
-            multiplier = self.M[j]
-            DCV_OCEAN_j = self.V_USD[j] / self.rates["OCEAN"]
-            if stake_j == 0.0 or DCV_OCEAN_j == 0.0:
-                continue
+        # corner case
+        if np.sum(self.V_USD) == 0.0:
+            return sparse.csr_matrix((N_i, N_j), dtype=float)
+
+        S = sparse.coo_matrix(self.S)
+        i, j, stake_ij = S.row, S.col, np.copy(S.data)
+
+        # modify S's: owners get rewarded as if 2x stake on their asset
+        if self.do_pubrewards:
+            stake_ij[i == self.C[j]] *= 2.0  # C[j] = -1 never matches
+        stake_j = np.bincount(j, weights=stake_ij, minlength=N_j)
 
-            for i in range(N_i):
-                perc_at_j = perc_per_j[j]
+        perc_per_j = self._calc_perc_per_j()
 
-                stake_ij = S[i, j]
-                perc_at_ij = stake_ij / stake_j
+        # compute rewards, just for {i,j} where stake_j and DCV_OCEAN_j are >0
+        DCV_OCEAN_j = self.V_USD / self.rates["OCEAN"]
+        keep = (stake_j[j] != 0.0) & (DCV_OCEAN_j[j] != 0.0)
+        i, j, stake_ij = i[keep], j[keep], stake_ij[keep]
 
-                ocean_locked_ij = L[i, j]
+        perc_at_ij = stake_ij / stake_j[j]
+        ocean_locked_ij = _sparse_values_at(self.L, i, j)
 
-                # main formula!
-                # reward amount in OCEAN
-                R[i, j] = min(
-                    perc_at_j * perc_at_ij * self.OCEAN_avail,
+        # main formula!
+        # reward amount in OCEAN. fmin ignores the nans of 0 * inf multiplier
+        with np.errstate(invalid="ignore"):
+            R_vals = np.fmin(
+                np.fmin(
+                    perc_per_j[j] * perc_at_ij * self.OCEAN_avail,
                     ocean_locked_ij * TARGET_WPY,  # bound rewards by max APY
-                    DCV_OCEAN_j * perc_at_ij * multiplier,  # bound rewards by DCV
-                )
+                ),
+                DCV_OCEAN_j[j] * perc_at_ij * self.M[j],  # bound rewards by DCV
+            )
+        R_vals = self._filter_and_check_rewards(R_vals)
+
+        R = sparse.csr_matrix((R_vals, (i, j)), shape=(N_i, N_j), dtype=float)
+        R.eliminate_zeros()
+        return R
+
+    @freeze_attributes
+    @enforce_types
+    def _filter_and_check_rewards(self, R: np.ndarray) -> np.ndarray:
+        """
+        @description
+          Zero out negligible rewards, then check postconditions: no nans,
+          and sum within OCEAN_avail. Shrink a bit if needed.
 
+        @arguments
+          R -- np array of rewards in OCEAN: dense R, or the values of sparse R
+        """
         # filter negligible values
         R[R < 0.000001] = 0.0
 
         if np.sum(R) == 0.0:
-            return np.zeros((N_i, N_j), dtype=float)
+            return np.zeros(R.shape, dtype=float)
 
         # postcondition: nans
         assert not np.isnan(np.min(R)), R
@@ -235,23 +878,39 @@ class RewardCalculator:
         rewardsperlp: dict = {}
         rewardsinfo: dict = {}
 
-        for i, LP_addr in enumerate(self.LP_addrs):
-            for j, (chainID, nft_addr) in enumerate(self.chain_nft_tups):
-                assert self.R[i, j] >= 0.0, self.R[i, j]
-                if self.R[i, j] == 0.0:
-                    continue
-
-                if chainID not in rewardsperlp:
-                    rewardsperlp[chainID] = {}
-                if LP_addr not in rewardsperlp[chainID]:
-                    rewardsperlp[chainID][LP_addr] = 0.0
-                rewardsperlp[chainID][LP_addr] += self.R[i, j]
-
-                if chainID not in rewardsinfo:
-                    rewardsinfo[chainID] = {}
-                if nft_addr not in rewardsinfo[chainID]:
-                    rewardsinfo[chainID][nft_addr] = {}
-                rewardsinfo[chainID][nft_addr][LP_addr] = self.R[i, j]
+        # nonzero entries, in row-major order
+        if sparse.issparse(self.R):
+            R = sparse.coo_matrix(self.R)
+            order = np.lexsort((R.col, R.row))
+            i, j, R_ij = R.row[order], R.col[order], R.data[order]
+            i, j, R_ij = i[R_ij != 0.0], j[R_ij != 0.0], R_ij[R_ij != 0.0]
+        else:
+            i, j = np.nonzero(self.R)
+            R_ij = self.R[i, j]
+        assert (R_ij >= 0.0).all(), R_ij[R_ij < 0.0]
+
+        LP_addrs = np.array(self.LP_addrs, dtype=object)
+        nft_addrs = np.array([nft for _, nft in self.chain_nft_tups], dtype=object)
+        chain_of_j = np.array([chainID for chainID, _ in self.chain_nft_tups])
+
+        for chainID in np.unique(chain_of_j[j]).tolist():
+            in_chain = chain_of_j[j] == chainID
+            i_c, j_c, R_c = i[in_chain], j[in_chain], R_ij[in_chain]
+
+            # bincount sums each LP's rewards in order, i.e. over ascending j
+            LP_is = np.unique(i_c)
+            LP_sums = np.bincount(i_c, weights=R_c)[LP_is]
+            rewardsperlp[chainID] = dict(zip(LP_addrs[LP_is], LP_sums))
+
+            # split into one run of entries per nft
+            order = np.lexsort((i_c, j_c))
+            i_c, j_c, R_c = i_c[order], j_c[order], R_c[order]
+            nft_js, starts = np.unique(j_c, return_index=True)
+            ends = np.append(starts[1:], len(j_c))
+            rewardsinfo[chainID] = {
+                nft_addrs[nft_j]: dict(zip(LP_addrs[i_c[st:end]], R_c[st:end]))
+                for nft_j, st, end in zip(nft_js, starts, ends)
+            }
 
         return rewardsperlp, rewardsinfo
 
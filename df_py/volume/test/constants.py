@@ -1,9 +1,9 @@
 # for shorter lines
 RATES = {"OCEAN": 0.5, "H2O": 1.6, "PSDN": 0.01}
 C1, C2, C3 = 7, 137, 1285  # chainIDs
-NA, NB, NC, ND = "0xnfta_addr", "0xnftb_addr", "0xnftc_addr", "0xnftd_addr"
-LP1, LP2, LP3, LP4 = "0xlp1_addr", "0xlp2_addr", "0xlp3_addr", "0xlp4_addr"
-LP5 = "0xlp4_addr"
+NA, NB, NC, ND = ["0x" + c * 40 for c in "abcd"]  # nfts
+LP1, LP2, LP3, LP4 = [f"0x{i}" + "e" * 39 for i in range(1, 5)]
+LP5 = LP4
 OCN_SYMB, H2O_SYMB = "OCEAN", "H2O"
 OCN_ADDR, H2O_ADDR = "0xocean", "0xh2o"
 OCN_ADDR2, H2O_ADDR2 = "0xocean2", "0xh2o2"
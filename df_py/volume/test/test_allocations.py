@@ -7,8 +7,8 @@ from df_py.volume.allocations import allocs_to_stakes, load_stakes
 
 # for shorter lines
 C1, C2 = 7, 137
-NA, NB = "0xnfta_addr", "0xnftb_addr"
-ST1, ST2, ST3 = "0xst1_addr", "0xst2_addr", "0xst3_addr"
+NA, NB = ["0x" + c * 40 for c in "ab"]  # nfts
+ST1, ST2, ST3 = [f"0x{i}" + "e" * 39 for i in range(1, 4)]  # stakers
 
 
 @enforce_types
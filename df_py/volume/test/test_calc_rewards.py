@@ -1,9 +1,13 @@
 # pylint: disable=too-many-lines
+import contextlib
+import copy
+import functools
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 
 import numpy as np
 import pytest
+from scipy import sparse
 from enforce_typing import enforce_types
 from pytest import approx
 
@@ -13,7 +17,12 @@ from df_py.util.constants import (
 )
 from df_py.volume import csvs
 from df_py.volume.calc_rewards import calc_volume_rewards_from_csvs
-from df_py.volume.reward_calculator import TARGET_WPY, RewardCalculator
+from df_py.volume.rank import rank_based_allocate
+from df_py.volume.reward_calculator import (
+    TARGET_WPY,
+    RewardCalculator,
+    RewardScenario,
+)
 from df_py.volume.test.constants import *  # pylint: disable=wildcard-import
 from df_py.volume.test.helperfuncs import *  # pylint: disable=wildcard-import
 
@@ -25,6 +34,11 @@ class MockRewardCalculator(RewardCalculator):
     def set_mock_attribute(self, attr_name, attr_value):
         self._freeze_attributes = False
         setattr(self, attr_name, attr_value)
+        # keep the indices in sync, like _set_tups() does
+        if attr_name == "LP_addrs":
+            self.LP_index = {LP_addr: i for i, LP_addr in enumerate(attr_value)}
+        if attr_name == "chain_nft_tups":
+            self.chain_nft_index = {tup: j for j, tup in enumerate(attr_value)}
         self._freeze_attributes = True
 
     def set_V_USD(self, V_USD):
@@ -284,12 +298,12 @@ def test_mix_upper_and_lower_case():
     # setup
     stakes = {C1: {NA: {LP1: 10000.0}}}
     stakes2a = {C1: {NA: {LP1: 10000.0}}}
-    stakes2b = {C1: {"0xnfta_aDDr": {LP1: 10000.0}}}
-    stakes2c = {C1: {NA: {"0xlP1_aDdR": 10000.0}}}
+    stakes2b = {C1: {"0x" + NA[2:].upper(): {LP1: 10000.0}}}
+    stakes2c = {C1: {NA: {"0x" + LP1[2:].upper(): 10000.0}}}
 
     nftvols = {C1: {OCN_ADDR: {NA: 10000.0}}}
     nftvols2a = {C1: {OCN_ADDR.upper(): {NA: 10000.0}}}
-    nftvols2b = {C1: {OCN_ADDR: {"0xnfta_adDr": 10000.0}}}
+    nftvols2b = {C1: {OCN_ADDR: {"0xaA" + NA[4:]: 10000.0}}}
 
     rates2 = {"oceaN": 0.5, "h2O": 1.6}
 
@@ -507,6 +521,352 @@ def test_divide_by_zero():
     assert rewards_per_lp == {}
 
 
+def _random_scenario(n_LPs: int, n_nfts: int, seed: int):
+    """Return (stakes, locked_amts, nftvols, owners), with few stakes per LP"""
+    rng = np.random.default_rng(seed)
+    LPs = [f"0xlp{i}_addr" for i in range(n_LPs)]
+    nfts = [f"0xnft{j}_addr" for j in range(n_nfts)]
+
+    stakes: dict = {C1: {}, C2: {}}
+    locked_amts: dict = {C1: {}, C2: {}}
+    nftvols: dict = {C1: {OCN_ADDR: {}}, C2: {OCN_ADDR2: {}}}
+    owners: dict = {C1: {}, C2: {}}
+    for j, nft in enumerate(nfts):
+        chainID = C1 if j % 2 else C2
+        basetoken = OCN_ADDR if j % 2 else OCN_ADDR2
+        nftvols[chainID][basetoken][nft] = float(rng.choice([1e2, 1e3, 1e6]))
+        owners[chainID][nft] = LPs[int(rng.integers(n_LPs))]
+        stakes[chainID][nft] = {}
+        locked_amts[chainID][nft] = {}
+
+    for LP in LPs:
+        for j in rng.choice(n_nfts, size=int(rng.integers(1, 4)), replace=False):
+            chainID = C1 if j % 2 else C2
+            stake = float(rng.uniform(1.0, 1e5))
+            stakes[chainID][nfts[j]][LP] = stake
+            locked_amts[chainID][nfts[j]][LP] = stake * float(rng.uniform(0.1, 1))
+
+    return stakes, locked_amts, nftvols, owners
+
+
+@pytest.mark.parametrize("do_pubrewards", [False, True])
+@pytest.mark.parametrize("do_rank", [False, True])
+@patch(QUERY_PATH, MagicMock(return_value={}))
+def test_sparse_matches_dense(do_pubrewards, do_rank):
+    stakes, locked_amts, nftvols, owners = _random_scenario(200, 100, seed=3)
+    _assert_sparse_matches_dense(
+        stakes, locked_amts, nftvols, owners, 30, do_pubrewards, do_rank
+    )
+
+
+@pytest.mark.parametrize("do_pubrewards", [False, True])
+@patch(QUERY_PATH, MagicMock(return_value={}))
+def test_sparse_matches_dense_zero_stakes(do_pubrewards):
+    stakes, locked_amts, nftvols, owners = _random_scenario(200, 100, seed=7)
+
+    # some LPs have a zero stake on an nft, or zero locked OCEAN
+    for i, (chainID, nft_addr, LP_addr) in enumerate(
+        (chainID, nft_addr, LP_addr)
+        for chainID in stakes
+        for nft_addr in stakes[chainID]
+        for LP_addr in stakes[chainID][nft_addr]
+    ):
+        if i % 5 == 0:
+            stakes[chainID][nft_addr][LP_addr] = 0.0
+        elif i % 7 == 0:
+            locked_amts[chainID][nft_addr][LP_addr] = 0.0
+
+    # DCV multiplier is inf before week 9
+    _assert_sparse_matches_dense(
+        stakes, locked_amts, nftvols, owners, 5, do_pubrewards, True
+    )
+
+
+def _assert_sparse_matches_dense(
+    stakes, locked_amts, nftvols, owners, df_week, do_pubrewards, do_rank
+):
+    """Compute rewards with the dense and the sparse paths, and compare them"""
+    OCEAN_avail = 10000.0
+    args = (stakes, locked_amts, nftvols, OCEAN_avail)
+    kwargs = {
+        "symbols": {C1: {OCN_ADDR: OCN_SYMB}, C2: {OCN_ADDR2: OCN_SYMB}},
+        "rates": {OCN_SYMB: 0.5},
+        "owners": owners,
+        "df_week": df_week,
+        "do_pubrewards": do_pubrewards,
+        "do_rank": do_rank,
+    }
+
+    threshold_path = "df_py.volume.reward_calculator.SPARSE_DENSITY_THRESHOLD"
+    with patch(threshold_path, 0.0):
+        dense_per_lp, dense_info = calc_rewards_(*args, **kwargs)
+    with patch(threshold_path, 1.0):
+        sparse_per_lp, sparse_info = calc_rewards_(*args, **kwargs)
+
+    assert sparse_per_lp.keys() == dense_per_lp.keys()
+    for chainID, rewards in dense_per_lp.items():
+        assert sparse_per_lp[chainID] == approx(rewards)
+
+    assert sparse_info.keys() == dense_info.keys()
+    for chainID in dense_info:
+        assert sparse_info[chainID].keys() == dense_info[chainID].keys()
+        for nft_addr, rewards in dense_info[chainID].items():
+            assert sparse_info[chainID][nft_addr] == approx(rewards)
+
+    total = sum(sum(rewards.values()) for rewards in sparse_per_lp.values())
+    assert 0.0 < total <= OCEAN_avail
+
+
+@patch(QUERY_PATH, MagicMock(return_value={}))
+@enforce_types
+def test_sparse_chosen_by_density():
+    # 200 LPs x 100 nfts, <= 3 stakes per LP: density <= 3%
+    stakes, locked_amts, nftvols, owners = _random_scenario(200, 100, seed=4)
+    calculator = RewardCalculator(
+        stakes,
+        locked_amts,
+        nftvols,
+        owners,
+        {C1: {OCN_ADDR: OCN_SYMB}, C2: {OCN_ADDR2: OCN_SYMB}},
+        {OCN_SYMB: 0.5},
+        30,
+        10000.0,
+        True,
+        True,
+    )
+    calculator.calculate()
+    assert sparse.issparse(calculator.S)
+    assert sparse.issparse(calculator.L)
+    assert sparse.issparse(calculator.R)
+    assert calculator.R.nnz <= calculator.S.nnz
+
+    # test_simple: 1 LP x 1 nft is dense
+    calculator = RewardCalculator(
+        {C1: {NA: {LP1: 1000.0}}},
+        {C1: {NA: {LP1: 1000.0}}},
+        {C1: {OCN_ADDR: {NA: 1.0}}},
+        {C1: {NA: LP1}},
+        SYMBOLS,
+        RATES,
+        DF_WEEK,
+        10.0,
+        False,
+        False,
+    )
+    calculator.calculate()
+    assert isinstance(calculator.R, np.ndarray)
+
+
+def _calc_rewards__usd_loop(calculator) -> np.ndarray:
+    """Reference: the scalar loop that calc_rewards__usd() used to run"""
+    N_i, N_j = calculator.S.shape
+    S = np.copy(calculator.S)
+    if calculator.do_pubrewards:
+        for j in range(N_j):
+            if calculator.C[j] != -1:
+                S[calculator.C[j], j] *= 2.0
+    if calculator.do_rank:
+        perc_per_j = rank_based_allocate(calculator.V_USD)
+    else:
+        perc_per_j = calculator.V_USD / np.sum(calculator.V_USD)
+
+    R = np.zeros((N_i, N_j), dtype=float)
+    for j in range(N_j):
+        stake_j = sum(S[:, j])
+        DCV_OCEAN_j = calculator.V_USD[j] / calculator.rates["OCEAN"]
+        if stake_j == 0.0 or DCV_OCEAN_j == 0.0:
+            continue
+        for i in range(N_i):
+            perc_at_ij = S[i, j] / stake_j
+            with np.errstate(invalid="ignore"):  # 0 * inf multiplier
+                R[i, j] = min(
+                    perc_per_j[j] * perc_at_ij * calculator.OCEAN_avail,
+                    calculator.L[i, j] * TARGET_WPY,
+                    DCV_OCEAN_j * perc_at_ij * calculator.M[j],
+                )
+    R[R < 0.000001] = 0.0
+    return R
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("do_pubrewards", [False, True])
+@pytest.mark.parametrize("do_rank", [False, True])
+@patch(QUERY_PATH, MagicMock(return_value={}))
+def test_calc_rewards__usd_matches_loop(seed, do_pubrewards, do_rank):
+    rng = np.random.default_rng(seed)
+    N_i, N_j = 60, 40
+
+    # about 1/4 of stakes nonzero, some nfts without stake
+    S = rng.uniform(0.0, 1e5, (N_i, N_j)) * (rng.random((N_i, N_j)) < 0.25)
+    S[:, rng.random(N_j) < 0.1] = 0.0
+    L = S * rng.uniform(0.0, 1.0, (N_i, N_j))
+    V_USD = rng.choice([1e1, 1e3, 1e5], N_j)
+    if not do_rank:  # rank needs volume > 0 everywhere
+        V_USD[rng.random(N_j) < 0.1] = 0.0
+    M = rng.choice([0.001, 0.201, 1.0, np.inf], N_j)
+    C = np.where(rng.random(N_j) < 0.5, rng.integers(0, N_i, N_j), -1)
+
+    calculator = MockRewardCalculator()
+    for attr_name, attr_value in [
+        ("S", S),
+        ("L", L),
+        ("V_USD", V_USD),
+        ("M", M),
+        ("C", C),
+        ("rates", {"OCEAN": 0.5}),
+        ("OCEAN_avail", 10000.0),
+        ("do_pubrewards", do_pubrewards),
+        ("do_rank", do_rank),
+    ]:
+        calculator.set_mock_attribute(attr_name, attr_value)
+
+    R_loop = _calc_rewards__usd_loop(calculator)
+    assert np.sum(R_loop) > 0.0
+
+    R = calculator.calc_rewards__usd()
+    np.testing.assert_allclose(R, R_loop, rtol=1e-12, atol=1e-12)
+
+    # sparse path too. Store some zeros explicitly, as 0 * inf multiplier
+    # must not turn into nan rewards
+    stored = (S != 0.0) | (rng.random((N_i, N_j)) < 0.1)
+    i, j = np.nonzero(stored)
+    S_sparse = sparse.coo_matrix((S[i, j], (i, j)), shape=(N_i, N_j)).tocsr()
+    L_sparse = sparse.coo_matrix((L[i, j], (i, j)), shape=(N_i, N_j)).tocsr()
+    assert S_sparse.nnz > np.count_nonzero(S)
+    calculator.set_mock_attribute("S", S_sparse)
+    calculator.set_mock_attribute("L", L_sparse)
+    R_sparse = calculator.calc_rewards__usd()
+    np.testing.assert_allclose(R_sparse.toarray(), R_loop, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("threshold", [0.0, 1.0])  # dense, sparse
+@patch(QUERY_PATH, MagicMock(return_value={}))
+def test_calculate_scenarios(threshold):
+    stakes, locked_amts, nftvols, owners = _random_scenario(80, 30, seed=5)
+    symbols = {C1: {OCN_ADDR: OCN_SYMB}, C2: {OCN_ADDR2: OCN_SYMB}}
+    rates = {OCN_SYMB: 0.5}
+
+    def _calculator(OCEAN_avail, do_pubrewards, do_rank):
+        return RewardCalculator(
+            stakes,
+            locked_amts,
+            nftvols,
+            owners,
+            symbols,
+            rates,
+            30,
+            OCEAN_avail,
+            do_pubrewards,
+            do_rank,
+        )
+
+    scenarios = [
+        RewardScenario(),
+        RewardScenario(OCEAN_avail=500.0),
+        RewardScenario(do_pubrewards=False, do_rank=False),
+        RewardScenario(rank_scale_op="SQRT", max_n_rank_assets=10),
+        RewardScenario(target_wpy=0.5, OCEAN_avail=1e6),
+    ]
+    # (calculator args, patches) that each scenario must match
+    expected_args = [
+        ((10000.0, True, True), {}),
+        ((500.0, True, True), {}),
+        ((10000.0, False, False), {}),
+        (
+            (10000.0, True, True),
+            {
+                "rank_based_allocate": functools.partial(
+                    rank_based_allocate, max_n_rank_assets=10, rank_scale_op="SQRT"
+                )
+            },
+        ),
+        ((1e6, True, True), {"TARGET_WPY": 0.5}),
+    ]
+
+    rc_path = "df_py.volume.reward_calculator"
+    with patch(f"{rc_path}.SPARSE_DENSITY_THRESHOLD", threshold):
+        calculator = _calculator(10000.0, True, True)
+        totals, rewardsperlp_per_scenario = calculator.calculate_scenarios(scenarios)
+        assert not hasattr(calculator, "R")  # state untouched
+
+        assert len(totals) == len(rewardsperlp_per_scenario) == len(scenarios)
+        for k, (args, patches) in enumerate(expected_args):
+            with contextlib.ExitStack() as stack:
+                for name, value in patches.items():
+                    stack.enter_context(patch(f"{rc_path}.{name}", value))
+                rewardsperlp, _ = _calculator(*args).calculate()
+
+            assert rewardsperlp_per_scenario[k].keys() == rewardsperlp.keys()
+            for chainID, rewards in rewardsperlp.items():
+                assert rewardsperlp_per_scenario[k][chainID] == approx(rewards)
+            total = sum(sum(rewards.values()) for rewards in rewardsperlp.values())
+            assert totals[k] == approx(total)
+
+    assert totals[1] <= 500.0 * (1 + 1e-13)
+    assert totals[0] != approx(totals[3])
+
+    assert calculator.calculate_scenarios([])[1] == []
+
+
+@pytest.mark.parametrize("threshold", [0.0, 1.0])  # dense, sparse
+@pytest.mark.parametrize("do_rank", [False, True])
+@patch(QUERY_PATH, MagicMock(return_value={}))
+def test_incremental_updates(threshold, do_rank):
+    stakes, locked_amts, nftvols, owners = _random_scenario(80, 30, seed=6)
+    nft_a, nft_b = sorted(stakes[C1])[:2]
+    LP_a = sorted(stakes[C1][nft_a])[0]
+
+    with patch("df_py.volume.reward_calculator.SPARSE_DENSITY_THRESHOLD", threshold):
+        calculator = RewardCalculator(
+            stakes,
+            locked_amts,
+            nftvols,
+            owners,
+            {C1: {OCN_ADDR: OCN_SYMB}, C2: {OCN_ADDR2: OCN_SYMB}},
+            {OCN_SYMB: 0.5},
+            30,
+            10000.0,
+            True,
+            do_rank,
+        )
+        rewardsperlp, rewardsinfo = calculator.calculate()
+        info_b = copy.deepcopy(rewardsinfo[C1].get(nft_b))
+
+        # one stake: only that nft's column changes
+        result = calculator.update_stake(C1, nft_a, LP_a, 3e5, 2e5, verify=True)
+        assert result[0] is rewardsperlp and result[1] is rewardsinfo
+        assert rewardsinfo[C1].get(nft_b) == info_b
+
+        # new LP: full recompute
+        calculator.update_stake(C1, nft_b, "0xnew_lp", 1e4, 1e4, verify=True)
+        assert "0xnew_lp" in rewardsinfo[C1][nft_b]
+
+        # indices got rebuilt, so the new LP's next stake is incremental
+        i = calculator.LP_index["0xnew_lp"]
+        j = calculator.chain_nft_index[(C1, nft_b)]
+        assert calculator.LP_addrs[i] == "0xnew_lp"
+        assert calculator.chain_nft_tups[j] == (C1, nft_b)
+        calculator.update_stake(C1, nft_b, "0xnew_lp", 2e4, verify=True)
+        assert calculator.S[i, j] == 2e4
+
+        # volumes. Big enough to shift ranks
+        calculator.update_nftvol(C1, OCN_ADDR, nft_b, 1e9, verify=True)
+        calculator.update_nftvol(C1, OCN_ADDR, nft_a, 1.0, verify=True)
+
+        calculator.update_rate(OCN_SYMB, 0.7, verify=True)
+        calculator.update_OCEAN_avail(500.0, verify=True)
+        total = sum(sum(rewards.values()) for rewards in rewardsperlp.values())
+        assert total <= 500.0 * (1 + 1e-13)
+
+        calculator.update_stake(C1, nft_a, LP_a, 0.0, 0.0, verify=True)
+        assert LP_a not in rewardsinfo[C1].get(nft_a, {})
+
+        # verify() catches drift
+        rewardsperlp[C1][LP_a] = 123.0
+        with pytest.raises(AssertionError):
+            calculator.verify()
+
+
 # ========================================================================
 # Test helper functions found in calc_rewards
 
@@ -608,6 +968,75 @@ def test_stake_vol_owner_dicts_to_arrays():
     assert np.array_equal(V_USD, expected_V_USD)
 
 
+@patch(QUERY_PATH, MagicMock(return_value={}))
+@enforce_types
+def test_stake_vol_owner_dicts_to_arrays__owners_and_sparse_stakes():
+    stakes = {C1: {NA: {LP1: 10.0}, NB: {LP3: 30.0}}, C2: {NC: {LP2: 20.0}}}
+    locked_ocean_amts = {
+        C1: {NA: {LP1: 1.0, LP4: 4.0}, NB: {LP3: 3.0}},  # LP4 has no stake
+        C2: {NC: {LP2: 2.0}},
+    }
+    nftvols_USD = {C1: {NA: 1.0}, C2: {NC: 3.0}}
+    lp_addrs = [LP1, LP2, LP3]
+    chain_nft_tups = [(C1, NA), (C1, NB), (C2, NC)]
+    owners = {C1: {NA: LP3, NB: "0xnot_an_lp"}, C2: {NC: LP2}}
+
+    mock_calculator = MockRewardCalculator()
+    mock_calculator.set_mock_attribute("stakes", stakes)
+    mock_calculator.set_mock_attribute("locked_ocean_amts", locked_ocean_amts)
+    mock_calculator.set_mock_attribute("nftvols_USD", nftvols_USD)
+    mock_calculator.set_mock_attribute("LP_addrs", lp_addrs)
+    mock_calculator.set_mock_attribute("chain_nft_tups", chain_nft_tups)
+    mock_calculator.set_mock_attribute("predictoor_feed_addrs", {C1: [], C2: []})
+    mock_calculator.set_mock_attribute("owners", owners)
+
+    S, V_USD, _, C, L = mock_calculator._stake_vol_owner_dicts_to_arrays()
+
+    expected_S = np.array([[10.0, 0.0, 0.0], [0.0, 0.0, 20.0], [0.0, 30.0, 0.0]])
+    expected_L = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 2.0], [0.0, 3.0, 0.0]])
+    assert np.array_equal(S, expected_S)
+    assert np.array_equal(L, expected_L)
+    assert np.array_equal(V_USD, np.array([1.0, 0.0, 3.0]))
+    assert list(C) == [2, -1, 1]
+
+
+@pytest.mark.parametrize("as_sparse", [False, True])
+@patch(QUERY_PATH, MagicMock(return_value={}))
+def test_reward_array_to_dicts(as_sparse):
+    rng = np.random.default_rng(7)
+    N_i, N_j = 30, 12
+    R = rng.uniform(0.0, 10.0, (N_i, N_j)) * (rng.random((N_i, N_j)) < 0.2)
+    LP_addrs = [f"0xlp{i}_addr" for i in range(N_i)]
+    chain_nft_tups = [(C1 if j % 3 else C2, f"0xnft{j}_addr") for j in range(N_j)]
+
+    # expected: what the original per-cell loop produced
+    expected_perlp: dict = {}
+    expected_info: dict = {}
+    for i, LP_addr in enumerate(LP_addrs):
+        for j, (chainID, nft_addr) in enumerate(chain_nft_tups):
+            if R[i, j] == 0.0:
+                continue
+            perlp = expected_perlp.setdefault(chainID, {})
+            perlp[LP_addr] = perlp.get(LP_addr, 0.0) + R[i, j]
+            info = expected_info.setdefault(chainID, {}).setdefault(nft_addr, {})
+            info[LP_addr] = R[i, j]
+
+    mock_calculator = MockRewardCalculator()
+    mock_calculator.set_mock_attribute("R", sparse.csr_matrix(R) if as_sparse else R)
+    mock_calculator.set_mock_attribute("LP_addrs", LP_addrs)
+    mock_calculator.set_mock_attribute("chain_nft_tups", chain_nft_tups)
+    rewardsperlp, rewardsinfo = mock_calculator._reward_array_to_dicts()
+
+    assert rewardsperlp == expected_perlp  # same summation order: exact
+    assert rewardsinfo == expected_info
+
+    # negative rewards aren't allowed
+    R[0, 0] = -1.0
+    mock_calculator.set_mock_attribute("R", R)
+    with pytest.raises(AssertionError):
+        mock_calculator._reward_array_to_dicts()
+
+
 @enforce_types
 def test_volume_reward_calculator_no_pdrs(tmp_path):
     stakes = {
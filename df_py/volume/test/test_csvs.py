@@ -1,15 +1,17 @@
+import os
 from unittest.mock import patch
 
 import pytest
 from enforce_typing import enforce_types
 
+from df_py.util.addr_registry import get_addr_registry
 from df_py.volume import csvs
 from df_py.volume.models import SimpleDataNft
 
 # for shorter lines
 C1, C2 = 1, 137
-PA, PB, PC, PD, PE, PF = "0xpa", "0xpb", "0xpc", "0xpd", "0xpe", "0xpf"  # nfts
-LP1, LP2, LP3, LP4, LP5, LP6 = "0xlp1", "0xlp2", "0xlp3", "0xlp4", "0xlp5", "0xlp6"
+PA, PB, PC, PD, PE, PF = ["0x" + c * 40 for c in "abcdef"]  # nfts
+LP1, LP2, LP3, LP4, LP5, LP6 = [f"0x{i}" + "e" * 39 for i in range(1, 7)]
 OCN_SYMB, H2O_SYMB = "OCN", "H2O"
 OCN_ADDR, H2O_ADDR = "0xocn_addr", "0xh2o_addr"  # all lowercase
 OCN_ADDR2, H2O_ADDR2 = "0xOCN_AdDr", "0xh2O_ADDR"  # not all lowercase
@@ -55,16 +57,16 @@ def test_allocations_onechain_mixedcase(tmp_path):
     csv_dir = str(tmp_path)
     allocs_lowercase = {
         C1: {
-            PA: {"0xlp1": 0.1, "0xlp2": 1.0},
-            PB: {"0xlp1": 0.2, "0xlp3": 1.0},
-            PC: {"0xlp1": 0.7, "0xlp4": 1.0},
+            PA: {LP1: 0.1, LP2: 1.0},
+            PB: {LP1: 0.2, LP3: 1.0},
+            PC: {LP1: 0.7, LP4: 1.0},
         }
     }
     allocs_mixedcase = {
         C1: {
-            PA: {"0xlP1": 0.1, "0xLP2": 1.0},
-            PB: {"0xLp1": 0.2, "0xlp3": 1.0},
-            PC: {"0xlp1": 0.7, "0xLp4": 1.0},
+            PA: {"0x" + LP1[2:].upper(): 0.1, "0x" + LP2[2:].upper(): 1.0},
+            PB: {"0x1" + LP1[3:].upper(): 0.2, LP3: 1.0},
+            PC: {LP1: 0.7, "0x" + LP4[2:].upper(): 1.0},
         }
     }
     csvs.save_allocation_csv(allocs_mixedcase, csv_dir)
@@ -334,17 +336,17 @@ def test_rewards_info(tmp_path):  # pylint: disable=unused-argument
             PE: {LP1: 0.000000000000001, LP2: 12314552354},
         },
     }
-    target_rewards = """chainID,nft_addr,LP_addr,amt,token
-1,0xpa,0xlp1,3.2,OCEAN
-1,0xpa,0xlp2,5.4,OCEAN
-1,0xpb,0xlp2,5.3,OCEAN
-1,0xpb,0xlp3,1.324824324234,OCEAN
-1,0xpc,0xlp3,1.324824324234,OCEAN
-1,0xpc,0xlp4,1.23143252346354,OCEAN
-137,0xpd,0xlp1,1412341242,OCEAN
-137,0xpd,0xlp2,23424,OCEAN
-137,0xpe,0xlp1,1e-15,OCEAN
-137,0xpe,0xlp2,12314552354,OCEAN
+    target_rewards = f"""chainID,nft_addr,LP_addr,amt,token
+1,{PA},{LP1},3.2,OCEAN
+1,{PA},{LP2},5.4,OCEAN
+1,{PB},{LP2},5.3,OCEAN
+1,{PB},{LP3},1.324824324234,OCEAN
+1,{PC},{LP3},1.324824324234,OCEAN
+1,{PC},{LP4},1.23143252346354,OCEAN
+137,{PD},{LP1},1412341242,OCEAN
+137,{PD},{LP2},23424,OCEAN
+137,{PE},{LP1},1e-15,OCEAN
+137,{PE},{LP2},12314552354,OCEAN
 """
 
     csv_dir = str(tmp_path)
@@ -362,6 +364,128 @@ def test_rewards_info(tmp_path):  # pylint: disable=unused-argument
     assert loaded_rewards == rewards
 
 
+# =================================================================
+# parquet storage
+
+
+@enforce_types
+def test_parquet_storage(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_FORMAT", "parquet")
+    csv_dir = str(tmp_path)
+
+    allocs = {C1: {PA: {LP1: 0.1, LP2: 1.0}}, C2: {PB: {LP1: 0.9}}}
+    vebals, locked_amt, unlock_time = {LP1: 1.0}, {LP1: 10.0}, {LP1: 1}
+    V1 = {OCN_ADDR: {PA: 1.1, PB: 2.1}, H2O_ADDR: {PC: 3.1}}
+    owners_C1 = {PA: LP1, PB: LP2, PC: LP1}
+    symbols_C1 = {OCN_ADDR: OCN_SYMB, H2O_ADDR: H2O_SYMB}
+    rewards = {C1: {LP1: 1.1, LP2: 2.2}, C2: {LP1: 137.1}}
+
+    csvs.save_allocation_csv(allocs, csv_dir)
+    csvs.save_vebals_csv(vebals, locked_amt, unlock_time, csv_dir)
+    csvs.save_nftvols_csv(V1, csv_dir, C1)
+    csvs.save_owners_csv(owners_C1, csv_dir, C1)
+    csvs.save_symbols_csv(symbols_C1, csv_dir, C1)
+    csvs.save_rate_csv(OCN_SYMB, 0.66, csv_dir)
+    csvs.save_volume_rewards_csv(rewards, csv_dir)
+
+    fnames = sorted(os.listdir(csv_dir))
+    assert fnames == [
+        "allocations.parquet",
+        f"nftvols-{C1}.parquet",
+        f"owners-{C1}.parquet",
+        f"rate-{OCN_SYMB}.parquet",
+        f"symbols-{C1}.parquet",
+        "vebals.parquet",
+        "volume_rewards.parquet",
+    ]
+
+    with patch("web3.main.Web3.to_checksum_address") as mock:
+        mock.side_effect = lambda value: value
+        assert csvs.load_allocation_csvs(csv_dir) == allocs
+        assert csvs.load_vebals_csv(csv_dir) == (vebals, locked_amt, unlock_time)
+        assert csvs.load_volume_rewards_csv(csv_dir) == rewards
+
+    assert csvs.load_nftvols_csvs(csv_dir) == {C1: V1}
+    assert csvs.load_owners_csvs(csv_dir) == {C1: owners_C1}
+    assert csvs.load_symbols_csvs(csv_dir) == {C1: symbols_C1}
+    assert csvs.load_rate_csvs(csv_dir) == {OCN_SYMB: 0.66}
+
+    # csv files are not picked up when storing as parquet, and vice versa
+    monkeypatch.setenv("STORAGE_FORMAT", "csv")
+    assert not csvs.nftvols_csv_filenames(csv_dir)
+    assert not os.path.exists(csvs.allocation_csv_filename(csv_dir))
+
+
+# =================================================================
+# bulk loaders
+
+
+@enforce_types
+def test_load_arrays_checksum_once(tmp_path):
+    csv_dir = str(tmp_path)
+    addr1, addr2 = RND_ADDRS[0].lower(), RND_ADDRS[1].lower()
+    allocs = {
+        C1: {PA: {addr1: 0.1, addr2: 0.2}, PB: {addr1: 0.3}},
+        C2: {PA: {addr1: 0.4}},
+    }
+    vebals = {addr1: 1.0, addr2: 2.0}
+    csvs.save_allocation_csv(allocs, csv_dir)
+    csvs.save_vebals_csv(
+        vebals, {addr1: 3.0, addr2: 4.0}, {addr1: 5, addr2: 6}, csv_dir
+    )
+
+    get_addr_registry().clear()
+    with patch("web3.main.Web3.to_checksum_address") as mock:
+        mock.side_effect = lambda value: value.upper()
+        arrays = csvs.load_allocation_arrays(csv_dir)
+        assert mock.call_count == 2  # once per distinct LP, not once per row
+        csvs.load_allocation_arrays(csv_dir)
+        assert mock.call_count == 2  # memoized across loads
+    get_addr_registry().clear()
+
+    assert arrays["chainID"].tolist() == [C1, C1, C1, C2]
+    assert arrays["nft_addr"].tolist() == [PA, PA, PB, PA]
+    assert arrays["LP_addr"].tolist() == [
+        a.upper() for a in [addr1, addr2, addr1, addr1]
+    ]
+    assert arrays["percent"].tolist() == [0.1, 0.2, 0.3, 0.4]
+
+    arrays = csvs.load_vebals_arrays(csv_dir)
+    assert arrays["LP_addr"].tolist() == [RND_ADDRS[0], RND_ADDRS[1]]
+    assert arrays["balance"].tolist() == [1.0, 2.0]
+    assert arrays["locked_amt"].tolist() == [3.0, 4.0]
+    assert arrays["unlock_time"].tolist() == [5, 6]
+
+    loaded_vebals, _, _ = csvs.load_vebals_csv(csv_dir)
+    assert loaded_vebals == {RND_ADDRS[0]: 1.0, RND_ADDRS[1]: 2.0}
+
+
+@enforce_types
+def test_load_allocation_arrays_bad_addr(tmp_path):
+    csv_dir = str(tmp_path)
+    with open(csvs.allocation_csv_filename(csv_dir), "w") as f:
+        f.write("chainID,nft_addr,LP_addr,percent\n1,0xpa,FOO,0.5\n")
+
+    with pytest.raises(AssertionError):
+        csvs.load_allocation_arrays(csv_dir)
+
+
+@enforce_types
+def test_load_allocation_arrays_short_addr(tmp_path):
+    csv_dir = str(tmp_path)
+    csvs.save_allocation_csv({C1: {PA: {LP1: 0.5}, PB: {"0x1234": 0.5}}}, csv_dir)
+
+    with pytest.raises(AssertionError, match="0x1234"):
+        csvs.load_allocation_arrays(csv_dir)
+
+    # it's the same for the nft address
+    csv_dir = str(tmp_path / "nft")
+    os.mkdir(csv_dir)
+    csvs.save_allocation_csv({C1: {PA[:-1]: {LP1: 0.5}}}, csv_dir)
+    with pytest.raises(AssertionError, match=PA[:-1]):
+        csvs.load_allocation_arrays(csv_dir)
+
+
 # =================================================================
 # helper funcs
 @enforce_types
@@ -1,8 +1,11 @@
 # mypy: disable-error-code="attr-defined"
 # pylint: disable=too-many-lines
+import json
 import os
 import random
+import re
 import time
+from unittest.mock import Mock, patch
 
 import pytest
 from enforce_typing import enforce_types
@@ -1070,6 +1073,177 @@ def test_calculate_gas_vols_distributes_gas_evenly():
     ), "Gas volumes should be evenly distributed among NFTs."
 
 
+def test_queryAllocations_concurrent_matches_serial():
+    rng = BlockRange(st=0, fin=1000, num_samples=20, random_seed=42)
+    LP_addrs = [f"0x{i:040x}" for i in range(1, 6)]
+    nft_addrs = [f"0x{i:040x}" for i in range(10, 14)]
+
+    def _mock_allocs_at_block(block):
+        rand = random.Random(block)
+        return [
+            {
+                "id": f"{LP_addr}-{nft_addr}",
+                "allocated": str(rand.uniform(0, MAX_ALLOCATE / 4)),
+                "chainId": str(CHAINID),
+                "nftAddress": nft_addr,
+                "allocationUser": {"id": LP_addr},
+            }
+            for LP_addr in LP_addrs
+            for nft_addr in nft_addrs
+            if rand.random() > 0.3
+        ]
+
+    # pylint: disable=unused-argument
+    def _mock_submit_query(query, chainID):
+        # one page per block, aliased as b<block>
+        blocks = [int(block) for block in re.findall(r"b(\d+):", query)]
+        return {"data": {f"b{block}": _mock_allocs_at_block(block) for block in blocks}}
+
+    with patch("df_py.util.graphutil.submit_query") as mock:
+        mock.side_effect = _mock_submit_query
+        allocs_serial = queries.queryAllocations(rng, CHAINID, max_workers=1)
+        allocs_concurrent = queries.queryAllocations(rng, CHAINID, max_workers=8)
+
+    assert allocs_serial
+    assert allocs_concurrent == allocs_serial
+
+
+def _fake_ve_subgraph(n_blocks: int, n_users: int, seed: int = 0):
+    """
+    Fake submit_query() that serves veOCEANs & veDelegations which change
+    at random blocks. Understands aliases, id_gt, id_in and _change_block.
+    """
+    rand = random.Random(seed)
+    users = [f"0x{i:040x}" for i in range(1, n_users + 1)]
+
+    # [user] : list of (change_block, record). A user appears at its 1st change
+    history: dict = {}
+    deleg_changes: dict = {}  # [user] : list of blocks where delegation changed
+    for user in users:
+        change_blocks = sorted(rand.sample(range(n_blocks), rand.randint(1, 4)))
+        history[user] = []
+        for i, block in enumerate(change_blocks):
+            record = {
+                "id": user,
+                "lockedAmount": str(rand.uniform(1, 1000)),
+                "unlockTime": str(2_000_000_000 + rand.randint(0, 10**7)),
+                "delegation": [
+                    {
+                        "id": f"{user}-{j}",
+                        "receiver": {"id": rand.choice(users)},
+                        "amount": str(rand.uniform(0, 1)),
+                        "expireTime": str(2_000_000_000),
+                        "timeLeftUnlock": str(10**7),
+                        "lockedAmount": "1.0",
+                        "updates": [],
+                    }
+                    for j in range(rand.randint(0, 2))
+                ],
+            }
+            history[user].append((block, record))
+            if i > 0 and rand.random() < 0.5:
+                # only the delegation changed, not the veOCEAN itself
+                deleg_changes.setdefault(user, []).append(block)
+
+    def _state(user, block):
+        records = [record for (b, record) in history[user] if b <= block]
+        return records[-1] if records else None
+
+    def _last_change(user, block):
+        own = [
+            b
+            for (b, _) in history[user]
+            if b <= block and b not in deleg_changes.get(user, [])
+        ]
+        return max(own) if own else -1
+
+    pattern = re.compile(
+        r"(?:(b\d+): )?(veOCEANs|veDelegations)\(first: (\d+), orderBy: id, "
+        r"orderDirection: asc, where: \{(.*?)\}, block: \{number: (\d+)\}\)"
+    )
+
+    def _submit_query(query, chainID):  # pylint: disable=unused-argument
+        data = {}
+        for alias, entity, first, where, block in pattern.findall(query):
+            block = int(block)
+            last_id = re.search(r'id_gt: "([^"]+)"', where)
+            id_in = re.search(r"id_in: (\[.*?\])", where)
+            change = re.search(r"_change_block: \{number_gte: (\d+)\}", where)
+            records = []
+            for user in users:
+                record = _state(user, block)
+                if record is None:
+                    continue
+                record_id = user if entity == "veOCEANs" else f"{user}-d"
+                if last_id and record_id <= last_id.group(1):
+                    continue
+                if id_in and user not in json.loads(id_in.group(1)):
+                    continue
+                if entity == "veDelegations":
+                    changed = [b for b in deleg_changes.get(user, []) if b <= block]
+                    if change and (not changed or max(changed) < int(change.group(1))):
+                        continue
+                    records.append({"id": record_id, "delegator": {"id": user}})
+                    continue
+                if change and _last_change(user, block) < int(change.group(1)):
+                    continue
+                records.append(record)
+            data[alias or entity] = records[: int(first)]
+        return {"data": data}
+
+    return _submit_query
+
+
+def test_queryVeOCEANs_incremental_matches_full():
+    blocks = sorted(random.Random(1).sample(range(200), 30))
+    fake_subgraph = _fake_ve_subgraph(n_blocks=200, n_users=40)
+
+    with patch("df_py.util.graphutil.submit_query") as mock:
+        mock.side_effect = fake_subgraph
+        full = queries._queryVeOCEANsAtBlocks(blocks, CHAINID, 1)
+        n_records_full = sum(len(records) for records in full.values())
+
+        mock.reset_mock()
+        incremental = queries._queryVeOCEANsAtBlocksIncremental(blocks, CHAINID, 4)
+
+    assert incremental == full
+    assert n_records_full > 0
+
+
+def test_queryVebalances_incremental_falls_back():
+    blocks = sorted(random.Random(2).sample(range(200), 10))
+    fake_subgraph = _fake_ve_subgraph(n_blocks=200, n_users=20)
+    rng = BlockRange(st=0, fin=199, num_samples=10)
+    rng._blocks = blocks  # pylint: disable=protected-access
+    web3 = Mock()
+    web3.eth.get_block.return_value = Mock(timestamp=0)
+
+    with patch("df_py.util.graphutil.submit_query") as mock, patch(
+        "df_py.util.networkutil.chain_id_to_web3", return_value=web3
+    ):
+        mock.side_effect = fake_subgraph
+        full = queries.queryVebalances(rng, CHAINID)
+
+        # eg subgraph without the _change_block filter: full scan instead
+        with patch.object(
+            queries,
+            "_queryVeOCEANsAtBlocksIncremental",
+            side_effect=AssertionError({"errors": ["unknown filter"]}),
+        ):
+            fallback = queries.queryVebalances(rng, CHAINID, incremental=True)
+        assert fallback == full
+        assert full[0]
+
+        # other errors aren't swallowed
+        with patch.object(
+            queries,
+            "_queryVeOCEANsAtBlocksIncremental",
+            side_effect=ConnectionError("subgraph unreachable"),
+        ):
+            with pytest.raises(ConnectionError):
+                queries.queryVebalances(rng, CHAINID, incremental=True)
+
+
 # ===========================================================================
 # support functions
 
@@ -15,6 +15,7 @@ from setuptools import find_packages, setup
 # Installed by pip install ocean-provider
 # or pip install -e .
 install_requirements = [
+    "aiohttp",
     "coverage",
     "ccxt==3.0.84",
     "eciespy",
@@ -24,6 +25,7 @@ install_requirements = [
     "mypy",
     "numpy",
     "pandas",
+    "pyarrow",
     "pylint",
     "pytest",
     "pytest-env",